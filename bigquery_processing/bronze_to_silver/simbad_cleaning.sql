@@ -3,6 +3,8 @@
 -- =============================================
 -- Propósito: Limpiar, normalizar y validar datos SIMBAD desde bronze hacia silver
 -- Patrón: Procesar solo nuevos dt_captura (incremental)
+-- Nota: INSERT pensado para cargas iniciales; las recargas de períodos usan el
+--       upsert por row_key de sp_process_bronze_to_silver
 
 -- Insertar/Actualizar datos desde bronze hacia silver
 INSERT INTO `proyecto-integrador-dae-2025.silver_clean.simbad_hipotecarios`
@@ -11,7 +13,7 @@ INSERT INTO `proyecto-integrador-dae-2025.silver_clean.simbad_hipotecarios`
   genero, persona, deudaCapital, deudaVencida, deudaVencidaDe31A90Dias,
   cantidadCredito, valorDesembolso, valorGarantia, valorProvisionCapitalYRendimiento,
   deuda, periodo_date, anio, mes, periodo_ym, flg_periodo_invalido,
-  flg_importe_negativo, dt_captura
+  flg_importe_negativo, dt_captura, row_key
 )
 
 WITH bronze_data AS (
@@ -40,7 +42,14 @@ WITH bronze_data AS (
 
     -- Derivación de fecha y validaciones
     SAFE.PARSE_DATE('%Y-%m', periodo) AS periodo_date,
-    dt_captura
+    dt_captura,
+
+    -- Clave estable del hecho (misma fórmula que el harvester)
+    `proyecto-integrador-dae-2025.bronze.simbad_row_key`(
+      periodo, tipoCredito, tipoEntidad, entidad, sectorEconomico, region, provincia,
+      moneda, tipoCartera, actividad, sector, persona, facilidad, residencia,
+      administracionYPropiedad, genero, tipoCliente, clasificacionEntidad
+    ) AS row_key
 
   FROM `proyecto-integrador-dae-2025.bronze.simbad_bronze_parquet_ext`
 
@@ -81,7 +90,7 @@ SELECT
   residencia, genero, persona, deudaCapital, deudaVencida, deudaVencidaDe31A90Dias,
   cantidadCredito, valorDesembolso, valorGarantia, valorProvisionCapitalYRendimiento,
   deuda, periodo_date, anio, mes, periodo_ym, flg_periodo_invalido,
-  flg_importe_negativo, dt_captura
+  flg_importe_negativo, dt_captura, row_key
 
 FROM cleaned_data
 
@@ -90,9 +99,9 @@ FROM cleaned_data
 --   AND entidad IS NOT NULL       -- Solo registros con entidad
 --   AND provincia IS NOT NULL     -- Solo registros con provincia
 
--- Deduplicación por entidad + período + otros campos clave
+-- Deduplicación por row_key (dimensiones + período)
 QUALIFY ROW_NUMBER() OVER (
-  PARTITION BY entidad, periodo, tipoCliente, provincia, genero, persona
+  PARTITION BY row_key
   ORDER BY dt_captura DESC  -- En caso de duplicados, tomar el más reciente
 ) = 1;
 
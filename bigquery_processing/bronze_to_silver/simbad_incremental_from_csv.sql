@@ -4,6 +4,8 @@
 -- Propósito: Procesar incrementalmente CSV de landing directo a Silver
 -- Ventaja: Elimina dependencia de DataProc para datos nuevos
 -- Uso: Para cargas incrementales diarias/automáticas
+-- Nota: INSERT ad hoc; el SP sp_process_landing_to_silver_incremental hace
+--       upsert por row_key y no acumula revisiones de un mismo período
 
 INSERT INTO `proyecto-integrador-dae-2025.silver_clean.simbad_hipotecarios`
 (
@@ -11,7 +13,7 @@ INSERT INTO `proyecto-integrador-dae-2025.silver_clean.simbad_hipotecarios`
   genero, persona, deudaCapital, deudaVencida, deudaVencidaDe31A90Dias,
   cantidadCredito, valorDesembolso, valorGarantia, valorProvisionCapitalYRendimiento,
   deuda, periodo_date, anio, mes, periodo_ym, flg_periodo_invalido,
-  flg_importe_negativo, dt_captura
+  flg_importe_negativo, dt_captura, row_key
 )
 
 WITH latest_landing_dates AS (
@@ -41,7 +43,14 @@ raw_csv_data AS (
     valorProvisionCapitalYRendimiento,
 
     -- Extraer dt_captura del path del archivo
-    PARSE_DATE('%Y-%m-%d', REGEXP_EXTRACT(_FILE_NAME, r'/dt=(\d{4}-\d{2}-\d{2})/')) as dt_captura
+    PARSE_DATE('%Y-%m-%d', REGEXP_EXTRACT(_FILE_NAME, r'/dt=(\d{4}-\d{2}-\d{2})/')) as dt_captura,
+
+    -- Clave estable del hecho (misma fórmula que el harvester)
+    `proyecto-integrador-dae-2025.bronze.simbad_row_key`(
+      periodo, tipoCredito, tipoEntidad, entidad, sectorEconomico, region, provincia,
+      moneda, tipoCartera, actividad, sector, persona, facilidad, residencia,
+      administracionYPropiedad, genero, tipoCliente, clasificacionEntidad
+    ) AS row_key
 
   FROM `proyecto-integrador-dae-2025.bronze.simbad_landing_csv_ext`
 
@@ -83,7 +92,8 @@ cleaned_data AS (
       SAFE.PARSE_DATE('%m/%Y', periodo)
     ) AS periodo_date,
 
-    dt_captura
+    dt_captura,
+    row_key
 
   FROM raw_csv_data
 ),
@@ -118,7 +128,7 @@ SELECT
   residencia, genero, persona, deudaCapital, deudaVencida, deudaVencidaDe31A90Dias,
   cantidadCredito, valorDesembolso, valorGarantia, valorProvisionCapitalYRendimiento,
   deuda, periodo_date, anio, mes, periodo_ym, flg_periodo_invalido,
-  flg_importe_negativo, dt_captura
+  flg_importe_negativo, dt_captura, row_key
 
 FROM final_data
 
@@ -127,9 +137,9 @@ WHERE entidad IS NOT NULL
   AND provincia IS NOT NULL
   AND dt_captura IS NOT NULL
 
--- Deduplicación automática
+-- Deduplicación automática por row_key (dimensiones + período)
 QUALIFY ROW_NUMBER() OVER (
-  PARTITION BY entidad, periodo, tipoCliente, provincia, genero, persona
+  PARTITION BY row_key
   ORDER BY dt_captura DESC  -- Preferir carga más reciente
 ) = 1;
 
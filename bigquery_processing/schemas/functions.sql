@@ -0,0 +1,31 @@
+-- =============================================
+-- Funciones (UDF) compartidas
+-- =============================================
+
+-- Clave estable de un hecho SIMBAD: sha256 (hex, 32 chars) de las dimensiones +
+-- periodo, recortadas y unidas por U+001F (NULL → '').
+-- Debe coincidir con `_row_key` en landing/simbad/simbad/transform.py, que la
+-- calcula en el harvest y la escribe como columna `row_key` en landing/staging.
+CREATE OR REPLACE FUNCTION `proyecto-integrador-dae-2025.bronze.simbad_row_key`(
+  periodo STRING, tipoCredito STRING, tipoEntidad STRING, entidad STRING,
+  sectorEconomico STRING, region STRING, provincia STRING, moneda STRING,
+  tipoCartera STRING, actividad STRING, sector STRING, persona STRING,
+  facilidad STRING, residencia STRING, administracionYPropiedad STRING,
+  genero STRING, tipoCliente STRING, clasificacionEntidad STRING
+)
+RETURNS STRING
+AS (
+  SUBSTR(TO_HEX(SHA256(ARRAY_TO_STRING([
+    TRIM(periodo), TRIM(tipoCredito), TRIM(tipoEntidad), TRIM(entidad),
+    TRIM(sectorEconomico), TRIM(region), TRIM(provincia), TRIM(moneda),
+    TRIM(tipoCartera), TRIM(actividad), TRIM(sector), TRIM(persona),
+    TRIM(facilidad), TRIM(residencia), TRIM(administracionYPropiedad),
+    TRIM(genero), TRIM(tipoCliente), TRIM(clasificacionEntidad)
+  ], '\x1f', ''))), 1, 32)
+);
+
+-- Ejemplo:
+-- SELECT `proyecto-integrador-dae-2025.bronze.simbad_row_key`(
+--   '2025-01', 'Hipotecario', 'AAyP', 'BANCO X', 'Hogares', 'Ozama', 'SANTO DOMINGO', 'DOP',
+--   'Créditos Hipotecarios', 'Adquisición de viviendas', 'Privado', 'Física', 'Préstamo',
+--   'Residente', 'Privada Nacional', 'Femenino', 'Deudor', 'Grande');
@@ -61,8 +61,19 @@ CREATE OR REPLACE TABLE `proyecto-integrador-dae-2025.gold.alertas_provincia_12m
   tendencia_mora STRING,      -- 'SUBIENDO', 'BAJANDO', 'ESTABLE'
   nivel_alerta STRING,        -- 'ALTO', 'MEDIO', 'BAJO'
   entidades_afectadas INT64,
-  fecha_calculo DATE
-);
+  fecha_calculo DATE,         -- Última vez que cambió la fila
+
+  -- Estado incremental (sp_update_alertas_provincia_periods)
+  periodo_date DATE,
+  tasa_mora_12m FLOAT64,      -- Promedio de la ventana de 12 meses
+  percentil_nacional FLOAT64, -- PERCENT_RANK de la provincia en el mes
+  ventana_12m ARRAY<STRUCT<periodo_date DATE, tasa_mora FLOAT64>>  -- Buffer circular
+)
+PARTITION BY DATE_TRUNC(periodo_date, MONTH)
+CLUSTER BY provincia;
+
+-- Migración desde la tabla previa (sin estado): recrearla y reconstruir una vez
+-- CALL `proyecto-integrador-dae-2025.gold.sp_update_alertas_provincia`(DATE '2012-01-01');
 
 -- Tabla de Alertas para Looker (con particionado temporal)
 CREATE OR REPLACE TABLE `proyecto-integrador-dae-2025.gold.alertas_provincia_12m_looker`
@@ -38,8 +38,10 @@ CREATE OR REPLACE TABLE `proyecto-integrador-dae-2025.silver_clean.simbad_hipote
   flg_importe_negativo INT64,    -- 1 si hay importes negativos
 
   -- Metadatos
-  dt_captura DATE                -- Fecha de carga desde bronze
+  dt_captura DATE,               -- Fecha de carga desde bronze
+  row_key STRING                 -- Hash estable dimensiones + periodo (bronze.simbad_row_key)
 )
+PARTITION BY DATE_TRUNC(periodo_date, MONTH)
 CLUSTER BY entidad, tipoCliente;
 
 -- =============================================
@@ -51,8 +53,14 @@ CLUSTER BY entidad, tipoCliente;
 -- 2. Agregaciones por tipo de cliente
 -- 3. Performance en JOINs
 
+-- Particionado mensual por periodo_date + row_key:
+-- - Cada carga hace un MERGE por row_key acotado a las particiones de sus períodos:
+--   las revisiones reemplazan el hecho en sitio en lugar de añadir otra dt_captura
+-- - El tamaño de Silver es proporcional a hechos únicos, no a cargas
+-- - Tablas creadas antes de row_key: recrear y recargar desde landing
+--   (sp_process_landing_to_silver_incremental sobre todos los dt=)
+
 -- Recomendaciones adicionales:
--- - Particionar por dt_captura si hay múltiples cargas
 -- - Considerar clustering adicional por provincia si se consulta frecuentemente
 
 -- Ejemplo de uso:
@@ -209,54 +209,174 @@ BEGIN
 
 END;
 
+-- =============================================
+-- Stored Procedure: sp_update_alertas_provincia_periods
+-- =============================================
+-- Propósito: Actualizar alertas por provincia solo en los meses afectados
+-- Patrón: Cada fila de alertas guarda su ventana de 12 meses (`ventana_12m`,
+--         buffer circular de {periodo_date, tasa_mora}). El mes m se calcula con
+--         la partición m de simbad_gold y la ventana del mes previo de la misma
+--         provincia, sin ventanas analíticas sobre todo el histórico. Un período
+--         revisado invalida las ventanas de los 11 meses siguientes, así que se
+--         recorren en orden ascendente los meses afectados:
+--         periodos ∪ hasta 11 meses después, acotado al último mes de Gold.
+--         Costo O(meses afectados × provincias). Solo cambian las filas cuyos
+--         valores difieren, y quedan con fecha_calculo = CURRENT_DATE().
+
+CREATE OR REPLACE PROCEDURE `proyecto-integrador-dae-2025.gold.sp_update_alertas_provincia_periods`(
+  IN periodos ARRAY<DATE>
+)
+BEGIN
+  DECLARE start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP();
+  DECLARE filas_cambiadas INT64 DEFAULT 0;
+  DECLARE max_gold DATE DEFAULT (
+    SELECT MAX(periodo_date) FROM `proyecto-integrador-dae-2025.gold.simbad_gold`
+  );
+  DECLARE meses ARRAY<DATE> DEFAULT ARRAY(
+    SELECT DISTINCT m
+    FROM UNNEST(periodos) AS p,
+         UNNEST(GENERATE_DATE_ARRAY(DATE_TRUNC(p, MONTH), DATE_ADD(DATE_TRUNC(p, MONTH), INTERVAL 11 MONTH),
+                                    INTERVAL 1 MONTH)) AS m
+    WHERE m <= max_gold
+    ORDER BY m
+  );
+
+  FOR mes_actual IN (SELECT m FROM UNNEST(meses) AS m ORDER BY m) DO
+
+    MERGE `proyecto-integrador-dae-2025.gold.alertas_provincia_12m` AS target
+    USING (
+
+      WITH actual AS (
+        -- Una fila por provincia en la partición del mes
+        SELECT PROVINCIA AS provincia, COALESCE(TASA_MORA, 0) AS tasa_mora, ENTIDAD AS entidades
+        FROM `proyecto-integrador-dae-2025.gold.simbad_gold`
+        WHERE periodo_date = mes_actual.m
+      ),
+
+      previo AS (
+        -- Estado más reciente de cada provincia dentro de la ventana
+        SELECT provincia, tasa_mora_promedio AS tasa_mora_previa, ventana_12m
+        FROM `proyecto-integrador-dae-2025.gold.alertas_provincia_12m`
+        WHERE periodo_date >= DATE_SUB(mes_actual.m, INTERVAL 11 MONTH)
+          AND periodo_date < mes_actual.m
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY provincia ORDER BY periodo_date DESC) = 1
+      ),
+
+      ventanas AS (
+        -- Buffer circular: se descarta lo que sale de los 12 meses y entra el mes actual
+        SELECT
+          a.provincia, a.tasa_mora, a.entidades, p.tasa_mora_previa,
+          ARRAY_CONCAT(
+            ARRAY(SELECT v FROM UNNEST(p.ventana_12m) AS v
+                  WHERE v.periodo_date > DATE_SUB(mes_actual.m, INTERVAL 12 MONTH)
+                  ORDER BY v.periodo_date),
+            [STRUCT(mes_actual.m AS periodo_date, a.tasa_mora AS tasa_mora)]
+          ) AS ventana_12m
+        FROM actual a
+        LEFT JOIN previo p USING (provincia)
+      )
+
+      SELECT
+        provincia,
+        EXTRACT(YEAR FROM mes_actual.m) AS anio,
+        EXTRACT(MONTH FROM mes_actual.m) AS mes,
+        mes_actual.m AS periodo_date,
+        tasa_mora AS tasa_mora_promedio,
+
+        -- Tendencia contra el último mes disponible de la provincia
+        CASE
+          WHEN tasa_mora > tasa_mora_previa THEN 'SUBIENDO'
+          WHEN tasa_mora < tasa_mora_previa THEN 'BAJANDO'
+          ELSE 'ESTABLE'
+        END AS tendencia_mora,
+
+        CASE
+          WHEN tasa_mora > 0.15 THEN 'ALTO'
+          WHEN tasa_mora > 0.08 THEN 'MEDIO'
+          ELSE 'BAJO'
+        END AS nivel_alerta,
+
+        entidades AS entidades_afectadas,
+        (SELECT AVG(v.tasa_mora) FROM UNNEST(ventana_12m) AS v) AS tasa_mora_12m,
+        PERCENT_RANK() OVER (ORDER BY tasa_mora) AS percentil_nacional,
+        ventana_12m
+
+      FROM ventanas
+
+    ) AS source
+    ON target.periodo_date = mes_actual.m
+       AND target.provincia = source.provincia
+
+    -- Solo filas cuyo resultado cambió
+    WHEN MATCHED AND (
+      target.tasa_mora_promedio IS DISTINCT FROM source.tasa_mora_promedio
+      OR target.tendencia_mora IS DISTINCT FROM source.tendencia_mora
+      OR target.nivel_alerta IS DISTINCT FROM source.nivel_alerta
+      OR target.entidades_afectadas IS DISTINCT FROM source.entidades_afectadas
+      OR target.tasa_mora_12m IS DISTINCT FROM source.tasa_mora_12m
+      OR target.percentil_nacional IS DISTINCT FROM source.percentil_nacional
+    ) THEN UPDATE SET
+      tasa_mora_promedio = source.tasa_mora_promedio,
+      tendencia_mora = source.tendencia_mora,
+      nivel_alerta = source.nivel_alerta,
+      entidades_afectadas = source.entidades_afectadas,
+      tasa_mora_12m = source.tasa_mora_12m,
+      percentil_nacional = source.percentil_nacional,
+      ventana_12m = source.ventana_12m,
+      fecha_calculo = CURRENT_DATE()
+
+    -- Ventana sin cambios en valores visibles pero con otro contenido
+    WHEN MATCHED AND TO_JSON_STRING(target.ventana_12m) != TO_JSON_STRING(source.ventana_12m) THEN UPDATE SET
+      ventana_12m = source.ventana_12m
+
+    WHEN NOT MATCHED BY SOURCE AND target.periodo_date = mes_actual.m THEN DELETE
+
+    WHEN NOT MATCHED THEN INSERT (
+      provincia, anio, mes, tasa_mora_promedio, tendencia_mora, nivel_alerta,
+      entidades_afectadas, fecha_calculo, periodo_date, tasa_mora_12m,
+      percentil_nacional, ventana_12m
+    )
+    VALUES (
+      source.provincia, source.anio, source.mes, source.tasa_mora_promedio,
+      source.tendencia_mora, source.nivel_alerta, source.entidades_afectadas,
+      CURRENT_DATE(), source.periodo_date, source.tasa_mora_12m,
+      source.percentil_nacional, source.ventana_12m
+    );
+
+    SET filas_cambiadas = filas_cambiadas + @@row_count;
+
+  END FOR;
+
+  INSERT INTO `proyecto-integrador-dae-2025.gold.process_log`
+  (process_name, status, start_time, end_time, rows_processed, message)
+  VALUES (
+    'sp_update_alertas_provincia_periods',
+    'SUCCESS',
+    start_time,
+    CURRENT_TIMESTAMP(),
+    filas_cambiadas,
+    CONCAT('Alertas actualizadas. Meses recorridos: ', CAST(ARRAY_LENGTH(meses) AS STRING),
+           '. Filas cambiadas: ', CAST(filas_cambiadas AS STRING))
+  );
+
+END;
+
 -- =============================================
 -- Stored Procedure: sp_update_alertas_provincia
 -- =============================================
--- Propósito: Actualizar tabla de alertas por provincia
+-- Propósito: Actualizar alertas desde una fecha (compatibilidad); delega en
+--            sp_update_alertas_provincia_periods con los meses de Gold >= fecha
 
 CREATE OR REPLACE PROCEDURE `proyecto-integrador-dae-2025.gold.sp_update_alertas_provincia`(
   IN min_fecha_proceso DATE
 )
 BEGIN
 
-  -- Limpiar alertas existentes para el rango
-  DELETE FROM `proyecto-integrador-dae-2025.gold.alertas_provincia_12m`
-  WHERE DATE(CONCAT(CAST(anio AS STRING), '-', LPAD(CAST(mes AS STRING), 2, '0'), '-01')) >= min_fecha_proceso;
-
-  -- Insertar nuevas alertas
-  INSERT INTO `proyecto-integrador-dae-2025.gold.alertas_provincia_12m`
-  (provincia, anio, mes, tasa_mora_promedio, tendencia_mora, nivel_alerta, entidades_afectadas, fecha_calculo)
-
-  WITH alertas_calculadas AS (
-    SELECT
-      PROVINCIA as provincia,
-      ANIO as anio,
-      MES as mes,
-      AVG(TASA_MORA) as tasa_mora_promedio,
-
-      -- Calcular tendencia (comparar con mes anterior)
-      CASE
-        WHEN AVG(TASA_MORA) > LAG(AVG(TASA_MORA)) OVER (PARTITION BY PROVINCIA ORDER BY ANIO, MES) THEN 'SUBIENDO'
-        WHEN AVG(TASA_MORA) < LAG(AVG(TASA_MORA)) OVER (PARTITION BY PROVINCIA ORDER BY ANIO, MES) THEN 'BAJANDO'
-        ELSE 'ESTABLE'
-      END as tendencia_mora,
-
-      -- Calcular nivel de alerta
-      CASE
-        WHEN AVG(TASA_MORA) > 0.15 THEN 'ALTO'
-        WHEN AVG(TASA_MORA) > 0.08 THEN 'MEDIO'
-        ELSE 'BAJO'
-      END as nivel_alerta,
-
-      COUNT(DISTINCT ENTIDAD) as entidades_afectadas,
-      CURRENT_DATE() as fecha_calculo
-
+  CALL `proyecto-integrador-dae-2025.gold.sp_update_alertas_provincia_periods`(ARRAY(
+    SELECT DISTINCT periodo_date
     FROM `proyecto-integrador-dae-2025.gold.simbad_gold`
     WHERE periodo_date >= min_fecha_proceso
-    GROUP BY PROVINCIA, ANIO, MES
-  )
-
-  SELECT * FROM alertas_calculadas;
+  ));
 
 END;
 
@@ -273,4 +393,8 @@ END;
 -- ORDER BY created_at DESC LIMIT 20;
 
 -- Ejecutar solo validaciones:
--- CALL `proyecto-integrador-dae-2025.gold.sp_data_quality_checks`();
\ No newline at end of file
+-- CALL `proyecto-integrador-dae-2025.gold.sp_data_quality_checks`();
+
+-- Alertas cambiadas en la última actualización:
+-- SELECT * FROM `proyecto-integrador-dae-2025.gold.alertas_provincia_12m`
+-- WHERE fecha_calculo = CURRENT_DATE();
\ No newline at end of file
@@ -2,7 +2,7 @@
 -- Stored Procedure: sp_process_bronze_to_silver
 -- =============================================
 -- Propósito: Procesar datos desde Bronze (external tables) hacia Silver (cleaned tables)
--- Patrón: Incremental - solo nuevos dt_captura
+-- Patrón: Incremental - solo nuevos dt_captura, upsert por row_key en Silver
 -- Uso: CALL `proyecto-integrador-dae-2025.bronze.sp_process_bronze_to_silver`();
 
 CREATE OR REPLACE PROCEDURE `proyecto-integrador-dae-2025.bronze.sp_process_bronze_to_silver`()
@@ -10,6 +10,7 @@ BEGIN
   DECLARE rows_processed INT64 DEFAULT 0;
   DECLARE max_dt_captura_processed DATE;
   DECLARE start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP();
+  DECLARE periodos_date ARRAY<DATE>;
 
   -- Log inicio del proceso
   INSERT INTO `proyecto-integrador-dae-2025.gold.process_log`
@@ -27,15 +28,8 @@ BEGIN
       FROM `proyecto-integrador-dae-2025.silver_clean.simbad_hipotecarios`
     );
 
-    -- Insertar datos limpios desde bronze
-    INSERT INTO `proyecto-integrador-dae-2025.silver_clean.simbad_hipotecarios`
-    (
-      periodo, tipoCliente, actividad, entidad, sector, moneda, provincia, residencia,
-      genero, persona, deudaCapital, deudaVencida, deudaVencidaDe31A90Dias,
-      cantidadCredito, valorDesembolso, valorGarantia, valorProvisionCapitalYRendimiento,
-      deuda, periodo_date, anio, mes, periodo_ym, flg_periodo_invalido,
-      flg_importe_negativo, dt_captura
-    )
+    -- Datos limpios desde bronze, uno por row_key (la captura más reciente)
+    CREATE TEMP TABLE nuevas_filas AS
 
     WITH bronze_data AS (
       SELECT
@@ -63,7 +57,14 @@ BEGIN
 
         -- Derivación de fecha
         SAFE.PARSE_DATE('%Y-%m', periodo) AS periodo_date,
-        dt_captura
+        dt_captura,
+
+        -- Clave estable del hecho (misma fórmula que el harvester)
+        `proyecto-integrador-dae-2025.bronze.simbad_row_key`(
+          periodo, tipoCredito, tipoEntidad, entidad, sectorEconomico, region, provincia,
+          moneda, tipoCartera, actividad, sector, persona, facilidad, residencia,
+          administracionYPropiedad, genero, tipoCliente, clasificacionEntidad
+        ) AS row_key
 
       FROM `proyecto-integrador-dae-2025.bronze.simbad_bronze_parquet_ext`
 
@@ -91,15 +92,39 @@ BEGIN
       residencia, genero, persona, deudaCapital, deudaVencida, deudaVencidaDe31A90Dias,
       cantidadCredito, valorDesembolso, valorGarantia, valorProvisionCapitalYRendimiento,
       deuda, periodo_date, anio, mes, periodo_ym, flg_periodo_invalido,
-      flg_importe_negativo, dt_captura
+      flg_importe_negativo, dt_captura, row_key
 
     FROM cleaned_data
 
-    -- Deduplicación
-    QUALIFY ROW_NUMBER() OVER (
-      PARTITION BY entidad, periodo, tipoCliente, provincia, genero, persona
-      ORDER BY dt_captura DESC
-    ) = 1;
+    -- Deduplicación: un hecho por clave
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY row_key ORDER BY dt_captura DESC) = 1;
+
+    SET periodos_date = ARRAY(
+      SELECT DISTINCT periodo_date FROM nuevas_filas WHERE periodo_date IS NOT NULL
+    );
+
+    -- Upsert por row_key acotado a las particiones de los períodos recibidos:
+    -- las revisiones reemplazan el hecho en sitio en vez de añadir otra dt_captura
+    MERGE `proyecto-integrador-dae-2025.silver_clean.simbad_hipotecarios` AS target
+    USING nuevas_filas AS source
+    ON target.periodo_date IN UNNEST(periodos_date)
+       AND target.row_key = source.row_key
+
+    WHEN MATCHED THEN UPDATE SET
+      deudaCapital = source.deudaCapital,
+      deudaVencida = source.deudaVencida,
+      deudaVencidaDe31A90Dias = source.deudaVencidaDe31A90Dias,
+      cantidadCredito = source.cantidadCredito,
+      valorDesembolso = source.valorDesembolso,
+      valorGarantia = source.valorGarantia,
+      valorProvisionCapitalYRendimiento = source.valorProvisionCapitalYRendimiento,
+      deuda = source.deuda,
+      flg_importe_negativo = source.flg_importe_negativo,
+      dt_captura = source.dt_captura
+
+    WHEN NOT MATCHED BY SOURCE AND target.periodo_date IN UNNEST(periodos_date) THEN DELETE
+
+    WHEN NOT MATCHED THEN INSERT ROW;
 
     -- Obtener filas procesadas
     SET rows_processed = @@row_count;
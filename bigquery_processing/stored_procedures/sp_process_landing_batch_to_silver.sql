@@ -0,0 +1,234 @@
+-- =============================================
+-- Stored Procedure: sp_process_landing_batch_to_silver
+-- =============================================
+-- Propósito: Procesar a Silver solo el lote recién aterrizado por un harvester
+-- Patrón: El orquestador Python (landing/simbad/simbad/orchestrator.py) carga los
+--         archivos exactos de la corrida en `bronze.simbad_landing_batch` (load job,
+--         sin costo de escaneo) y llama este SP con los períodos afectados.
+--         No lee `simbad_landing_csv_ext` ni hace REGEXP sobre _FILE_NAME.
+-- Uso: CALL `proyecto-integrador-dae-2025.bronze.sp_process_landing_batch_to_silver`(
+--        ['2025-04', '2025-05', '2025-06'], DATE '2025-07-15');
+
+CREATE OR REPLACE PROCEDURE `proyecto-integrador-dae-2025.bronze.sp_process_landing_batch_to_silver`(
+  IN periodos ARRAY<STRING>,
+  IN p_dt_captura DATE
+)
+BEGIN
+  DECLARE rows_processed INT64 DEFAULT 0;
+  DECLARE start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP();
+  DECLARE periodos_date ARRAY<DATE> DEFAULT ARRAY(
+    SELECT PARSE_DATE('%Y-%m', p) FROM UNNEST(periodos) AS p
+  );
+
+  -- Log inicio del proceso
+  INSERT INTO `proyecto-integrador-dae-2025.gold.process_log`
+  (process_name, status, start_time, message)
+  VALUES (
+    'sp_process_landing_batch_to_silver',
+    'STARTED',
+    start_time,
+    CONCAT('Procesando lote de landing. Períodos: ', ARRAY_TO_STRING(periodos, ', '))
+  );
+
+  BEGIN
+    -- =============================================
+    -- 1. UPSERT POR row_key EN LAS PARTICIONES DEL LOTE
+    -- =============================================
+    -- Hechos revisados se actualizan en sitio, los nuevos se insertan y los que
+    -- desaparecieron de un período recargado se borran. Solo se tocan las
+    -- particiones de `periodos` (reprocesar un período no duplica filas).
+
+    MERGE `proyecto-integrador-dae-2025.silver_clean.simbad_hipotecarios` AS target
+    USING (
+
+      WITH cleaned_data AS (
+        SELECT
+          -- Campos string limpios
+          TRIM(periodo) AS periodo,
+          TRIM(tipoCliente) AS tipoCliente,
+          TRIM(actividad) AS actividad,
+          TRIM(entidad) AS entidad,
+          TRIM(sector) AS sector,
+          TRIM(moneda) AS moneda,
+          TRIM(provincia) AS provincia,
+          TRIM(residencia) AS residencia,
+          TRIM(genero) AS genero,
+          TRIM(persona) AS persona,
+
+          -- Limpieza y conversión numérica robusta (CAST: el lote puede venir de
+          -- Parquet con medidas FLOAT64 en lugar de STRING)
+          SAFE_CAST(REGEXP_REPLACE(REGEXP_REPLACE(COALESCE(CAST(deudaCapital AS STRING), '0'), r'[,$]', ''), r'[^0-9.-]', '') AS FLOAT64) AS deudaCapital,
+          SAFE_CAST(REGEXP_REPLACE(REGEXP_REPLACE(COALESCE(CAST(deudaVencida AS STRING), '0'), r'[,$]', ''), r'[^0-9.-]', '') AS FLOAT64) AS deudaVencida,
+          SAFE_CAST(REGEXP_REPLACE(REGEXP_REPLACE(COALESCE(CAST(deudaVencidaDe31A90Dias AS STRING), '0'), r'[,$]', ''), r'[^0-9.-]', '') AS FLOAT64) AS deudaVencidaDe31A90Dias,
+          SAFE_CAST(cantidadCredito AS INT64) AS cantidadCredito,
+          SAFE_CAST(REGEXP_REPLACE(REGEXP_REPLACE(COALESCE(CAST(valorDesembolso AS STRING), '0'), r'[,$]', ''), r'[^0-9.-]', '') AS FLOAT64) AS valorDesembolso,
+          SAFE_CAST(REGEXP_REPLACE(REGEXP_REPLACE(COALESCE(CAST(valorGarantia AS STRING), '0'), r'[,$]', ''), r'[^0-9.-]', '') AS FLOAT64) AS valorGarantia,
+          SAFE_CAST(REGEXP_REPLACE(REGEXP_REPLACE(COALESCE(CAST(valorProvisionCapitalYRendimiento AS STRING), '0'), r'[,$]', ''), r'[^0-9.-]', '') AS FLOAT64) AS valorProvisionCapitalYRendimiento,
+          SAFE_CAST(REGEXP_REPLACE(REGEXP_REPLACE(COALESCE(CAST(deuda AS STRING), '0'), r'[,$]', ''), r'[^0-9.-]', '') AS FLOAT64) AS deuda,
+
+          -- Fecha del período calculada en el harvest (SB_DERIVED_COLUMNS); archivos
+          -- anteriores (columna vacía u ocupada por otra) la parsean aquí
+          COALESCE(
+            SAFE_CAST(periodo_date AS DATE),
+            SAFE.PARSE_DATE('%Y-%m', periodo),
+            SAFE.PARSE_DATE('%Y/%m', periodo),
+            SAFE.PARSE_DATE('%m/%Y', periodo),
+            SAFE.PARSE_DATE('%Y%m', periodo)
+          ) AS periodo_date,
+
+          -- Derivadas del harvest (NULL en archivos anteriores)
+          SAFE_CAST(anio AS INT64) AS landing_anio,
+          SAFE_CAST(mes AS INT64) AS landing_mes,
+          SAFE_CAST(periodo_ym AS INT64) AS landing_periodo_ym,
+          SAFE_CAST(flg_periodo_invalido AS INT64) AS landing_flg_periodo_invalido,
+          SAFE_CAST(flg_importe_negativo AS INT64) AS landing_flg_importe_negativo,
+
+          p_dt_captura AS dt_captura,
+
+          -- Clave calculada en el harvest; CSV anteriores a row_key (columna vacía u
+          -- ocupada por otra) la recalculan con la misma fórmula en SQL
+          IF(REGEXP_CONTAINS(COALESCE(row_key, ''), r'^[0-9a-f]{32}$'), row_key,
+             `proyecto-integrador-dae-2025.bronze.simbad_row_key`(
+               periodo, tipoCredito, tipoEntidad, entidad, sectorEconomico, region, provincia,
+               moneda, tipoCartera, actividad, sector, persona, facilidad, residencia,
+               administracionYPropiedad, genero, tipoCliente, clasificacionEntidad
+             )) AS row_key
+
+        FROM `proyecto-integrador-dae-2025.bronze.simbad_landing_batch`
+
+        -- FILTRO: Solo períodos del lote
+        WHERE TRIM(periodo) IN UNNEST(periodos)
+      )
+
+      SELECT
+        periodo, tipoCliente, actividad, entidad, sector, moneda, provincia,
+        residencia, genero, persona, deudaCapital, deudaVencida, deudaVencidaDe31A90Dias,
+        cantidadCredito, valorDesembolso, valorGarantia, valorProvisionCapitalYRendimiento,
+        deuda, periodo_date,
+
+        -- Campos temporales derivados (del harvest o, si faltan, calculados)
+        COALESCE(landing_anio, EXTRACT(YEAR FROM periodo_date)) AS anio,
+        COALESCE(landing_mes, EXTRACT(MONTH FROM periodo_date)) AS mes,
+        COALESCE(landing_periodo_ym,
+                 EXTRACT(YEAR FROM periodo_date) * 100 + EXTRACT(MONTH FROM periodo_date)) AS periodo_ym,
+
+        -- Flags de calidad
+        COALESCE(landing_flg_periodo_invalido,
+                 CASE WHEN periodo_date IS NULL OR periodo = '' OR periodo IS NULL THEN 1 ELSE 0 END) AS flg_periodo_invalido,
+        COALESCE(landing_flg_importe_negativo,
+                 CASE WHEN deudaCapital < 0 OR deudaVencida < 0 OR deuda < 0 THEN 1 ELSE 0 END) AS flg_importe_negativo,
+
+        dt_captura, row_key
+
+      FROM cleaned_data
+
+      -- Filtros de calidad
+      WHERE entidad IS NOT NULL
+        AND provincia IS NOT NULL
+
+      -- Un hecho por clave
+      QUALIFY ROW_NUMBER() OVER (PARTITION BY row_key ORDER BY dt_captura DESC) = 1
+
+    ) AS source
+    ON target.periodo_date IN UNNEST(periodos_date)
+       AND target.row_key = source.row_key
+
+    WHEN MATCHED THEN UPDATE SET
+      deudaCapital = source.deudaCapital,
+      deudaVencida = source.deudaVencida,
+      deudaVencidaDe31A90Dias = source.deudaVencidaDe31A90Dias,
+      cantidadCredito = source.cantidadCredito,
+      valorDesembolso = source.valorDesembolso,
+      valorGarantia = source.valorGarantia,
+      valorProvisionCapitalYRendimiento = source.valorProvisionCapitalYRendimiento,
+      deuda = source.deuda,
+      flg_importe_negativo = source.flg_importe_negativo,
+      dt_captura = source.dt_captura
+
+    WHEN NOT MATCHED BY SOURCE AND target.periodo_date IN UNNEST(periodos_date) THEN DELETE
+
+    WHEN NOT MATCHED THEN INSERT (
+      periodo, tipoCliente, actividad, entidad, sector, moneda, provincia, residencia,
+      genero, persona, deudaCapital, deudaVencida, deudaVencidaDe31A90Dias,
+      cantidadCredito, valorDesembolso, valorGarantia, valorProvisionCapitalYRendimiento,
+      deuda, periodo_date, anio, mes, periodo_ym, flg_periodo_invalido,
+      flg_importe_negativo, dt_captura, row_key
+    )
+    VALUES (
+      source.periodo, source.tipoCliente, source.actividad, source.entidad, source.sector,
+      source.moneda, source.provincia, source.residencia, source.genero, source.persona,
+      source.deudaCapital, source.deudaVencida, source.deudaVencidaDe31A90Dias,
+      source.cantidadCredito, source.valorDesembolso, source.valorGarantia,
+      source.valorProvisionCapitalYRendimiento, source.deuda, source.periodo_date,
+      source.anio, source.mes, source.periodo_ym, source.flg_periodo_invalido,
+      source.flg_importe_negativo, source.dt_captura, source.row_key
+    );
+
+    SET rows_processed = @@row_count;
+
+    -- =============================================
+    -- 2. LOG DE ÉXITO
+    -- =============================================
+
+    INSERT INTO `proyecto-integrador-dae-2025.gold.process_log`
+    (process_name, status, start_time, end_time, rows_processed, message)
+    VALUES (
+      'sp_process_landing_batch_to_silver',
+      'SUCCESS',
+      start_time,
+      CURRENT_TIMESTAMP(),
+      rows_processed,
+      CONCAT('Lote procesado. Filas afectadas: ', CAST(rows_processed AS STRING),
+             '. Períodos: ', ARRAY_TO_STRING(periodos, ', '))
+    );
+
+  EXCEPTION WHEN ERROR THEN
+    INSERT INTO `proyecto-integrador-dae-2025.gold.process_log`
+    (process_name, status, start_time, end_time, message)
+    VALUES (
+      'sp_process_landing_batch_to_silver',
+      'ERROR',
+      start_time,
+      CURRENT_TIMESTAMP(),
+      CONCAT('Error procesando lote de landing: ', @@error.message)
+    );
+
+    RAISE USING MESSAGE = @@error.message;
+  END;
+
+END;
+
+-- =============================================
+-- Tabla de staging del lote
+-- =============================================
+-- La crea/sobrescribe el load job del orquestador (WRITE_TRUNCATE, mismo orden de
+-- columnas que los archivos de landing). Desde CSV todo es STRING; desde Parquet
+-- (SB_LANDING_FORMAT=parquet) el load reemplaza el esquema y las medidas llegan
+-- FLOAT64 (y periodo_date DATE, anio/mes/flags INT64). Una corrida a la vez por dataset.
+
+CREATE TABLE IF NOT EXISTS `proyecto-integrador-dae-2025.bronze.simbad_landing_batch`
+(
+  periodo STRING, tipoCredito STRING, tipoEntidad STRING, entidad STRING,
+  sectorEconomico STRING, region STRING, provincia STRING, moneda STRING,
+  tipoCartera STRING, actividad STRING, sector STRING, persona STRING,
+  facilidad STRING, residencia STRING, administracionYPropiedad STRING,
+  genero STRING, tipoCliente STRING, clasificacionEntidad STRING,
+  cantidadPlasticos STRING, cantidadCredito STRING, deuda STRING,
+  tasaPorDeuda STRING, deudaCapital STRING, deudaVencida STRING,
+  deudaVencidaDe31A90Dias STRING, valorDesembolso STRING, valorGarantia STRING,
+  valorProvisionCapitalYRendimiento STRING, row_key STRING,
+  periodo_date STRING, anio STRING, mes STRING, periodo_ym STRING,
+  flg_periodo_invalido STRING, flg_importe_negativo STRING
+);
+
+-- =============================================
+-- Ejemplo de Uso
+-- =============================================
+
+-- Normalmente lo invoca el orquestador tras cada harvest:
+--   python -m simbad.orchestrator --result resultado.json --run-date 2025-07-15
+
+-- Verificar logs:
+-- SELECT * FROM `proyecto-integrador-dae-2025.gold.process_log`
+-- WHERE process_name = 'sp_process_landing_batch_to_silver'
+-- ORDER BY created_at DESC LIMIT 5;
@@ -3,6 +3,7 @@
 -- =============================================
 -- Propósito: Procesar incremental desde Landing CSV directo a Silver (bypass Bronze)
 -- Optimización: Solo procesa nuevos dt= sin dependencia de DataProc
+-- Silver: upsert por row_key acotado a los períodos de las fechas nuevas (sin acumular revisiones)
 -- Uso: CALL `proyecto-integrador-dae-2025.bronze.sp_process_landing_to_silver_incremental`();
 
 CREATE OR REPLACE PROCEDURE `proyecto-integrador-dae-2025.bronze.sp_process_landing_to_silver_incremental`()
@@ -11,6 +12,7 @@ BEGIN
   DECLARE start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP();
   DECLARE new_dates_found ARRAY<STRING>;
   DECLARE dates_count INT64;
+  DECLARE periodos_date ARRAY<DATE>;
 
   -- Log inicio del proceso
   INSERT INTO `proyecto-integrador-dae-2025.gold.process_log`
@@ -63,14 +65,8 @@ BEGIN
     -- 2. PROCESAR SIMBAD INCREMENTAL
     -- =============================================
 
-    INSERT INTO `proyecto-integrador-dae-2025.silver_clean.simbad_hipotecarios`
-    (
-      periodo, tipoCliente, actividad, entidad, sector, moneda, provincia, residencia,
-      genero, persona, deudaCapital, deudaVencida, deudaVencidaDe31A90Dias,
-      cantidadCredito, valorDesembolso, valorGarantia, valorProvisionCapitalYRendimiento,
-      deuda, periodo_date, anio, mes, periodo_ym, flg_periodo_invalido,
-      flg_importe_negativo, dt_captura
-    )
+    -- Filas nuevas ya limpias, una por row_key (la revisión más reciente)
+    CREATE TEMP TABLE nuevas_filas AS
 
     WITH raw_csv_data AS (
       SELECT
@@ -83,7 +79,14 @@ BEGIN
         valorProvisionCapitalYRendimiento,
 
         -- Extraer dt_captura del path
-        PARSE_DATE('%Y-%m-%d', REGEXP_EXTRACT(_FILE_NAME, r'/dt=(\d{4}-\d{2}-\d{2})/')) as dt_captura
+        PARSE_DATE('%Y-%m-%d', REGEXP_EXTRACT(_FILE_NAME, r'/dt=(\d{4}-\d{2}-\d{2})/')) as dt_captura,
+
+        -- Clave estable del hecho (misma fórmula que el harvester)
+        `proyecto-integrador-dae-2025.bronze.simbad_row_key`(
+          periodo, tipoCredito, tipoEntidad, entidad, sectorEconomico, region, provincia,
+          moneda, tipoCartera, actividad, sector, persona, facilidad, residencia,
+          administracionYPropiedad, genero, tipoCliente, clasificacionEntidad
+        ) AS row_key
 
       FROM `proyecto-integrador-dae-2025.bronze.simbad_landing_csv_ext`
 
@@ -123,7 +126,8 @@ BEGIN
           SAFE.PARSE_DATE('%Y%m', periodo)
         ) AS periodo_date,
 
-        dt_captura
+        dt_captura,
+        row_key
 
       FROM raw_csv_data
     ),
@@ -148,7 +152,7 @@ BEGIN
       residencia, genero, persona, deudaCapital, deudaVencida, deudaVencidaDe31A90Dias,
       cantidadCredito, valorDesembolso, valorGarantia, valorProvisionCapitalYRendimiento,
       deuda, periodo_date, anio, mes, periodo_ym, flg_periodo_invalido,
-      flg_importe_negativo, dt_captura
+      flg_importe_negativo, dt_captura, row_key
 
     FROM final_data
 
@@ -157,11 +161,35 @@ BEGIN
       AND provincia IS NOT NULL
       AND dt_captura IS NOT NULL
 
-    -- Deduplicación
-    QUALIFY ROW_NUMBER() OVER (
-      PARTITION BY entidad, periodo, tipoCliente, provincia, genero, persona
-      ORDER BY dt_captura DESC
-    ) = 1;
+    -- Deduplicación: un hecho por clave, la captura más reciente
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY row_key ORDER BY dt_captura DESC) = 1;
+
+    SET periodos_date = ARRAY(
+      SELECT DISTINCT periodo_date FROM nuevas_filas WHERE periodo_date IS NOT NULL
+    );
+
+    -- Upsert por row_key acotado a las particiones de los períodos recibidos:
+    -- las revisiones reemplazan el hecho en sitio en vez de añadir otra dt_captura
+    MERGE `proyecto-integrador-dae-2025.silver_clean.simbad_hipotecarios` AS target
+    USING nuevas_filas AS source
+    ON target.periodo_date IN UNNEST(periodos_date)
+       AND target.row_key = source.row_key
+
+    WHEN MATCHED THEN UPDATE SET
+      deudaCapital = source.deudaCapital,
+      deudaVencida = source.deudaVencida,
+      deudaVencidaDe31A90Dias = source.deudaVencidaDe31A90Dias,
+      cantidadCredito = source.cantidadCredito,
+      valorDesembolso = source.valorDesembolso,
+      valorGarantia = source.valorGarantia,
+      valorProvisionCapitalYRendimiento = source.valorProvisionCapitalYRendimiento,
+      deuda = source.deuda,
+      flg_importe_negativo = source.flg_importe_negativo,
+      dt_captura = source.dt_captura
+
+    WHEN NOT MATCHED BY SOURCE AND target.periodo_date IN UNNEST(periodos_date) THEN DELETE
+
+    WHEN NOT MATCHED THEN INSERT ROW;
 
     SET rows_processed = @@row_count;
 
@@ -4,8 +4,15 @@
 -- Propósito: Procesar métricas desde Silver hacia Gold con datos macroeconómicos
 -- Patrón: Incremental - solo períodos nuevos/actualizados
 -- Uso: CALL `proyecto-integrador-dae-2025.silver_clean.sp_process_silver_to_gold`();
-
-CREATE OR REPLACE PROCEDURE `proyecto-integrador-dae-2025.silver_clean.sp_process_silver_to_gold`()
+--      CALL `proyecto-integrador-dae-2025.silver_clean.sp_process_silver_to_gold_periods`([DATE '2025-05-01']);
+--
+-- sp_process_silver_to_gold_periods recibe los períodos exactos (lo usa el
+-- orquestador tras un harvest); sp_process_silver_to_gold calcula la ventana
+-- de los últimos 2 meses y delega en él.
+
+CREATE OR REPLACE PROCEDURE `proyecto-integrador-dae-2025.silver_clean.sp_process_silver_to_gold_periods`(
+  IN periodos ARRAY<DATE>
+)
 BEGIN
   DECLARE rows_affected INT64 DEFAULT 0;
   DECLARE start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP();
@@ -14,19 +21,21 @@ BEGIN
   -- Log inicio del proceso
   INSERT INTO `proyecto-integrador-dae-2025.gold.process_log`
   (process_name, status, start_time, message)
-  VALUES ('sp_process_silver_to_gold', 'STARTED', start_time, 'Iniciando procesamiento Silver → Gold');
+  VALUES ('sp_process_silver_to_gold_periods', 'STARTED', start_time, 'Iniciando procesamiento Silver → Gold');
 
   BEGIN
     -- =============================================
-    -- 1. DETERMINAR RANGO DE PERÍODOS A PROCESAR
+    -- 1. PERÍODOS A PROCESAR (recibidos como parámetro)
     -- =============================================
 
-    -- Procesar últimos 2 meses para capturar actualizaciones
-    SET min_periodo_processed = COALESCE(
-      (SELECT DATE_SUB(MAX(periodo_date), INTERVAL 2 MONTH)
-       FROM `proyecto-integrador-dae-2025.gold.simbad_gold`),
-      '2012-01-01'
-    );
+    SET min_periodo_processed = (SELECT MIN(p) FROM UNNEST(periodos) AS p);
+
+    IF min_periodo_processed IS NULL THEN
+      INSERT INTO `proyecto-integrador-dae-2025.gold.process_log`
+      (process_name, status, start_time, end_time, message)
+      VALUES ('sp_process_silver_to_gold_periods', 'NO_NEW_DATA', start_time, CURRENT_TIMESTAMP(), 'Sin períodos para procesar');
+      RETURN;
+    END IF;
 
     -- =============================================
     -- 2. MERGE SILVER → GOLD CON MÉTRICAS
@@ -67,7 +76,7 @@ BEGIN
         FROM `proyecto-integrador-dae-2025.silver_clean.simbad_hipotecarios`
 
         -- FILTRO INCREMENTAL
-        WHERE periodo_date >= min_periodo_processed
+        WHERE periodo_date IN UNNEST(periodos)
           AND flg_periodo_invalido = 0
           AND provincia IS NOT NULL
           AND periodo_date IS NOT NULL
@@ -138,6 +147,8 @@ BEGIN
     -- MERGE conditions
     ON target.periodo_date = source.periodo_date
        AND target.PROVINCIA = source.PROVINCIA
+       -- Poda de particiones: solo los meses recibidos
+       AND target.periodo_date IN UNNEST(periodos)
 
     -- Actualizar registros existentes
     WHEN MATCHED THEN UPDATE SET
@@ -190,8 +201,8 @@ BEGIN
     -- 3. ACTUALIZAR TABLA DE ALERTAS
     -- =============================================
 
-    -- Regenerar alertas para períodos procesados
-    CALL `proyecto-integrador-dae-2025.gold.sp_update_alertas_provincia`(min_periodo_processed);
+    -- Actualizar alertas solo de los meses afectados (y sus ventanas de 12 meses)
+    CALL `proyecto-integrador-dae-2025.gold.sp_update_alertas_provincia_periods`(periodos);
 
     -- =============================================
     -- 4. LOG DE RESULTADOS
@@ -200,13 +211,13 @@ BEGIN
     INSERT INTO `proyecto-integrador-dae-2025.gold.process_log`
     (process_name, status, start_time, end_time, rows_processed, message)
     VALUES (
-      'sp_process_silver_to_gold',
+      'sp_process_silver_to_gold_periods',
       'SUCCESS',
       start_time,
       CURRENT_TIMESTAMP(),
       rows_affected,
       CONCAT('Gold actualizado exitosamente. Filas: ', CAST(rows_affected AS STRING),
-             '. Desde período: ', CAST(min_periodo_processed AS STRING))
+             '. Períodos: ', ARRAY_TO_STRING(ARRAY(SELECT CAST(p AS STRING) FROM UNNEST(periodos) AS p ORDER BY p), ', '))
     );
 
   EXCEPTION WHEN ERROR THEN
@@ -214,7 +225,7 @@ BEGIN
     INSERT INTO `proyecto-integrador-dae-2025.gold.process_log`
     (process_name, status, start_time, end_time, message)
     VALUES (
-      'sp_process_silver_to_gold',
+      'sp_process_silver_to_gold_periods',
       'ERROR',
       start_time,
       CURRENT_TIMESTAMP(),
@@ -227,6 +238,29 @@ BEGIN
 
 END;
 
+-- =============================================
+-- Stored Procedure: sp_process_silver_to_gold (ventana automática)
+-- =============================================
+
+CREATE OR REPLACE PROCEDURE `proyecto-integrador-dae-2025.silver_clean.sp_process_silver_to_gold`()
+BEGIN
+  DECLARE min_periodo_processed DATE;
+
+  -- Procesar últimos 2 meses para capturar actualizaciones
+  SET min_periodo_processed = COALESCE(
+    (SELECT DATE_SUB(MAX(periodo_date), INTERVAL 2 MONTH)
+     FROM `proyecto-integrador-dae-2025.gold.simbad_gold`),
+    '2012-01-01'
+  );
+
+  CALL `proyecto-integrador-dae-2025.silver_clean.sp_process_silver_to_gold_periods`(ARRAY(
+    SELECT DISTINCT periodo_date
+    FROM `proyecto-integrador-dae-2025.silver_clean.simbad_hipotecarios`
+    WHERE periodo_date >= min_periodo_processed
+  ));
+
+END;
+
 -- =============================================
 -- Ejemplo de Uso
 -- =============================================
@@ -234,11 +268,14 @@ END;
 -- Ejecutar proceso incremental:
 -- CALL `proyecto-integrador-dae-2025.silver_clean.sp_process_silver_to_gold`();
 
+-- Ejecutar solo períodos concretos:
+-- CALL `proyecto-integrador-dae-2025.silver_clean.sp_process_silver_to_gold_periods`([DATE '2025-05-01', DATE '2025-06-01']);
+
 -- Verificar resultados:
 -- SELECT COUNT(*), MIN(periodo_date), MAX(periodo_date)
 -- FROM `proyecto-integrador-dae-2025.gold.simbad_gold`;
 
 -- Verificar logs:
 -- SELECT * FROM `proyecto-integrador-dae-2025.gold.process_log`
--- WHERE process_name = 'sp_process_silver_to_gold'
+-- WHERE process_name = 'sp_process_silver_to_gold_periods'
 -- ORDER BY created_at DESC LIMIT 5;
\ No newline at end of file
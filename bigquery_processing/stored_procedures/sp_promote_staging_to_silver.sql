@@ -0,0 +1,138 @@
+-- =============================================
+-- Stored Procedure: sp_promote_staging_to_silver
+-- =============================================
+-- Propósito: Promover a Silver las particiones del staging tipado que el harvester
+--            cargó directamente (SB_BQ_STAGING=true, landing/simbad/simbad/bq_sink.py)
+-- Patrón: El staging ya tiene tipos, columnas derivadas y flags de Silver, así que
+--         la promoción es un MERGE de particiones sin REGEXP_REPLACE/SAFE_CAST ni
+--         lectura de CSV externos. Solo se leen las particiones recibidas.
+-- Uso: CALL `proyecto-integrador-dae-2025.bronze.sp_promote_staging_to_silver`(
+--        [DATE '2025-05-01', DATE '2025-06-01']);
+
+CREATE OR REPLACE PROCEDURE `proyecto-integrador-dae-2025.bronze.sp_promote_staging_to_silver`(
+  IN periodos ARRAY<DATE>
+)
+BEGIN
+  DECLARE rows_processed INT64 DEFAULT 0;
+  DECLARE start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP();
+
+  INSERT INTO `proyecto-integrador-dae-2025.gold.process_log`
+  (process_name, status, start_time, message)
+  VALUES (
+    'sp_promote_staging_to_silver',
+    'STARTED',
+    start_time,
+    CONCAT('Promoviendo staging → Silver. Períodos: ',
+           ARRAY_TO_STRING(ARRAY(SELECT CAST(p AS STRING) FROM UNNEST(periodos) AS p ORDER BY p), ', '))
+  );
+
+  BEGIN
+    -- Upsert por row_key acotado a las particiones del lote: revisiones en sitio,
+    -- hechos nuevos insertados, desaparecidos borrados
+    MERGE `proyecto-integrador-dae-2025.silver_clean.simbad_hipotecarios` AS target
+    USING (
+      SELECT *
+      FROM `proyecto-integrador-dae-2025.bronze.simbad_silver_staging`
+
+      -- Poda de particiones del staging
+      WHERE periodo_date IN UNNEST(periodos)
+
+      -- Un hecho por clave (row_key viene calculada desde el harvest)
+      QUALIFY ROW_NUMBER() OVER (PARTITION BY row_key ORDER BY dt_captura DESC) = 1
+    ) AS source
+    ON target.periodo_date IN UNNEST(periodos)
+       AND target.row_key = source.row_key
+
+    WHEN MATCHED THEN UPDATE SET
+      deudaCapital = source.deudaCapital,
+      deudaVencida = source.deudaVencida,
+      deudaVencidaDe31A90Dias = source.deudaVencidaDe31A90Dias,
+      cantidadCredito = source.cantidadCredito,
+      valorDesembolso = source.valorDesembolso,
+      valorGarantia = source.valorGarantia,
+      valorProvisionCapitalYRendimiento = source.valorProvisionCapitalYRendimiento,
+      deuda = source.deuda,
+      flg_importe_negativo = source.flg_importe_negativo,
+      dt_captura = source.dt_captura
+
+    WHEN NOT MATCHED BY SOURCE AND target.periodo_date IN UNNEST(periodos) THEN DELETE
+
+    WHEN NOT MATCHED THEN INSERT ROW;
+
+    SET rows_processed = @@row_count;
+
+    INSERT INTO `proyecto-integrador-dae-2025.gold.process_log`
+    (process_name, status, start_time, end_time, rows_processed, message)
+    VALUES (
+      'sp_promote_staging_to_silver',
+      'SUCCESS',
+      start_time,
+      CURRENT_TIMESTAMP(),
+      rows_processed,
+      CONCAT('Staging promovido. Filas afectadas: ', CAST(rows_processed AS STRING))
+    );
+
+  EXCEPTION WHEN ERROR THEN
+    INSERT INTO `proyecto-integrador-dae-2025.gold.process_log`
+    (process_name, status, start_time, end_time, message)
+    VALUES (
+      'sp_promote_staging_to_silver',
+      'ERROR',
+      start_time,
+      CURRENT_TIMESTAMP(),
+      CONCAT('Error promoviendo staging: ', @@error.message)
+    );
+
+    RAISE USING MESSAGE = @@error.message;
+  END;
+
+END;
+
+-- =============================================
+-- Tabla de staging tipada
+-- =============================================
+-- Mismas columnas y orden que silver_clean.simbad_hipotecarios (INSERT ROW).
+-- El harvester reemplaza una partición por período (`tabla$YYYYMM`, WRITE_TRUNCATE)
+-- con un load job Parquet; también la crea si no existe.
+
+CREATE TABLE IF NOT EXISTS `proyecto-integrador-dae-2025.bronze.simbad_silver_staging`
+(
+  periodo STRING,
+  tipoCliente STRING,
+  actividad STRING,
+  entidad STRING,
+  sector STRING,
+  moneda STRING,
+  provincia STRING,
+  residencia STRING,
+  genero STRING,
+  persona STRING,
+  deudaCapital FLOAT64,
+  deudaVencida FLOAT64,
+  deudaVencidaDe31A90Dias FLOAT64,
+  cantidadCredito INT64,
+  valorDesembolso FLOAT64,
+  valorGarantia FLOAT64,
+  valorProvisionCapitalYRendimiento FLOAT64,
+  deuda FLOAT64,
+  periodo_date DATE,
+  anio INT64,
+  mes INT64,
+  periodo_ym INT64,
+  flg_periodo_invalido INT64,
+  flg_importe_negativo INT64,
+  dt_captura DATE,
+  row_key STRING
+)
+PARTITION BY DATE_TRUNC(periodo_date, MONTH)
+CLUSTER BY entidad, tipoCliente;
+
+-- =============================================
+-- Ejemplo de Uso
+-- =============================================
+
+-- Particiones disponibles en staging:
+-- SELECT partition_id, total_rows
+-- FROM `proyecto-integrador-dae-2025.bronze.INFORMATION_SCHEMA.PARTITIONS`
+-- WHERE table_name = 'simbad_silver_staging'
+-- ORDER BY partition_id DESC;
@@ -0,0 +1,171 @@
+# landing/benchmarks/fake_gcs.py
+"""
+Sustituto en memoria de `google.cloud.storage` para el benchmark.
+
+Implementa solo lo que usan los harvesters (bucket/blob, upload_from_string,
+upload_from_filename, download_as_*, exists, reload, delete, list_blobs,
+get_blob, copy_blob, checksums, `updated` y precondiciones de generación) y cuenta
+bytes/objetos escritos.
+"""
+import sys
+import base64
+import datetime as dt
+import hashlib
+import threading
+import types
+
+try:
+    from google.api_core.exceptions import NotFound, PreconditionFailed
+except ImportError:  # el benchmark no requiere las librerías de Google
+    class NotFound(Exception):
+        pass
+
+    class PreconditionFailed(Exception):
+        pass
+
+try:
+    import google_crc32c
+except ImportError:
+    google_crc32c = None
+
+
+class _Store:
+    def __init__(self):
+        self.objects = {}
+        self.generations = {}
+        self.updated = {}
+        self.bytes_written = 0
+        self.uploads = 0
+        self.lock = threading.Lock()
+
+
+class FakeBlob:
+    def __init__(self, store: _Store, bucket: str, name: str):
+        self._store = store
+        self.bucket = bucket
+        self.name = name
+        self.metadata = None
+        self.content_type = None
+
+    @property
+    def _key(self):
+        return (self.bucket, self.name)
+
+    @property
+    def size(self):
+        data = self._store.objects.get(self._key)
+        return None if data is None else len(data)
+
+    @property
+    def generation(self):
+        return self._store.generations.get(self._key)
+
+    @property
+    def updated(self):
+        return self._store.updated.get(self._key)
+
+    @property
+    def md5_hash(self):
+        data = self._store.objects.get(self._key)
+        return None if data is None else base64.b64encode(hashlib.md5(data).digest()).decode()
+
+    @property
+    def crc32c(self):
+        data = self._store.objects.get(self._key)
+        if data is None or google_crc32c is None:
+            return None
+        return base64.b64encode(google_crc32c.value(data).to_bytes(4, "big")).decode()
+
+    def exists(self, *args, **kwargs):
+        return self._key in self._store.objects
+
+    def reload(self, *args, **kwargs):
+        if self._key not in self._store.objects:
+            raise NotFound(self.name)
+
+    def upload_from_string(self, data, content_type=None, if_generation_match=None, **kwargs):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        with self._store.lock:
+            if if_generation_match is not None and self._store.generations.get(self._key, 0) != if_generation_match:
+                raise PreconditionFailed(self.name)
+            self._store.objects[self._key] = bytes(data)
+            self._store.generations[self._key] = self._store.generations.get(self._key, 0) + 1
+            self._store.updated[self._key] = dt.datetime.now(dt.timezone.utc)
+            self._store.bytes_written += len(data)
+            self._store.uploads += 1
+        self.content_type = content_type
+
+    def upload_from_filename(self, filename, content_type=None, **kwargs):
+        with open(filename, "rb") as f:
+            self.upload_from_string(f.read(), content_type=content_type, **kwargs)
+
+    def upload_from_file(self, file_obj, content_type=None, **kwargs):
+        self.upload_from_string(file_obj.read(), content_type=content_type, **kwargs)
+
+    def download_as_bytes(self, *args, **kwargs):
+        return self._store.objects[self._key]
+
+    def download_as_text(self, *args, **kwargs):
+        return self.download_as_bytes().decode("utf-8")
+
+    def delete(self, *args, **kwargs):
+        with self._store.lock:
+            self._store.objects.pop(self._key, None)
+            self._store.generations.pop(self._key, None)
+            self._store.updated.pop(self._key, None)
+
+
+class FakeBucket:
+    def __init__(self, store: _Store, name: str):
+        self._store = store
+        self.name = name
+
+    def blob(self, name: str) -> FakeBlob:
+        return FakeBlob(self._store, self.name, name)
+
+    def get_blob(self, name: str):
+        return self.blob(name) if (self.name, name) in self._store.objects else None
+
+    def copy_blob(self, blob: FakeBlob, destination_bucket: "FakeBucket", new_name: str, **kwargs) -> FakeBlob:
+        new = destination_bucket.blob(new_name)
+        new.upload_from_string(self._store.objects[blob._key], content_type=blob.content_type,
+                               if_generation_match=kwargs.get("if_generation_match"))
+        return new
+
+    def list_blobs(self, prefix: str = "", **kwargs):
+        return [FakeBlob(self._store, b, n) for (b, n) in sorted(self._store.objects)
+                if b == self.name and n.startswith(prefix)]
+
+
+class FakeClient:
+    """Todas las instancias comparten el mismo store (como un bucket real)."""
+    store = _Store()
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def bucket(self, name: str) -> FakeBucket:
+        return FakeBucket(self.store, name)
+
+    def get_bucket(self, name: str) -> FakeBucket:
+        return self.bucket(name)
+
+
+def install() -> _Store:
+    """
+    Registra este módulo como `google.cloud.storage` antes de importar los
+    harvesters, de modo que `from google.cloud import storage` lo reciba.
+    """
+    fake = types.ModuleType("google.cloud.storage")
+    fake.Client = FakeClient
+    try:
+        import google.cloud as gcloud
+    except ImportError:
+        google = sys.modules.setdefault("google", types.ModuleType("google"))
+        gcloud = types.ModuleType("google.cloud")
+        google.cloud = gcloud
+        sys.modules["google.cloud"] = gcloud
+    sys.modules["google.cloud.storage"] = fake
+    gcloud.storage = fake
+    return FakeClient.store
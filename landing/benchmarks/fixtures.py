@@ -0,0 +1,127 @@
+# landing/benchmarks/fixtures.py
+"""
+Fixtures para el benchmark offline: páginas SB API, respuestas DSR de PowerBI
+y páginas de Data360.
+
+Si se pasa un directorio de fixtures grabadas se usan tal cual:
+
+    <dir>/sb/<YYYY-MM>.json          lista de filas del mes (sin paginar)
+    <dir>/powerbi/inflacion.json     respuesta completa de querydata
+    <dir>/powerbi/tipo_cambio.json
+    <dir>/data360/values.json        lista de items "value" (sin paginar)
+
+Lo que falte se genera sintéticamente, de forma determinista y escalable
+(`rows_per_month`, `data360_rows`).
+"""
+import os
+import json
+import random
+from typing import Dict, List, Optional
+
+_PROVINCIAS = ["DISTRITO NACIONAL", "SANTO DOMINGO", "SANTIAGO", "LA ALTAGRACIA", "PUERTO PLATA",
+               "LA ROMANA", "SAN CRISTOBAL", "LA VEGA", "DUARTE", "ESPAILLAT"]
+_ENTIDADES = ["BANCO POPULAR", "BANRESERVAS", "BHD", "SCOTIABANK", "ASOC. POPULAR", "ASOC. CIBAO",
+              "ASOC. LA NACIONAL", "BANCO SANTA CRUZ"]
+_CARTERAS = ["Créditos Hipotecarios"] * 4 + ["Créditos de Consumo"]
+
+
+def _load(path: str):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class Fixtures:
+    def __init__(self, rows_per_month: int = 2000, data360_rows: int = 5000,
+                 recorded_dir: Optional[str] = None, seed: int = 7):
+        self.rows_per_month = rows_per_month
+        self.data360_rows = data360_rows
+        self.recorded_dir = recorded_dir
+        self.seed = seed
+        self._sb_cache: Dict[str, List[dict]] = {}
+        self._data360: Optional[List[dict]] = None
+
+    def _recorded(self, *parts) -> Optional[str]:
+        if not self.recorded_dir:
+            return None
+        path = os.path.join(self.recorded_dir, *parts)
+        return path if os.path.exists(path) else None
+
+    # ---------- SB API ----------
+    def sb_rows(self, periodo: str) -> List[dict]:
+        """Filas del mes (todas las carteras; el harvester filtra hipotecarios)."""
+        if periodo in self._sb_cache:
+            return self._sb_cache[periodo]
+        path = self._recorded("sb", f"{periodo}.json")
+        if path:
+            rows = _load(path)
+        else:
+            rnd = random.Random(f"{self.seed}-{periodo}")
+            rows = []
+            for i in range(self.rows_per_month):
+                deuda = round(rnd.uniform(1e4, 5e7), 2)
+                vencida = round(deuda * rnd.choice([0, 0, 0, 0.01, 0.05, 0.2]), 2)
+                rows.append({
+                    "periodo": periodo,
+                    "tipoCredito": "Hipotecario",
+                    "tipoEntidad": "AAyP",
+                    "entidad": rnd.choice(_ENTIDADES),
+                    "sectorEconomico": "Hogares",
+                    "region": "Ozama",
+                    "provincia": rnd.choice(_PROVINCIAS),
+                    "moneda": rnd.choice(["DOP", "USD"]),
+                    "tipoCartera": rnd.choice(_CARTERAS),
+                    "actividad": "Adquisición de viviendas",
+                    "sector": "Privado",
+                    "persona": rnd.choice(["Física", "Jurídica"]),
+                    "facilidad": "Préstamo",
+                    "residencia": "Residente",
+                    "administracionYPropiedad": "Privada Nacional",
+                    "genero": rnd.choice(["Masculino", "Femenino", "N/A"]),
+                    "tipoCliente": "Deudor",
+                    "clasificacionEntidad": "Grande",
+                    "cantidadPlasticos": 0,
+                    "cantidadCredito": rnd.randint(1, 400),
+                    "deuda": deuda,
+                    "tasaPorDeuda": round(rnd.uniform(5, 18), 4),
+                    "deudaCapital": round(deuda * 0.97, 2),
+                    "deudaVencida": vencida,
+                    "deudaVencidaDe31A90Dias": round(vencida * 0.4, 2),
+                    "valorDesembolso": round(deuda * 1.1, 2),
+                    "valorGarantia": round(deuda * 1.6, 2),
+                    "valorProvisionCapitalYRendimiento": round(vencida * 0.5, 2),
+                    "id": i,
+                })
+        self._sb_cache[periodo] = rows
+        return rows
+
+    # ---------- PowerBI ----------
+    def powerbi(self, kind: str) -> dict:
+        """Respuesta querydata con el mismo anidamiento DSR que usa main.py."""
+        path = self._recorded("powerbi", f"{kind}.json")
+        if path:
+            return _load(path)
+        rnd = random.Random(f"{self.seed}-{kind}")
+        start_ms = 1514764800000  # 2018-01-01
+        day_ms = 86400000
+        if kind == "inflacion":
+            rows = [{"C": [start_ms + i * 30 * day_ms, round(rnd.uniform(0, 10), 2)]} for i in range(96)]
+        else:
+            rows = [{"C": [start_ms + i * day_ms, round(rnd.uniform(50, 65), 4)]} for i in range(2500)]
+        return {"results": [{"result": {"data": {"dsr": {"DS": [{"PH": [{"DM0": rows}]}]}}}}]}
+
+    # ---------- Data360 ----------
+    def data360_values(self) -> List[dict]:
+        if self._data360 is None:
+            path = self._recorded("data360", "values.json")
+            if path:
+                self._data360 = _load(path)
+            else:
+                rnd = random.Random(f"{self.seed}-data360")
+                areas = ["DOM", "MEX", "COL", "USA", "ESP", "CHL", "PER", "ARG"]
+                self._data360 = [{
+                    "OBS_VALUE": str(round(rnd.uniform(2, 20), 2)),
+                    "TIME_PERIOD": f"{2000 + (i // 12) % 25}-{i % 12 + 1:02d}",
+                    "FREQ": "M",
+                    "REF_AREA": areas[i % len(areas)],
+                } for i in range(self.data360_rows)]
+        return self._data360
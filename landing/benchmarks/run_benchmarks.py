@@ -0,0 +1,217 @@
+# landing/benchmarks/run_benchmarks.py
+"""
+Benchmark offline de los extractores de landing.
+
+Levanta un servidor local que imita SB API / PowerBI / Data360, sustituye GCS
+por un store en memoria y cronometra end-to-end `run_harvest`,
+`run_incremental_harvest` y `run_pipeline`. Cada escenario corre en su propio
+proceso para medir el pico de RSS sin contaminación entre escenarios.
+
+Uso:
+    python landing/benchmarks/run_benchmarks.py --years 3 --rows-per-month 5000
+    python landing/benchmarks/run_benchmarks.py --json out.json
+    python landing/benchmarks/run_benchmarks.py --baseline out.json --tolerance 0.2
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import datetime as dt
+import multiprocessing as mp
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+LANDING = os.path.dirname(HERE)
+SIMBAD_DIR = os.path.join(LANDING, "simbad")
+MACRO_DIR = os.path.join(LANDING, "macroeconomics")
+
+BUCKET = "bench-bucket"
+SB_PREFIX = "lakehouse/landing/simbad"
+SB_DATASET = "simbad_bench"
+MACRO_PREFIX = "lakehouse/landing/macroeconomics"
+
+SCENARIOS = [
+    "run_harvest",
+    "run_harvest[async]",
+    "run_incremental_harvest",
+    "run_pipeline",
+    "run_pipeline[async]",
+]
+
+
+def _peak_rss_mb() -> float:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: bytes
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def _csv_rows(store, prefix: str) -> int:
+    return sum(max(0, data.count(b"\n") - 1) for (b, n), data in store.objects.items()
+               if n.startswith(prefix) and n.endswith(".csv"))
+
+
+def _child(name: str, base_url: str, opts: dict, queue) -> None:
+    """Ejecuta un escenario en un proceso limpio y devuelve sus métricas por la cola."""
+    os.environ.setdefault("SB_RATE_INITIAL", str(opts["rate"]))
+    os.environ.setdefault("SB_RATE_MAX", str(opts["rate"]))
+    os.environ["GCS_BUCKET"] = BUCKET
+    os.environ["LANDING_PREFIX"] = MACRO_PREFIX
+    sys.path[:0] = [HERE, SIMBAD_DIR, MACRO_DIR]
+    if not opts["verbose"]:
+        import logging
+        logging.disable(logging.INFO)
+
+    import fake_gcs
+    store = fake_gcs.install()
+
+    try:
+        if name.startswith("run_pipeline"):
+            import main as macro
+            macro.QUERY_URL = f"{base_url}/powerbi"
+            macro.DATA360_URL = f"{base_url}/data360"
+            macro._warm_up()  # pandas/GCS se importan perezosamente; fuera del cronómetro
+            t0 = time.perf_counter()
+            res = macro.run_pipeline("2025-01-15", http_client="async" if "[async]" in name else "requests")
+            elapsed = time.perf_counter() - t0
+            rows = _csv_rows(store, MACRO_PREFIX)
+            extra = {"saved": len(res["saved"])}
+        else:
+            import simbad.client
+            simbad.client.API_BASE = f"{base_url}/sb"
+            try:
+                import simbad.aio
+                simbad.aio.API_BASE = f"{base_url}/sb"
+            except ImportError:
+                pass
+            from simbad import run_harvest, run_incremental_harvest
+
+            http_client = "async" if "[async]" in name else "requests"
+            t0 = time.perf_counter()
+            if name.startswith("run_harvest"):
+                res = run_harvest(
+                    api_key="bench", tipo_entidad="AAyP", start_year=opts["start_year"],
+                    bucket=BUCKET, prefix=SB_PREFIX, dataset=SB_DATASET,
+                    keep_monthly=opts["keep_monthly"], run_date="2025-01-15",
+                    max_workers=opts["workers"], http_client=http_client,
+                )
+            else:
+                res = run_incremental_harvest(
+                    api_key="bench", tipo_entidad="AAyP", bucket=BUCKET, prefix=SB_PREFIX,
+                    dataset=SB_DATASET, run_date="2025-01-15", lookback_months=opts["lookback"],
+                    max_workers=opts["workers"], http_client=http_client,
+                )
+            elapsed = time.perf_counter() - t0
+            rows = res.get("rows", 0)
+            extra = {"rate": res.get("rate"), "trace": res.get("trace")}
+
+        queue.put({
+            "scenario": name,
+            "ok": True,
+            "seconds": round(elapsed, 3),
+            "rows": rows,
+            "rows_per_s": round(rows / elapsed, 1) if elapsed > 0 else 0.0,
+            "peak_rss_mb": _peak_rss_mb(),
+            "bytes_written": store.bytes_written,
+            "uploads": store.uploads,
+            **extra,
+        })
+    except Exception as e:
+        queue.put({"scenario": name, "ok": False, "error": f"{type(e).__name__}: {e}"})
+
+
+def run(opts: dict, scenarios) -> list:
+    sys.path.insert(0, HERE)
+    from fixtures import Fixtures
+    from server import StandInServer
+
+    fixtures = Fixtures(rows_per_month=opts["rows_per_month"], data360_rows=opts["data360_rows"],
+                        recorded_dir=opts["fixtures"])
+    server = StandInServer(fixtures).start()
+    ctx = mp.get_context("spawn")
+    results = []
+    try:
+        for name in scenarios:
+            server.reset_counts()
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_child, args=(name, server.base_url, opts, queue))
+            proc.start()
+            res = queue.get()
+            proc.join()
+            res["requests"] = server.reset_counts()
+            results.append(res)
+    finally:
+        server.stop()
+    return results
+
+
+def _print_table(results: list) -> None:
+    header = f"{'scenario':<26}{'seconds':>9}{'rows':>10}{'rows/s':>11}{'rss MB':>9}{'requests':>10}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        if not r.get("ok"):
+            print(f"{r['scenario']:<26}  ERROR {r.get('error')}")
+            continue
+        reqs = sum(r["requests"].values())
+        print(f"{r['scenario']:<26}{r['seconds']:>9.2f}{r['rows']:>10}{r['rows_per_s']:>11.1f}"
+              f"{r['peak_rss_mb']:>9.1f}{reqs:>10}")
+
+
+def _compare(results: list, baseline_path: str, tolerance: float) -> int:
+    """Devuelve 1 si algún escenario cae más de `tolerance` en rows/s respecto al baseline."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {r["scenario"]: r for r in json.load(f)["results"] if r.get("ok")}
+    failed = 0
+    for r in results:
+        base = baseline.get(r["scenario"])
+        if not base or not r.get("ok") or not base["rows_per_s"]:
+            continue
+        change = r["rows_per_s"] / base["rows_per_s"] - 1
+        flag = "REGRESIÓN" if change < -tolerance else "ok"
+        failed |= change < -tolerance
+        print(f"{r['scenario']:<26}{base['rows_per_s']:>11.1f} → {r['rows_per_s']:>11.1f}  ({change:+.1%}) {flag}")
+    return int(failed)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--years", type=int, default=2, help="años de historia para run_harvest")
+    ap.add_argument("--rows-per-month", type=int, default=2000)
+    ap.add_argument("--data360-rows", type=int, default=5000)
+    ap.add_argument("--lookback", type=int, default=3)
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--rate", type=float, default=1000.0, help="tasa inicial/máxima del limitador (req/s)")
+    ap.add_argument("--keep-monthly", action="store_true")
+    ap.add_argument("--fixtures", help="directorio con fixtures grabadas (ver fixtures.py)")
+    ap.add_argument("--scenario", action="append", choices=SCENARIOS, help="repetible; default: todos")
+    ap.add_argument("--verbose", action="store_true", help="mostrar logs INFO de los harvesters")
+    ap.add_argument("--json", help="guardar resultados en este archivo")
+    ap.add_argument("--baseline", help="JSON previo contra el que comparar rows/s")
+    ap.add_argument("--tolerance", type=float, default=0.2)
+    args = ap.parse_args(argv)
+
+    opts = {
+        "start_year": dt.date.today().year - args.years + 1,
+        "rows_per_month": args.rows_per_month,
+        "data360_rows": args.data360_rows,
+        "lookback": args.lookback,
+        "workers": args.workers,
+        "rate": args.rate,
+        "keep_monthly": args.keep_monthly,
+        "fixtures": args.fixtures,
+        "verbose": args.verbose,
+    }
+    results = run(opts, args.scenario or SCENARIOS)
+    _print_table(results)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"options": opts, "results": results}, f, indent=2, default=str)
+    if args.baseline:
+        return _compare(results, args.baseline, args.tolerance)
+    return 0 if all(r.get("ok") for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
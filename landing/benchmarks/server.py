@@ -0,0 +1,114 @@
+# landing/benchmarks/server.py
+"""
+Servidor HTTP local que sustituye a la SB API, PowerBI querydata y Data360.
+
+    GET  /sb?periodoInicial=..&periodoFinal=..&paginas=N&registros=M   (+ x-pagination)
+    POST /powerbi                                                      (DSR)
+    GET  /data360?skip=K                                               ({"value": [...]})
+
+Cuenta requests por ruta para el reporte del benchmark.
+"""
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from fixtures import Fixtures
+
+DATA360_PAGE_SIZE = 1000
+
+
+def _month_range(start: str, end: str):
+    y, m = int(start[:4]), int(start[5:7])
+    ey, em = int(end[:4]), int(end[5:7])
+    while (y, m) <= (ey, em):
+        yield f"{y:04d}-{m:02d}"
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+
+
+class StandInServer:
+    def __init__(self, fixtures: Fixtures, host: str = "127.0.0.1", port: int = 0):
+        self.fixtures = fixtures
+        self.counts = Counter()
+        self._lock = threading.Lock()
+        handler = self._handler()
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reset_counts(self) -> dict:
+        with self._lock:
+            out = dict(self.counts)
+            self.counts.clear()
+        return out
+
+    def _count(self, route: str) -> None:
+        with self._lock:
+            self.counts[route] += 1
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, headers: dict = None):
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                q = {k: v[0] for k, v in parse_qs(url.query).items()}
+                if url.path.rstrip("/") == "/sb":
+                    server._count("sb")
+                    start = q.get("periodoInicial")
+                    end = q.get("periodoFinal", start)
+                    page = int(q.get("paginas", 1))
+                    size = int(q.get("registros", 10000))
+                    rows = [r for p in _month_range(start, end) for r in server.fixtures.sb_rows(p)]
+                    chunk = rows[(page - 1) * size: page * size]
+                    if not chunk:
+                        return self._send(200, b"[]")
+                    meta = {"TotalCount": len(rows), "PageSize": size, "CurrentPage": page,
+                            "HasNext": page * size < len(rows)}
+                    return self._send(200, json.dumps(chunk).encode(), {"x-pagination": json.dumps(meta)})
+                if url.path.rstrip("/") == "/data360":
+                    server._count("data360")
+                    skip = int(q.get("skip", 0))
+                    values = server.fixtures.data360_values()[skip: skip + DATA360_PAGE_SIZE]
+                    return self._send(200, json.dumps({"value": values}).encode())
+                self._send(404, b"{}")
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length).decode("utf-8") if length else ""
+                if url.path.rstrip("/") == "/powerbi":
+                    server._count("powerbi")
+                    kind = "inflacion" if "inflacion_mensual" in body else "tipo_cambio"
+                    return self._send(200, json.dumps(server.fixtures.powerbi(kind)).encode())
+                self._send(404, b"{}")
+
+        return Handler
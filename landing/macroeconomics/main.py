@@ -1,21 +1,65 @@
+from __future__ import annotations  # anotaciones pd.DataFrame sin importar pandas
+
 import os
-import tempfile
+import re
+import gzip
+import time
+import asyncio
+import inspect
+import functools
+import importlib
+import threading
+import sys
 import datetime as dt
+from contextlib import asynccontextmanager
 from typing import Optional, Dict, Any, List
 import json
-import pandas as pd
-import requests
-from fastapi import FastAPI, Body, HTTPException
-from google.cloud import storage
+from fastapi import FastAPI, Body, HTTPException, Response
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+class _LazyModule:
+    """Módulo que se importa en el primer acceso a un atributo: /healthz responde sin cargarlo."""
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attr: str):
+        return getattr(importlib.import_module(self._name), attr)
+
+
+# Dependencias pesadas (~550 ms en frío): se cargan en la primera extracción
+pd = _LazyModule("pandas")
+requests = _LazyModule("requests")
+storage = _LazyModule("google.cloud.storage")
+
+# Subidas sin cambios y lease de corrida compartidos con simbad: en la imagen
+# gcs_common.py se copia junto a main.py (ver Dockerfile); en el repo se toma de
+# landing/simbad/simbad/. Importa google-cloud-storage solo al usarlo.
+try:
+    import gcs_common
+except ImportError:
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "simbad", "simbad"))
+    import gcs_common
+
 # ========= CONFIG =========
 BUCKET = os.getenv("GCS_BUCKET")
 BASE_PREFIX = os.getenv("LANDING_PREFIX")
+# csv (default) o parquet: Parquet conserva los tipos y Spark lo lee sin parsear texto
+LANDING_FORMAT = os.getenv("MACRO_LANDING_FORMAT", "csv").lower()
+# true (default): no re-subir una serie idéntica a la ya guardada (CRC32C/MD5 del
+# objeto); su generación no cambia y bronze no la vuelve a procesar
+SKIP_IDENTICAL = os.getenv("MACRO_SKIP_IDENTICAL", "true").lower() == "true"
+# true (default): una sola corrida a la vez (lease en gs://<bucket>/<BASE_PREFIX>/_lock.json
+# renovado cada TTL/3); un /run duplicado devuelve {"skipped": "locked"} enseguida y,
+# si la corrida pierde el lease, falla antes de la siguiente subida
+RUN_LOCK = os.getenv("MACRO_RUN_LOCK", "true").lower() == "true"
+LOCK_TTL = float(os.getenv("MACRO_LOCK_TTL", "300"))
 
 # Validar que las variables estén definidas
 if not BUCKET:
@@ -29,7 +73,81 @@ HEADERS = {
 }
 # =========================
 
-app = FastAPI(title="Macroeconomics Scraper", version="1.0.0")
+# MACRO_WARMUP: none (default, carga en el primer /run), background (hilo al
+# arrancar, el servicio ya responde) o blocking (antes de aceptar tráfico)
+WARMUP = os.getenv("MACRO_WARMUP", "none").lower()
+WARMUP_MODULES = ("pandas", "requests", "google.cloud.storage") + (("pyarrow.parquet",) if LANDING_FORMAT == "parquet" else ())
+
+def _warm_up() -> Dict[str, float]:
+    timings = {}
+    for name in WARMUP_MODULES:
+        t0 = time.perf_counter()
+        importlib.import_module(name)
+        timings[name] = round(time.perf_counter() - t0, 3)
+    logger.info(f"[WARMUP] {timings}")
+    return timings
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARMUP == "blocking":
+        _warm_up()
+    elif WARMUP == "background":
+        threading.Thread(target=_warm_up, name="macro-warmup", daemon=True).start()
+    yield
+
+app = FastAPI(title="Macroeconomics Scraper", version="1.0.0", lifespan=lifespan)
+
+# ---------- Métricas Prometheus (/metrics) ----------
+# Etiquetas: dataset de landing y fuente (powerbi | data360)
+METRIC_LABELS = ("dataset", "source")
+API_LATENCY = Histogram("macro_api_request_seconds", "Latencia de cada request a la fuente",
+                        METRIC_LABELS, buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+API_RETRIES = Counter("macro_api_retries_total", "Reintentos por throttling (429), error de servidor o transporte",
+                      METRIC_LABELS + ("reason",))
+PAGES_PER_EXTRACT = Histogram("macro_pages_per_extract", "Páginas descargadas por extracción",
+                              METRIC_LABELS, buckets=(1, 2, 5, 10, 20, 50, 100, 200))
+ROWS_PER_SECOND = Histogram("macro_rows_per_second", "Filas extraídas por segundo de extracción",
+                            METRIC_LABELS, buckets=(10, 50, 100, 500, 1_000, 5_000, 10_000, 50_000))
+UPLOAD_THROUGHPUT = Histogram("macro_upload_bytes_per_second", "Throughput de cada subida a GCS",
+                              ("dataset",), buckets=(1e4, 1e5, 5e5, 1e6, 5e6, 1e7, 5e7))
+UPLOADS_SKIPPED = Counter("macro_uploads_skipped_total", "Subidas omitidas por contenido idéntico al objeto existente",
+                          ("dataset",))
+RUNS_SKIPPED = Counter("macro_runs_skipped_total", "Corridas omitidas porque otra tenía el lock")
+RUN_DURATION = Histogram("macro_run_duration_seconds", "Duración de run_pipeline",
+                         ("http_client",), buckets=(1, 5, 10, 30, 60, 120, 300, 600))
+
+
+def _metered(dataset: str, source: str):
+    """Registra filas/segundo de un extractor (bloqueante o async) que devuelve un DataFrame."""
+    def deco(fn):
+        def observe(df, t0):
+            elapsed = time.perf_counter() - t0
+            if elapsed > 0:
+                ROWS_PER_SECOND.labels(dataset, source).observe(len(df) / elapsed)
+            return df
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def awrapper(*args, **kwargs):
+                t0 = time.perf_counter()
+                return observe(await fn(*args, **kwargs), t0)
+            return awrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            return observe(fn(*args, **kwargs), t0)
+        return wrapper
+    return deco
+
+
+def _timed_request(dataset: str, source: str, method: str, url: str, **kwargs) -> requests.Response:
+    """requests.request midiendo latencia (cliente bloqueante)."""
+    t0 = time.perf_counter()
+    try:
+        return requests.request(method, url, **kwargs)
+    finally:
+        API_LATENCY.labels(dataset, source).observe(time.perf_counter() - t0)
 
 # ---------- Utils ----------
 def _normalize_date(run_date: Optional[str]) -> str:
@@ -48,113 +166,207 @@ def _normalize_date(run_date: Optional[str]) -> str:
 def _save_df_to_gcs(df: pd.DataFrame, dataset: str, date_str: str, filename: str) -> str:
     """
     Guarda df como CSV en: gs://<bucket>/<BASE_PREFIX>/<dataset>/dt=<date_str>/<filename>
+    Con MACRO_LANDING_FORMAT=parquet guarda <filename>.parquet en memoria (pyarrow).
+    Si el objeto ya tiene el mismo contenido no se vuelve a subir (MACRO_SKIP_IDENTICAL).
     """
     try:
+        if LANDING_FORMAT == "parquet":
+            filename = os.path.splitext(filename)[0] + ".parquet"
         object_name = f"{BASE_PREFIX}/{dataset}/dt={date_str}/{filename}"
-        client = storage.Client()
-        bkt = client.bucket(BUCKET)
-        blob = bkt.blob(object_name)
+        bkt = storage.Client().bucket(BUCKET)
 
-        with tempfile.NamedTemporaryFile(suffix=".csv", delete=True) as tmp:
-            df.to_csv(tmp.name, index=False, encoding="utf-8")
-            blob.upload_from_filename(tmp.name, content_type="text/csv")
+        if LANDING_FORMAT == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            sink = pa.BufferOutputStream()
+            pq.write_table(pa.Table.from_pandas(df, preserve_index=False), sink, compression="zstd")
+            data = sink.getvalue().to_pybytes()
+            content_type = "application/vnd.apache.parquet"
+        else:
+            data = df.to_csv(index=False).encode("utf-8")
+            content_type = "text/csv"
 
         path = f"gs://{BUCKET}/{object_name}"
+        t0 = time.perf_counter()
+        gcs_common.ensure_lease()  # LeaseLost si otra corrida tomó el lock
+        if not gcs_common.put_if_changed(bkt, object_name, data, content_type, skip_identical=SKIP_IDENTICAL):
+            UPLOADS_SKIPPED.labels(dataset).inc()
+            logger.info(f"[SKIP] {path} ya tiene el mismo contenido")
+            return path
+        elapsed = time.perf_counter() - t0
+        if elapsed > 0:
+            UPLOAD_THROUGHPUT.labels(dataset).observe(len(data) / elapsed)
+
         logger.info(f"[WRITE] {path}")
         return path
     except Exception as e:
         logger.error(f"Error saving to GCS: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to save to GCS: {str(e)}")
 
+# ---------- Archivo raw y replay ----------
+# MACRO_RAW_ARCHIVE=true (default: false): cada respuesta de las fuentes queda tal cual,
+# un registro por línea (JSON lines gzip), en
+#   gs://<bucket>/<BASE_PREFIX>/_raw/<source>/<dataset>/dt=<date_str>/page-0001.jsonl.gz
+# MACRO_REPLAY=true (o /run {"replay": true}) reconstruye el landing desde ahí
+# (dt=<date_str> o la fecha archivada anterior más reciente) sin llamar a las fuentes.
+RAW_ARCHIVE = os.getenv("MACRO_RAW_ARCHIVE", "false").lower() == "true"
+REPLAY = os.getenv("MACRO_REPLAY", "false").lower() == "true"
+
+def _raw_root(source: str, dataset: str) -> str:
+    return f"{BASE_PREFIX}/_raw/{source}/{dataset}/"
+
+def _archive_raw(source: str, dataset: str, date_str: str, pages: List[List[Any]]) -> None:
+    """Archiva las páginas (lista de registros cada una) de una extracción; no falla el pipeline."""
+    if not RAW_ARCHIVE:
+        return
+    try:
+        bkt = storage.Client().bucket(BUCKET)
+        base = f"{_raw_root(source, dataset)}dt={date_str}"
+        for i, records in enumerate(pages, 1):
+            lines = "\n".join(json.dumps(r, ensure_ascii=False, separators=(",", ":")) for r in records)
+            bkt.blob(f"{base}/page-{i:04d}.jsonl.gz").upload_from_string(
+                gzip.compress(lines.encode("utf-8")), content_type="application/gzip")
+        done = {"pages": len(pages), "rows": sum(len(p) for p in pages)}
+        bkt.blob(f"{base}/_done.json").upload_from_string(json.dumps(done), content_type="application/json")
+    except Exception as e:
+        logger.warning(f"[RAW] No se pudo archivar {dataset}: {str(e)}")
+
+def _load_raw(source: str, dataset: str, date_str: str) -> Optional[List[List[Any]]]:
+    """Páginas archivadas completas de dt=date_str, o de la fecha anterior más reciente."""
+    bkt = storage.Client().bucket(BUCKET)
+    root = _raw_root(source, dataset)
+    dates = sorted({m.group(1) for b in bkt.list_blobs(prefix=root)
+                    if b.name.endswith("/_done.json") and (m := re.search(r"/dt=([\d-]+)/", b.name))})
+    dates = [d for d in dates if d <= date_str]
+    if not dates:
+        return None
+    names = sorted(b.name for b in bkt.list_blobs(prefix=f"{root}dt={dates[-1]}/") if "/page-" in b.name)
+    logger.info(f"[REPLAY] {dataset}: {len(names)} página(s) de dt={dates[-1]}")
+    pages = []
+    for name in names:
+        lines = gzip.decompress(bkt.blob(name).download_as_bytes()).strip()
+        pages.append(json.loads(b"[" + lines.replace(b"\n", b",") + b"]") if lines else [])
+    return pages
+
+def _replay_all(date_str: str):
+    """Las tres extracciones desde el archivo raw (mismos parseos que con red)."""
+    sources = (
+        ("powerbi", "inflacion_12m", lambda pages: _parse_inflacion(pages[0][0])),
+        ("powerbi", "tipo_cambio", lambda pages: _parse_tipo_cambio(pages[0][0])),
+        ("data360", "desempleo_imf", lambda pages: _parse_desempleo([r for p in pages for r in p])),
+    )
+    out = []
+    for source, dataset, parse in sources:
+        pages = _load_raw(source, dataset, date_str)
+        if pages is None:
+            logger.warning(f"[REPLAY] {dataset}: sin respuestas archivadas hasta dt={date_str}")
+            out.append(pd.DataFrame())
+        else:
+            out.append(parse(pages))
+    return out
+
 # ---------- Extracciones ----------
+# Cada extractor se divide en payload/params, fetch y parseo: el parseo es
+# compartido entre la versión bloqueante (requests) y la asíncrona (httpx).
+
+def _inflacion_payload() -> Dict[str, Any]:
+    payload_txt = r"""
+    { "version": "1.0.0",
+      "queries": [
+        { "Query": { "Commands": [ { "SemanticQueryDataShapeCommand": {
+            "Query": {
+              "Version": 2,
+              "From": [
+                { "Name":"i1","Entity":"inflacion_mensual","Type":0 },
+                { "Name":"c", "Entity":"combustibles","Type":0 },
+                { "Name":"c1","Entity":"combustible_weeks","Type":0 },
+                { "Name":"c2","Entity":"combustible_months","Type":0 }
+              ],
+              "Select":[
+                { "Aggregation": {
+                    "Expression": {
+                      "Column": { "Expression":{ "SourceRef":{ "Source":"i1" } },
+                                   "Property":"inflacion" } },
+                    "Function": 0 },
+                  "Name":"Sum(inflacion_mensual.inflacion)" },
+                { "Column": {
+                    "Expression":{ "SourceRef":{ "Source":"i1" } },
+                    "Property":"Fecha" },
+                  "Name":"inflacion_mensual.Fecha.Variación.Date Hierarchy.Year" }
+              ],
+              "Where":[
+                { "Condition":{ "In":{
+                    "Expressions":[{ "Column":{
+                        "Expression":{ "SourceRef":{ "Source":"c" } },
+                        "Property":"combustible" }}],
+                    "Values":[[ { "Literal":{ "Value":"'Gasolina Premium'" } } ]] } } },
+                { "Condition":{ "Comparison":{
+                    "ComparisonKind":2,
+                    "Left":{ "Column":{
+                        "Expression":{ "SourceRef":{ "Source":"c" } },
+                        "Property":"Fecha" }},
+                    "Right":{ "Literal":{ "Value":"datetime'2018-01-01T00:00:00'" }}}}},
+                { "Condition":{ "In":{
+                    "Expressions":[{ "Column":{
+                        "Expression":{ "SourceRef":{ "Source":"c1" } },
+                        "Property":"year" }}],
+                    "Values":[[ { "Literal":{ "Value":"'2025'" } } ]] } } },
+                { "Condition":{ "In":{
+                    "Expressions":[{ "Column":{
+                        "Expression":{ "SourceRef":{ "Source":"c2" } },
+                        "Property":"month" }}],
+                    "Values":[[ { "Literal":{ "Value":"'AGOSTO'" } } ]] } } },
+                { "Condition":{ "In":{
+                    "Expressions":[{ "Column":{
+                        "Expression":{ "SourceRef":{ "Source":"c1" } },
+                        "Property":"Fecha" }}],
+                    "Values":[[ { "Literal":{ "Value":"'26 DE JULIO AL 1 DE AGOSTO DEL 2025'" } } ]] } } }
+              ]
+            },
+            "Binding": {
+              "Primary":{ "Groupings":[{ "Projections":[0,1] }] },
+              "DataReduction":{ "DataVolume":4,
+                                "Primary":{ "BinnedLineSample":{} }},
+              "Version":1 },
+            "ExecutionMetricsKind":1
+        } } ] },
+          "ApplicationContext":{ "DatasetId":4966303 }
+        }
+      ],
+      "cancelQueries":[],
+      "modelId":4966303
+    }
+    """.strip()
+    return json.loads(payload_txt)
+
+def _parse_inflacion(resp_json: Dict[str, Any]) -> pd.DataFrame:
+    dsr = resp_json["results"][0]["result"]["data"]["dsr"]
+    ph0 = dsr["DS"][0]["PH"][0]
+    dm_key = next(k for k in ph0 if k.startswith("DM"))
+    rows = ph0[dm_key]
+
+    df = pd.DataFrame(
+        {
+            "Fecha": pd.to_datetime([r["C"][0] for r in rows], unit="ms"),
+            "inflacion": [float(r["C"][1]) for r in rows],
+            "pais": "Dominican Republic"
+        }
+    ).sort_values("Fecha").assign(Fecha=lambda x: x["Fecha"].dt.strftime("%Y-%m"))
+
+    return df
+
+@_metered("inflacion_12m", "powerbi")
 def extract_inflacion_12m(run_date: str) -> pd.DataFrame:
     """
     Scrape 12-month inflation data from PowerBI API for Dominican Republic.
     """
     try:
-        payload_txt = r"""
-        { "version": "1.0.0",
-          "queries": [
-            { "Query": { "Commands": [ { "SemanticQueryDataShapeCommand": {
-                "Query": {
-                  "Version": 2,
-                  "From": [
-                    { "Name":"i1","Entity":"inflacion_mensual","Type":0 },
-                    { "Name":"c", "Entity":"combustibles","Type":0 },
-                    { "Name":"c1","Entity":"combustible_weeks","Type":0 },
-                    { "Name":"c2","Entity":"combustible_months","Type":0 }
-                  ],
-                  "Select":[
-                    { "Aggregation": {
-                        "Expression": {
-                          "Column": { "Expression":{ "SourceRef":{ "Source":"i1" } },
-                                       "Property":"inflacion" } },
-                        "Function": 0 },
-                      "Name":"Sum(inflacion_mensual.inflacion)" },
-                    { "Column": {
-                        "Expression":{ "SourceRef":{ "Source":"i1" } },
-                        "Property":"Fecha" },
-                      "Name":"inflacion_mensual.Fecha.Variación.Date Hierarchy.Year" }
-                  ],
-                  "Where":[
-                    { "Condition":{ "In":{
-                        "Expressions":[{ "Column":{
-                            "Expression":{ "SourceRef":{ "Source":"c" } },
-                            "Property":"combustible" }}],
-                        "Values":[[ { "Literal":{ "Value":"'Gasolina Premium'" } } ]] } } },
-                    { "Condition":{ "Comparison":{
-                        "ComparisonKind":2,
-                        "Left":{ "Column":{
-                            "Expression":{ "SourceRef":{ "Source":"c" } },
-                            "Property":"Fecha" }},
-                        "Right":{ "Literal":{ "Value":"datetime'2018-01-01T00:00:00'" }}}}},
-                    { "Condition":{ "In":{
-                        "Expressions":[{ "Column":{
-                            "Expression":{ "SourceRef":{ "Source":"c1" } },
-                            "Property":"year" }}],
-                        "Values":[[ { "Literal":{ "Value":"'2025'" } } ]] } } },
-                    { "Condition":{ "In":{
-                        "Expressions":[{ "Column":{
-                            "Expression":{ "SourceRef":{ "Source":"c2" } },
-                            "Property":"month" }}],
-                        "Values":[[ { "Literal":{ "Value":"'AGOSTO'" } } ]] } } },
-                    { "Condition":{ "In":{
-                        "Expressions":[{ "Column":{
-                            "Expression":{ "SourceRef":{ "Source":"c1" } },
-                            "Property":"Fecha" }}],
-                        "Values":[[ { "Literal":{ "Value":"'26 DE JULIO AL 1 DE AGOSTO DEL 2025'" } } ]] } } }
-                  ]
-                },
-                "Binding": {
-                  "Primary":{ "Groupings":[{ "Projections":[0,1] }] },
-                  "DataReduction":{ "DataVolume":4,
-                                    "Primary":{ "BinnedLineSample":{} }},
-                  "Version":1 },
-                "ExecutionMetricsKind":1
-            } } ] },
-              "ApplicationContext":{ "DatasetId":4966303 }
-            }
-          ],
-          "cancelQueries":[],
-          "modelId":4966303
-        }
-        """.strip()
-
-        payload = json.loads(payload_txt)
-        r = requests.post(QUERY_URL, headers=HEADERS, json=payload, timeout=30)
+        r = _timed_request("inflacion_12m", "powerbi", "POST", QUERY_URL,
+                           headers=HEADERS, json=_inflacion_payload(), timeout=30)
         r.raise_for_status()
-        dsr = r.json()["results"][0]["result"]["data"]["dsr"]
-        ph0 = dsr["DS"][0]["PH"][0]
-        dm_key = next(k for k in ph0 if k.startswith("DM"))
-        rows = ph0[dm_key]
-
-        df = pd.DataFrame(
-            {
-                "Fecha": pd.to_datetime([r["C"][0] for r in rows], unit="ms"),
-                "inflacion": [float(r["C"][1]) for r in rows],
-                "pais": "Dominican Republic"
-            }
-        ).sort_values("Fecha").assign(Fecha=lambda x: x["Fecha"].dt.strftime("%Y-%m"))
+        payload = r.json()
+        _archive_raw("powerbi", "inflacion_12m", run_date, [[payload]])
+        df = _parse_inflacion(payload)
 
         logger.info(f"Extracted {len(df)} inflation records")
         return df
@@ -162,103 +374,113 @@ def extract_inflacion_12m(run_date: str) -> pd.DataFrame:
         logger.error(f"Error extracting inflation data: {str(e)}")
         return pd.DataFrame()
 
-def extract_tipo_cambio(run_date: str) -> pd.DataFrame:
-    """
-    Scrape exchange rate data from PowerBI API for USD.
-    """
-    try:
-        payload_txt = r"""
-        { "version": "1.0.0",
-          "queries": [
-            { "Query": { "Commands": [ { "SemanticQueryDataShapeCommand": {
-                "Query": {
-                  "Version": 2,
-                  "From": [ { "Name":"t1","Entity":"tasa_de_cambio","Type":0 } ],
-                  "Select": [
-                    { "Column": {
+def _tipo_cambio_payload() -> Dict[str, Any]:
+    payload_txt = r"""
+    { "version": "1.0.0",
+      "queries": [
+        { "Query": { "Commands": [ { "SemanticQueryDataShapeCommand": {
+            "Query": {
+              "Version": 2,
+              "From": [ { "Name":"t1","Entity":"tasa_de_cambio","Type":0 } ],
+              "Select": [
+                { "Column": {
+                    "Expression": { "SourceRef": { "Source":"t1" } },
+                    "Property": "fecha"
+                  },
+                  "Name": "tasa_de_cambio.fecha"
+                },
+                { "Aggregation": {
+                    "Expression": {
+                      "Column": {
                         "Expression": { "SourceRef": { "Source":"t1" } },
-                        "Property": "fecha"
-                      },
-                      "Name": "tasa_de_cambio.fecha"
+                        "Property": "DOLAR ESTADOUNIDENSE"
+                      }
                     },
-                    { "Aggregation": {
-                        "Expression": {
-                          "Column": {
-                            "Expression": { "SourceRef": { "Source":"t1" } },
-                            "Property": "DOLAR ESTADOUNIDENSE"
-                          }
-                        },
-                        "Function": 0
-                      },
-                      "Name": "Sum(tasa_de_cambio.DOLAR ESTADOUNIDENSE)"
-                    }
-                  ],
-                  "Where": [
-                    { "Condition": {
-                        "Comparison": {
-                          "ComparisonKind": 2,
-                          "Left":  {
-                            "Column": {
-                              "Expression": { "SourceRef": { "Source":"t1" } },
-                              "Property":"fecha"
-                            }
-                          },
-                          "Right": { "Literal": { "Value":"datetime'2004-01-02T00:00:00'" } }
+                    "Function": 0
+                  },
+                  "Name": "Sum(tasa_de_cambio.DOLAR ESTADOUNIDENSE)"
+                }
+              ],
+              "Where": [
+                { "Condition": {
+                    "Comparison": {
+                      "ComparisonKind": 2,
+                      "Left":  {
+                        "Column": {
+                          "Expression": { "SourceRef": { "Source":"t1" } },
+                          "Property":"fecha"
                         }
-                      }
+                      },
+                      "Right": { "Literal": { "Value":"datetime'2004-01-02T00:00:00'" } }
                     }
-                  ]
-                },
-                "Binding": {
-                  "Primary": { "Groupings": [ { "Projections":[0,1] } ] },
-                  "DataReduction": { "DataVolume": 4, "Primary":{ "BinnedLineSample":{} } },
-                  "Version": 1
-                },
-                "ExecutionMetricsKind": 1
-            } } ] },
-              "ApplicationContext": {
-                "DatasetId":"8d32b3d9-8f14-4cff-97bc-77275eeeb6ea",
-                "Sources":[
-                  { "ReportId":"83be7f47-135f-4864-a502-96463364f0f8",
-                    "VisualId":"9518be824f665035ee0a" }
-                ]
-              }
-            }
-          ],
-          "cancelQueries": [],
-          "modelId": 4966303
+                  }
+                }
+              ]
+            },
+            "Binding": {
+              "Primary": { "Groupings": [ { "Projections":[0,1] } ] },
+              "DataReduction": { "DataVolume": 4, "Primary":{ "BinnedLineSample":{} } },
+              "Version": 1
+            },
+            "ExecutionMetricsKind": 1
+        } } ] },
+          "ApplicationContext": {
+            "DatasetId":"8d32b3d9-8f14-4cff-97bc-77275eeeb6ea",
+            "Sources":[
+              { "ReportId":"83be7f47-135f-4864-a502-96463364f0f8",
+                "VisualId":"9518be824f665035ee0a" }
+            ]
+          }
         }
-        """.strip()
+      ],
+      "cancelQueries": [],
+      "modelId": 4966303
+    }
+    """.strip()
+    return json.loads(payload_txt)
 
-        payload = json.loads(payload_txt)
-        resp = requests.post(QUERY_URL, headers=HEADERS, json=payload, timeout=30)
+def _parse_tipo_cambio(resp_json: Dict[str, Any]) -> pd.DataFrame:
+    dsr = resp_json["results"][0]["result"]["data"]["dsr"]
+    ph0 = dsr["DS"][0]["PH"][0]
+    dm_key = next(k for k in ph0 if k.startswith("DM"))
+    rows = ph0[dm_key]
+
+    fechas, valores = [], []
+    for r in rows:
+        c = r["C"]
+        if len(c) >= 2:
+            if c[0] > 1e11:
+                ts, val = c[0], c[1]
+            elif c[1] > 1e11:
+                ts, val = c[1], c[0]
+            else:
+                continue
+            fechas.append(ts)
+            valores.append(val)
+
+    df = pd.DataFrame(
+        {
+            "fecha": pd.to_datetime(fechas, unit="ms", errors="coerce"),
+            "tc_venta": pd.to_numeric(valores, errors="coerce")
+        }
+    ).dropna().sort_values("fecha")
+    df["tc_compra"] = df["tc_venta"] * 0.995  # Approximate tc_compra as per original example
+    df["fecha"] = df["fecha"].dt.strftime("%Y-%m-%d")
+
+    return df
+
+@_metered("tipo_cambio", "powerbi")
+def extract_tipo_cambio(run_date: str) -> pd.DataFrame:
+    """
+    Scrape exchange rate data from PowerBI API for USD.
+    """
+    try:
+        resp = _timed_request("tipo_cambio", "powerbi", "POST", QUERY_URL,
+                              headers=HEADERS, json=_tipo_cambio_payload(), timeout=30)
         resp.raise_for_status()
-        dsr = resp.json()["results"][0]["result"]["data"]["dsr"]
-        ph0 = dsr["DS"][0]["PH"][0]
-        dm_key = next(k for k in ph0 if k.startswith("DM"))
-        rows = ph0[dm_key]
-
-        fechas, valores = [], []
-        for r in rows:
-            c = r["C"]
-            if len(c) >= 2:
-                if c[0] > 1e11:
-                    ts, val = c[0], c[1]
-                elif c[1] > 1e11:
-                    ts, val = c[1], c[0]
-                else:
-                    continue
-                fechas.append(ts)
-                valores.append(val)
-
-        df = pd.DataFrame(
-            {
-                "fecha": pd.to_datetime(fechas, unit="ms", errors="coerce"),
-                "tc_venta": pd.to_numeric(valores, errors="coerce")
-            }
-        ).dropna().sort_values("fecha")
-        df["tc_compra"] = df["tc_venta"] * 0.995  # Approximate tc_compra as per original example
-        df["fecha"] = df["fecha"].dt.strftime("%Y-%m-%d")
+        payload = resp.json()
+        _archive_raw("powerbi", "tipo_cambio", run_date, [[payload]])
+        df = _parse_tipo_cambio(payload)
 
         logger.info(f"Extracted {len(df)} exchange rate records")
         return df
@@ -266,276 +488,456 @@ def extract_tipo_cambio(run_date: str) -> pd.DataFrame:
         logger.error(f"Error extracting exchange rate data: {str(e)}")
         return pd.DataFrame()
 
+DATA360_URL = "https://data360api.worldbank.org/data360/data"
+DATA360_PAGE_SIZE = 1000
+
+def _desempleo_params(skip: int) -> Dict[str, Any]:
+    return {
+        "DATABASE_ID": "IMF_IFS",
+        "INDICATOR": "IMF_IFS_LUR",
+        "timePeriodFrom": "1949-01",
+        "timePeriodTo": "2024-12",
+        "FREQ": "M",
+        "skip": skip,
+    }
+
+def _parse_desempleo(all_data: List[Dict[str, Any]]) -> pd.DataFrame:
+    country_mapping = {
+        "DOM": "Dominican Republic",
+        "MAR": "Morocco",
+        "AGO": "Angola",
+        "ABW": "Aruba",
+        "AFG": "Afghanistan",
+        "ALB": "Albania",
+        "ARE": "United Arab Emirates",
+        "ARG": "Argentina",
+        "ARM": "Armenia",
+        "ATG": "Antigua and Barbuda",
+        "AUS": "Australia",
+        "AUT": "Austria",
+        "AZE": "Azerbaijan",
+        "BDI": "Burundi",
+        "BEL": "Belgium",
+        "BEN": "Benin",
+        "BFA": "Burkina Faso",
+        "BGD": "Bangladesh",
+        "BGR": "Bulgaria",
+        "BHR": "Bahrain",
+        "BHS": "Bahamas, The",
+        "BIH": "Bosnia and Herzegovina",
+        "BLR": "Belarus",
+        "BLZ": "Belize",
+        "BOL": "Bolivia",
+        "BRA": "Brazil",
+        "BRB": "Barbados",
+        "BRN": "Brunei Darussalam",
+        "BTN": "Bhutan",
+        "BWA": "Botswana",
+        "CAN": "Canada",
+        "CHE": "Switzerland",
+        "CHL": "Chile",
+        "CHN": "China",
+        "CIV": "Cote d'Ivoire",
+        "CMR": "Cameroon",
+        "COD": "Congo, Dem. Rep.",
+        "COG": "Congo, Rep.",
+        "COL": "Colombia",
+        "COM": "Comoros",
+        "CPV": "Cabo Verde",
+        "CRI": "Costa Rica",
+        "CUW": "Curacao",
+        "CYP": "Cyprus",
+        "CZE": "Czechia",
+        "DEU": "Germany",
+        "DJI": "Djibouti",
+        "DMA": "Dominica",
+        "DNK": "Denmark",
+        "DZA": "Algeria",
+        "ECU": "Ecuador",
+        "EGY": "Egypt, Arab Rep.",
+        "ESP": "Spain",
+        "EST": "Estonia",
+        "ETH": "Ethiopia",
+        "FIN": "Finland",
+        "FJI": "Fiji",
+        "FRA": "France",
+        "FSM": "Micronesia, Fed. Sts.",
+        "GAB": "Gabon",
+        "GBR": "United Kingdom",
+        "GEO": "Georgia",
+        "GHA": "Ghana",
+        "GIN": "Guinea",
+        "GMB": "Gambia, The",
+        "GNB": "Guinea-Bissau",
+        "GNQ": "Equatorial Guinea",
+        "GRC": "Greece",
+        "GRD": "Grenada",
+        "GTM": "Guatemala",
+        "GUY": "Guyana",
+        "HKG": "Hong Kong SAR, China",
+        "HND": "Honduras",
+        "HRV": "Croatia",
+        "HTI": "Haiti",
+        "HUN": "Hungary",
+        "IDN": "Indonesia",
+        "IND": "India",
+        "IRL": "Ireland",
+        "IRN": "Iran, Islamic Rep.",
+        "IRQ": "Iraq",
+        "ISL": "Iceland",
+        "ISR": "Israel",
+        "ITA": "Italy",
+        "JAM": "Jamaica",
+        "JOR": "Jordan",
+        "JPN": "Japan",
+        "KAZ": "Kazakhstan",
+        "KEN": "Kenya",
+        "KGZ": "Kyrgyz Republic",
+        "KHM": "Cambodia",
+        "KIR": "Kiribati",
+        "KNA": "St. Kitts and Nevis",
+        "KOR": "Korea, Rep.",
+        "KWT": "Kuwait",
+        "LAO": "Lao PDR",
+        "LBN": "Lebanon",
+        "LBR": "Liberia",
+        "LBY": "Libya",
+        "LCA": "St. Lucia",
+        "LKA": "Sri Lanka",
+        "LSO": "Lesotho",
+        "LTU": "Lithuania",
+        "LUX": "Luxembourg",
+        "LVA": "Latvia",
+        "MAC": "Macao SAR, China",
+        "MDA": "Moldova",
+        "MDG": "Madagascar",
+        "MDV": "Maldives",
+        "MEX": "Mexico",
+        "MHL": "Marshall Islands",
+        "MKD": "North Macedonia",
+        "MLI": "Mali",
+        "MLT": "Malta",
+        "MMR": "Myanmar",
+        "MNE": "Montenegro",
+        "MNG": "Mongolia",
+        "MOZ": "Mozambique",
+        "MRT": "Mauritania",
+        "MUS": "Mauritius",
+        "MWI": "Malawi",
+        "MYS": "Malaysia",
+        "NAM": "Namibia",
+        "NER": "Niger",
+        "NGA": "Nigeria",
+        "NIC": "Nicaragua",
+        "NLD": "Netherlands",
+        "NOR": "Norway",
+        "NPL": "Nepal",
+        "NZL": "New Zealand",
+        "OMN": "Oman",
+        "PAK": "Pakistan",
+        "PAN": "Panama",
+        "PER": "Peru",
+        "PHL": "Philippines",
+        "PLW": "Palau",
+        "PNG": "Papua New Guinea",
+        "POL": "Poland",
+        "PRT": "Portugal",
+        "PRY": "Paraguay",
+        "PSE": "West Bank and Gaza",
+        "QAT": "Qatar",
+        "ROU": "Romania",
+        "RUS": "Russian Federation",
+        "RWA": "Rwanda",
+        "SAU": "Saudi Arabia",
+        "SDN": "Sudan",
+        "SEN": "Senegal",
+        "SGP": "Singapore",
+        "SLB": "Solomon Islands",
+        "SLE": "Sierra Leone",
+        "SLV": "El Salvador",
+        "SMR": "San Marino",
+        "SOM": "Somalia",
+        "SRB": "Serbia",
+        "STP": "Sao Tome and Principe",
+        "SUR": "Suriname",
+        "SVK": "Slovak Republic",
+        "SVN": "Slovenia",
+        "SWE": "Sweden",
+        "SWZ": "Eswatini",
+        "SYC": "Seychelles",
+        "SYR": "Syrian Arab Republic",
+        "TCD": "Chad",
+        "TGO": "Togo",
+        "THA": "Thailand",
+        "TJK": "Tajikistan",
+        "TLS": "Timor-Leste",
+        "TON": "Tonga",
+        "TTO": "Trinidad and Tobago",
+        "TUN": "Tunisia",
+        "TUR": "Turkiye",
+        "TUV": "Tuvalu",
+        "TZA": "Tanzania",
+        "UGA": "Uganda",
+        "UKR": "Ukraine",
+        "URY": "Uruguay",
+        "USA": "United States",
+        "UZB": "Uzbekistan",
+        "VCT": "St. Vincent and the Grenadines",
+        "VEN": "Venezuela, RB",
+        "VNM": "Viet Nam",
+        "VUT": "Vanuatu",
+        "YEM": "Yemen, Rep.",
+        "ZAF": "South Africa",
+        "ZMB": "Zambia",
+        "ZWE": "Zimbabwe"
+    }
+
+    for item in all_data:
+        try:
+            if item.get("OBS_VALUE") is not None:
+                item["OBS_VALUE"] = float(item["OBS_VALUE"])
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Error converting OBS_VALUE: {e}, setting to None")
+            item["OBS_VALUE"] = None
+
+    df = pd.DataFrame(all_data)[["OBS_VALUE", "TIME_PERIOD", "FREQ", "REF_AREA"]]
+    df = df.rename(columns={
+        "OBS_VALUE": "tasa_desempleo",
+        "TIME_PERIOD": "anio",
+        "FREQ": "periodicidad",
+        "REF_AREA": "pais_id"
+    })
+    df["pais"] = df["pais_id"].map(country_mapping)
+    df["periodicidad"] = df["periodicidad"].map({"A": "Anual", "M": "Mensual", "Q": "Trimestral"}).fillna("Desconocido")
+
+    return df
+
+@_metered("desempleo_imf", "data360")
 def extract_desempleo_imf(run_date: str) -> pd.DataFrame:
     """
     Scrape unemployment data from WorldBank API.
     """
     try:
-        url = "https://data360api.worldbank.org/data360/data"
-        params_base = {
-            "DATABASE_ID": "IMF_IFS",
-            "INDICATOR": "IMF_IFS_LUR",
-            "timePeriodFrom": "1949-01",
-            "timePeriodTo": "2024-12",
-            "FREQ": "M"
-        }
-        country_mapping = {
-            "DOM": "Dominican Republic",
-            "MAR": "Morocco",
-            "AGO": "Angola",
-            "ABW": "Aruba",
-            "AFG": "Afghanistan",
-            "ALB": "Albania",
-            "ARE": "United Arab Emirates",
-            "ARG": "Argentina",
-            "ARM": "Armenia",
-            "ATG": "Antigua and Barbuda",
-            "AUS": "Australia",
-            "AUT": "Austria",
-            "AZE": "Azerbaijan",
-            "BDI": "Burundi",
-            "BEL": "Belgium",
-            "BEN": "Benin",
-            "BFA": "Burkina Faso",
-            "BGD": "Bangladesh",
-            "BGR": "Bulgaria",
-            "BHR": "Bahrain",
-            "BHS": "Bahamas, The",
-            "BIH": "Bosnia and Herzegovina",
-            "BLR": "Belarus",
-            "BLZ": "Belize",
-            "BOL": "Bolivia",
-            "BRA": "Brazil",
-            "BRB": "Barbados",
-            "BRN": "Brunei Darussalam",
-            "BTN": "Bhutan",
-            "BWA": "Botswana",
-            "CAN": "Canada",
-            "CHE": "Switzerland",
-            "CHL": "Chile",
-            "CHN": "China",
-            "CIV": "Cote d'Ivoire",
-            "CMR": "Cameroon",
-            "COD": "Congo, Dem. Rep.",
-            "COG": "Congo, Rep.",
-            "COL": "Colombia",
-            "COM": "Comoros",
-            "CPV": "Cabo Verde",
-            "CRI": "Costa Rica",
-            "CUW": "Curacao",
-            "CYP": "Cyprus",
-            "CZE": "Czechia",
-            "DEU": "Germany",
-            "DJI": "Djibouti",
-            "DMA": "Dominica",
-            "DNK": "Denmark",
-            "DZA": "Algeria",
-            "ECU": "Ecuador",
-            "EGY": "Egypt, Arab Rep.",
-            "ESP": "Spain",
-            "EST": "Estonia",
-            "ETH": "Ethiopia",
-            "FIN": "Finland",
-            "FJI": "Fiji",
-            "FRA": "France",
-            "FSM": "Micronesia, Fed. Sts.",
-            "GAB": "Gabon",
-            "GBR": "United Kingdom",
-            "GEO": "Georgia",
-            "GHA": "Ghana",
-            "GIN": "Guinea",
-            "GMB": "Gambia, The",
-            "GNB": "Guinea-Bissau",
-            "GNQ": "Equatorial Guinea",
-            "GRC": "Greece",
-            "GRD": "Grenada",
-            "GTM": "Guatemala",
-            "GUY": "Guyana",
-            "HKG": "Hong Kong SAR, China",
-            "HND": "Honduras",
-            "HRV": "Croatia",
-            "HTI": "Haiti",
-            "HUN": "Hungary",
-            "IDN": "Indonesia",
-            "IND": "India",
-            "IRL": "Ireland",
-            "IRN": "Iran, Islamic Rep.",
-            "IRQ": "Iraq",
-            "ISL": "Iceland",
-            "ISR": "Israel",
-            "ITA": "Italy",
-            "JAM": "Jamaica",
-            "JOR": "Jordan",
-            "JPN": "Japan",
-            "KAZ": "Kazakhstan",
-            "KEN": "Kenya",
-            "KGZ": "Kyrgyz Republic",
-            "KHM": "Cambodia",
-            "KIR": "Kiribati",
-            "KNA": "St. Kitts and Nevis",
-            "KOR": "Korea, Rep.",
-            "KWT": "Kuwait",
-            "LAO": "Lao PDR",
-            "LBN": "Lebanon",
-            "LBR": "Liberia",
-            "LBY": "Libya",
-            "LCA": "St. Lucia",
-            "LKA": "Sri Lanka",
-            "LSO": "Lesotho",
-            "LTU": "Lithuania",
-            "LUX": "Luxembourg",
-            "LVA": "Latvia",
-            "MAC": "Macao SAR, China",
-            "MDA": "Moldova",
-            "MDG": "Madagascar",
-            "MDV": "Maldives",
-            "MEX": "Mexico",
-            "MHL": "Marshall Islands",
-            "MKD": "North Macedonia",
-            "MLI": "Mali",
-            "MLT": "Malta",
-            "MMR": "Myanmar",
-            "MNE": "Montenegro",
-            "MNG": "Mongolia",
-            "MOZ": "Mozambique",
-            "MRT": "Mauritania",
-            "MUS": "Mauritius",
-            "MWI": "Malawi",
-            "MYS": "Malaysia",
-            "NAM": "Namibia",
-            "NER": "Niger",
-            "NGA": "Nigeria",
-            "NIC": "Nicaragua",
-            "NLD": "Netherlands",
-            "NOR": "Norway",
-            "NPL": "Nepal",
-            "NZL": "New Zealand",
-            "OMN": "Oman",
-            "PAK": "Pakistan",
-            "PAN": "Panama",
-            "PER": "Peru",
-            "PHL": "Philippines",
-            "PLW": "Palau",
-            "PNG": "Papua New Guinea",
-            "POL": "Poland",
-            "PRT": "Portugal",
-            "PRY": "Paraguay",
-            "PSE": "West Bank and Gaza",
-            "QAT": "Qatar",
-            "ROU": "Romania",
-            "RUS": "Russian Federation",
-            "RWA": "Rwanda",
-            "SAU": "Saudi Arabia",
-            "SDN": "Sudan",
-            "SEN": "Senegal",
-            "SGP": "Singapore",
-            "SLB": "Solomon Islands",
-            "SLE": "Sierra Leone",
-            "SLV": "El Salvador",
-            "SMR": "San Marino",
-            "SOM": "Somalia",
-            "SRB": "Serbia",
-            "STP": "Sao Tome and Principe",
-            "SUR": "Suriname",
-            "SVK": "Slovak Republic",
-            "SVN": "Slovenia",
-            "SWE": "Sweden",
-            "SWZ": "Eswatini",
-            "SYC": "Seychelles",
-            "SYR": "Syrian Arab Republic",
-            "TCD": "Chad",
-            "TGO": "Togo",
-            "THA": "Thailand",
-            "TJK": "Tajikistan",
-            "TLS": "Timor-Leste",
-            "TON": "Tonga",
-            "TTO": "Trinidad and Tobago",
-            "TUN": "Tunisia",
-            "TUR": "Turkiye",
-            "TUV": "Tuvalu",
-            "TZA": "Tanzania",
-            "UGA": "Uganda",
-            "UKR": "Ukraine",
-            "URY": "Uruguay",
-            "USA": "United States",
-            "UZB": "Uzbekistan",
-            "VCT": "St. Vincent and the Grenadines",
-            "VEN": "Venezuela, RB",
-            "VNM": "Viet Nam",
-            "VUT": "Vanuatu",
-            "YEM": "Yemen, Rep.",
-            "ZAF": "South Africa",
-            "ZMB": "Zambia",
-            "ZWE": "Zimbabwe"
-        }
-
         all_data = []
+        raw_pages = []
         skip = 0
+        pages = 0
         while True:
-            params = params_base.copy()
-            params["skip"] = skip
-            response = requests.get(url, params=params)
+            response = _timed_request("desempleo_imf", "data360", "GET", DATA360_URL,
+                                      params=_desempleo_params(skip))
             if response.status_code == 200:
                 data = response.json()
                 values = data.get("value", [])
                 if not values:
                     break
                 all_data.extend(values)
-                skip += 1000
+                raw_pages.append(values)
+                skip += DATA360_PAGE_SIZE
+                pages += 1
                 logger.info(f"Fetched {len(values)} unemployment records, total: {len(all_data)}")
             else:
                 logger.error(f"Error fetching unemployment data: {response.status_code} - {response.text}")
                 return pd.DataFrame()
 
-        for item in all_data:
-            try:
-                if item.get("OBS_VALUE") is not None:
-                    item["OBS_VALUE"] = float(item["OBS_VALUE"])
-            except (ValueError, TypeError) as e:
-                logger.warning(f"Error converting OBS_VALUE: {e}, setting to None")
-                item["OBS_VALUE"] = None
-
-        df = pd.DataFrame(all_data)[["OBS_VALUE", "TIME_PERIOD", "FREQ", "REF_AREA"]]
-        df = df.rename(columns={
-            "OBS_VALUE": "tasa_desempleo",
-            "TIME_PERIOD": "anio",
-            "FREQ": "periodicidad",
-            "REF_AREA": "pais_id"
-        })
-        df["pais"] = df["pais_id"].map(country_mapping)
-        df["periodicidad"] = df["periodicidad"].map({"A": "Anual", "M": "Mensual", "Q": "Trimestral"}).fillna("Desconocido")
+        PAGES_PER_EXTRACT.labels("desempleo_imf", "data360").observe(pages)
+        _archive_raw("data360", "desempleo_imf", run_date, raw_pages)
+        df = _parse_desempleo(all_data)
+
+        logger.info(f"Extracted {len(df)} unemployment records")
+        return df
+    except Exception as e:
+        logger.error(f"Error extracting unemployment data: {str(e)}")
+        return pd.DataFrame()
+
+# ---------- Cliente asíncrono (opcional) ----------
+# MACRO_HTTP_CLIENT=async: las tres fuentes y las páginas de Data360 se
+# descargan concurrentemente en un solo event loop (httpx, HTTP/2 si hay h2).
+HTTP_RETRY_TOTAL = 8
+HTTP_RETRY_BACKOFF = 0.8
+HTTP_RETRY_STATUS = (429, 500, 502, 503, 504)
+DATA360_PAGE_WINDOW = 8  # páginas de Data360 en vuelo a la vez
+
+def _async_client():
+    import httpx
+    try:
+        import h2  # noqa: F401
+        http2 = True
+    except ImportError:
+        http2 = False
+    return httpx.AsyncClient(timeout=30, http2=http2,
+                             limits=httpx.Limits(max_connections=20, max_keepalive_connections=20))
+
+async def _arequest(client, method: str, url: str, labels=("", ""), **kwargs):
+    """
+    Request con la misma política de reintentos que el harvester SIMBAD (backoff 0.8, Retry-After).
+    `labels` = (dataset, source) para las métricas de latencia y reintentos.
+    """
+    import httpx
+    for attempt in range(1, HTTP_RETRY_TOTAL + 1):
+        t0 = time.perf_counter()
+        try:
+            resp = await client.request(method, url, **kwargs)
+        except httpx.TransportError:
+            API_LATENCY.labels(*labels).observe(time.perf_counter() - t0)
+            if attempt == HTTP_RETRY_TOTAL:
+                raise
+            API_RETRIES.labels(*labels, "transport").inc()
+            await asyncio.sleep(HTTP_RETRY_BACKOFF * (2 ** (attempt - 1)))
+            continue
+        API_LATENCY.labels(*labels).observe(time.perf_counter() - t0)
+        if resp.status_code not in HTTP_RETRY_STATUS or attempt == HTTP_RETRY_TOTAL:
+            return resp
+        API_RETRIES.labels(*labels, "throttled" if resp.status_code == 429 else "server_error").inc()
+        retry_after = resp.headers.get("Retry-After", "")
+        delay = float(retry_after) if retry_after.isdigit() else HTTP_RETRY_BACKOFF * (2 ** (attempt - 1))
+        await asyncio.sleep(delay)
+    return resp
+
+@_metered("inflacion_12m", "powerbi")
+async def extract_inflacion_12m_async(client, run_date: str) -> pd.DataFrame:
+    try:
+        r = await _arequest(client, "POST", QUERY_URL, labels=("inflacion_12m", "powerbi"),
+                            headers=HEADERS, json=_inflacion_payload())
+        r.raise_for_status()
+        payload = r.json()
+        await asyncio.to_thread(_archive_raw, "powerbi", "inflacion_12m", run_date, [[payload]])
+        df = _parse_inflacion(payload)
+        logger.info(f"Extracted {len(df)} inflation records")
+        return df
+    except Exception as e:
+        logger.error(f"Error extracting inflation data: {str(e)}")
+        return pd.DataFrame()
+
+@_metered("tipo_cambio", "powerbi")
+async def extract_tipo_cambio_async(client, run_date: str) -> pd.DataFrame:
+    try:
+        resp = await _arequest(client, "POST", QUERY_URL, labels=("tipo_cambio", "powerbi"),
+                               headers=HEADERS, json=_tipo_cambio_payload())
+        resp.raise_for_status()
+        payload = resp.json()
+        await asyncio.to_thread(_archive_raw, "powerbi", "tipo_cambio", run_date, [[payload]])
+        df = _parse_tipo_cambio(payload)
+        logger.info(f"Extracted {len(df)} exchange rate records")
+        return df
+    except Exception as e:
+        logger.error(f"Error extracting exchange rate data: {str(e)}")
+        return pd.DataFrame()
 
+@_metered("desempleo_imf", "data360")
+async def extract_desempleo_imf_async(client, run_date: str) -> pd.DataFrame:
+    """Igual que extract_desempleo_imf, pero pide DATA360_PAGE_WINDOW páginas a la vez."""
+    try:
+        all_data = []
+        raw_pages = []
+        skip = 0
+        pages = 0
+        while True:
+            skips = [skip + i * DATA360_PAGE_SIZE for i in range(DATA360_PAGE_WINDOW)]
+            responses = await asyncio.gather(
+                *(_arequest(client, "GET", DATA360_URL, labels=("desempleo_imf", "data360"),
+                            params=_desempleo_params(k)) for k in skips)
+            )
+            done = False
+            for response in responses:
+                if response.status_code != 200:
+                    logger.error(f"Error fetching unemployment data: {response.status_code} - {response.text}")
+                    return pd.DataFrame()
+                values = response.json().get("value", [])
+                if not values:
+                    done = True
+                    break
+                all_data.extend(values)
+                raw_pages.append(values)
+                pages += 1
+            logger.info(f"Fetched unemployment records, total: {len(all_data)}")
+            if done:
+                break
+            skip += DATA360_PAGE_WINDOW * DATA360_PAGE_SIZE
+
+        PAGES_PER_EXTRACT.labels("desempleo_imf", "data360").observe(pages)
+        await asyncio.to_thread(_archive_raw, "data360", "desempleo_imf", run_date, raw_pages)
+        df = _parse_desempleo(all_data)
         logger.info(f"Extracted {len(df)} unemployment records")
         return df
     except Exception as e:
         logger.error(f"Error extracting unemployment data: {str(e)}")
         return pd.DataFrame()
 
+async def _extract_all_async(date_str: str):
+    """Las tres extracciones en paralelo sobre un solo cliente."""
+    async with _async_client() as client:
+        return await asyncio.gather(
+            extract_inflacion_12m_async(client, date_str),
+            extract_tipo_cambio_async(client, date_str),
+            extract_desempleo_imf_async(client, date_str),
+        )
+
+# ---------- Lock de corrida ----------
+class _RunLease(gcs_common.Lease):
+    """
+    Lease de run_pipeline sobre gs://<bucket>/<BASE_PREFIX>/_lock.json (ver
+    `gcs_common.Lease`). Si se pierde, `_save_df_to_gcs` lanza antes de subir.
+    """
+    thread_name = "macro-lock"
+
+    def __init__(self, ttl: float = LOCK_TTL):
+        super().__init__(gcs_common.GcsLeaseBackend(storage.Client().bucket(BUCKET), f"{BASE_PREFIX}/_lock.json"),
+                         ttl=ttl)
+
 # ---------- Pipeline ----------
-def run_pipeline(run_date: Optional[str] = None) -> Dict[str, Any]:
+def run_pipeline(run_date: Optional[str] = None, http_client: Optional[str] = None,
+                 replay: Optional[bool] = None) -> Dict[str, Any]:
+    """Corre el pipeline con el lease tomado (MACRO_RUN_LOCK); si otra corrida lo tiene, la omite."""
     date_str = _normalize_date(run_date)
+    if not RUN_LOCK:
+        return _run_pipeline(date_str, http_client, replay)
+    lease = _RunLease()
+    if not lease.acquire():
+        RUNS_SKIPPED.inc()
+        holder = {k: (lease.holder or {}).get(k) for k in ("owner", "host", "expires")}
+        logger.warning(f"[LOCK] Ya hay una corrida en curso ({holder['owner']}); se omite")
+        return {"skipped": "locked", "lock": holder, "saved": [], "date_partition": f"dt={date_str}"}
+    try:
+        with lease.heartbeat():
+            return _run_pipeline(date_str, http_client, replay)
+    finally:
+        lease.release()
+
+
+def _run_pipeline(date_str: str, http_client: Optional[str], replay: Optional[bool]) -> Dict[str, Any]:
+    replay = REPLAY if replay is None else replay
+    http_client = "replay" if replay else (http_client or os.getenv("MACRO_HTTP_CLIENT", "requests"))
     saved = []
+    t0 = time.perf_counter()
 
     try:
+        if replay:
+            df_infl, df_tc, df_des = _replay_all(date_str)
+        elif http_client == "async":
+            df_infl, df_tc, df_des = asyncio.run(_extract_all_async(date_str))
+        else:
+            df_infl = extract_inflacion_12m(date_str)
+            df_tc = extract_tipo_cambio(date_str)
+            df_des = extract_desempleo_imf(date_str)
+
         # 1) Inflación 12m
-        df_infl = extract_inflacion_12m(date_str)
         if not df_infl.empty:
             saved.append(_save_df_to_gcs(df_infl, "inflacion_12m", date_str, "inflacion_12m.csv"))
 
         # 2) Tipo de cambio
-        df_tc = extract_tipo_cambio(date_str)
         if not df_tc.empty:
             saved.append(_save_df_to_gcs(df_tc, "tipo_cambio", date_str, "tipo_cambio.csv"))
 
         # 3) Desempleo (IMF)
-        df_des = extract_desempleo_imf(date_str)
         if not df_des.empty:
             saved.append(_save_df_to_gcs(df_des, "desempleo_imf", date_str, "desempleo_imf.csv"))
 
-        return {"saved": saved, "date_partition": f"dt={date_str}"}
+        return {"saved": saved, "date_partition": f"dt={date_str}", **({"replay": True} if replay else {})}
     except Exception as e:
         logger.error(f"Pipeline error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Pipeline failed: {str(e)}")
+    finally:
+        RUN_DURATION.labels(http_client).observe(time.perf_counter() - t0)
 
 # ---------- Endpoints ----------
 @app.get("/healthz")
@@ -546,10 +948,18 @@ def healthz():
         "base_prefix": BASE_PREFIX,
     }
 
+@app.get("/metrics")
+def prometheus_metrics():
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @app.post("/run")
 def run(body: Optional[Dict[str, Any]] = Body(default=None)):
     run_date = body.get("run_date") if body else None
-    return {"ok": True, **run_pipeline(run_date)}
+    replay = body.get("replay") if body else None
+    # Como MACRO_REPLAY: acepta true/false o "true"/"false"
+    if replay is not None and not isinstance(replay, bool):
+        replay = str(replay).lower() == "true"
+    return {"ok": True, **run_pipeline(run_date, replay=replay)}
 
 if __name__ == "__main__":
     import uvicorn
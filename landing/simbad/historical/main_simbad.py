@@ -1,14 +1,23 @@
-# landing_simbad/main_simbad.py
+# landing/simbad/historical/main_simbad.py
 import os
 import logging
 import datetime as dt
-from fastapi import FastAPI, Body, HTTPException
-from simbad.harvester import run_harvest
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Body, HTTPException, Response
+from simbad import metrics
+from simbad.startup import start_warm_up
 
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger("simbad")
 
-app = FastAPI(title="SIMBAD Harvester", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # pandas, requests y los clientes GCS/BigQuery se importan en el primer /run
+    # (o antes, con SB_WARMUP=background|blocking)
+    start_warm_up()
+    yield
+
+app = FastAPI(title="SIMBAD Harvester", version="1.0.0", lifespan=lifespan)
 
 def _normalize_date(run_date: str | None) -> str:
     if run_date:
@@ -18,12 +27,32 @@ def _normalize_date(run_date: str | None) -> str:
             raise HTTPException(status_code=400, detail="run_date debe ser YYYY-MM-DD")
     return dt.date.today().isoformat()
 
+def _body_flag(body: dict | None, key: str) -> bool | None:
+    """Flag del body como las env vars: acepta true/false o "true"/"false"; None si no viene."""
+    value = (body or {}).get(key)
+    if value is None or isinstance(value, bool):
+        return value
+    return str(value).lower() == "true"
+
+def _replay(body: dict | None) -> bool:
+    """replay del body; si no viene, SB_REPLAY."""
+    replay = _body_flag(body, "replay")
+    return os.getenv("SB_REPLAY", "false").lower() == "true" if replay is None else replay
+
 @app.get("/healthz")
 def healthz():
     return {"status": "ok"}
 
+@app.get("/metrics")
+def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
 @app.post("/run")
 def run(body: dict = Body(default=None)):
+    from simbad.harvester import run_harvest
+    from simbad.orchestrator import refresh_if_enabled
+
     try:
         run_date = _normalize_date(body.get("run_date") if body else None)
         bucket = os.getenv("GCS_BUCKET", "")
@@ -34,7 +63,10 @@ def run(body: dict = Body(default=None)):
         dataset = os.getenv("SB_DATASET", "simbad_carteras_aayp_hipotecarios")
         keep_m = os.getenv("SB_KEEP_MONTHLY", "false").lower() == "true"
 
-        if not bucket or not prefix or not api_key:
+        # replay: reconstruye el landing desde el archivo raw, sin llamar a la API
+        replay = _replay(body)
+
+        if not bucket or not prefix or not (api_key or replay):
             raise HTTPException(status_code=500, detail="Faltan env vars: GCS_BUCKET, LANDING_PREFIX o SB_API_KEY")
 
         res = run_harvest(
@@ -46,7 +78,19 @@ def run(body: dict = Body(default=None)):
             dataset=dataset,
             keep_monthly=keep_m,
             run_date=run_date,
+            max_workers=int(os.getenv("SB_MAX_WORKERS", "1")),
+            http_client=os.getenv("SB_HTTP_CLIENT", "requests"),
+            bq_staging=os.getenv("SB_BQ_STAGING", "false").lower() == "true",
+            replay=replay,
+            # projection: "full" | "silver" | "a,b,c" (default SB_PROJECTION)
+            projection=body.get("projection") if body else None,
+            # priority: "recent" | "oldest" (default SB_PRIORITY); publish: por período (default SB_PUBLISH)
+            priority=body.get("priority") if body else None,
+            publish=_body_flag(body, "publish"),
         )
+        bq = refresh_if_enabled(res, run_date)
+        if bq is not None:
+            res["bigquery"] = bq
         return {"ok": True, "date_partition": f"dt={run_date}", **res}
     except HTTPException:
         raise
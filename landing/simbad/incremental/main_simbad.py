@@ -2,13 +2,22 @@
 import os
 import logging
 import datetime as dt
-from fastapi import FastAPI, Body, HTTPException
-from simbad.harvester_incremental import run_incremental_harvest
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Body, HTTPException, Response
+from simbad import metrics
+from simbad.startup import start_warm_up
 
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger("simbad")
 
-app = FastAPI(title="SIMBAD Incremental Harvester", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # pandas, requests y los clientes GCS/BigQuery se importan en el primer /run
+    # (o antes, con SB_WARMUP=background|blocking)
+    start_warm_up()
+    yield
+
+app = FastAPI(title="SIMBAD Incremental Harvester", version="1.0.0", lifespan=lifespan)
 
 def _normalize_date(run_date: str | None) -> str:
     if run_date:
@@ -18,12 +27,32 @@ def _normalize_date(run_date: str | None) -> str:
             raise HTTPException(status_code=400, detail="run_date debe ser YYYY-MM-DD")
     return dt.date.today().isoformat()
 
+def _body_flag(body: dict | None, key: str) -> bool | None:
+    """Flag del body como las env vars: acepta true/false o "true"/"false"; None si no viene."""
+    value = (body or {}).get(key)
+    if value is None or isinstance(value, bool):
+        return value
+    return str(value).lower() == "true"
+
+def _replay(body: dict | None) -> bool:
+    """replay del body; si no viene, SB_REPLAY."""
+    replay = _body_flag(body, "replay")
+    return os.getenv("SB_REPLAY", "false").lower() == "true" if replay is None else replay
+
 @app.get("/healthz")
 def healthz():
     return {"status": "ok"}
 
+@app.get("/metrics")
+def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
 @app.post("/run")
 def run(body: dict = Body(default=None)):
+    from simbad.harvester_incremental import run_incremental_harvest
+    from simbad.orchestrator import refresh_if_enabled
+
     try:
         run_date = _normalize_date(body.get("run_date") if body else None)
         bucket = os.getenv("GCS_BUCKET", "")
@@ -34,7 +63,10 @@ def run(body: dict = Body(default=None)):
         dataset = os.getenv("SB_DATASET", "simbad_carteras_aayp_hipotecarios")
         keep_m = os.getenv("SB_KEEP_MONTHLY", "false").lower() == "true"
 
-        if not bucket or not prefix or not api_key:
+        # replay: reconstruye el landing desde el archivo raw, sin llamar a la API
+        replay = _replay(body)
+
+        if not bucket or not prefix or not (api_key or replay):
             raise HTTPException(status_code=500, detail="Faltan env vars: GCS_BUCKET, LANDING_PREFIX o SB_API_KEY")
 
         # Para incremental: lookback_months desde env o default 3
@@ -47,8 +79,19 @@ def run(body: dict = Body(default=None)):
             prefix=prefix,
             dataset=dataset,
             run_date=run_date,
-            lookback_months=lookback_months
+            lookback_months=lookback_months,
+            http_client=os.getenv("SB_HTTP_CLIENT", "requests"),
+            bq_staging=os.getenv("SB_BQ_STAGING", "false").lower() == "true",
+            replay=replay,
+            # projection: "full" | "silver" | "a,b,c" (default SB_PROJECTION)
+            projection=body.get("projection") if body else None,
+            # priority: "recent" | "oldest" (default SB_PRIORITY); publish: por período (default SB_PUBLISH)
+            priority=body.get("priority") if body else None,
+            publish=_body_flag(body, "publish"),
         )
+        bq = refresh_if_enabled(res, run_date)
+        if bq is not None:
+            res["bigquery"] = bq
         return {"ok": True, "date_partition": f"dt={run_date}", **res}
     except HTTPException:
         raise
@@ -62,7 +105,11 @@ def run_force_periods(body: dict = Body(default=None)):
     """
     Fuerza la carga de períodos específicos.
     Body: {"periods": ["2024-12", "2025-01"], "run_date": "2025-01-15"}
+    (opcionales "replay" y "projection", como en /run)
     """
+    from simbad.harvester_incremental import run_incremental_harvest
+    from simbad.orchestrator import refresh_if_enabled
+
     try:
         if not body or "periods" not in body:
             raise HTTPException(status_code=400, detail="Falta campo 'periods' con lista de YYYY-MM")
@@ -76,7 +123,9 @@ def run_force_periods(body: dict = Body(default=None)):
         tipo_entidad = os.getenv("SB_TIPO_ENTIDAD", "AAyP")
         dataset = os.getenv("SB_DATASET", "simbad_carteras_aayp_hipotecarios")
 
-        if not bucket or not prefix or not api_key:
+        replay = _replay(body)
+
+        if not bucket or not prefix or not (api_key or replay):
             raise HTTPException(status_code=500, detail="Faltan env vars: GCS_BUCKET, LANDING_PREFIX o SB_API_KEY")
 
         res = run_incremental_harvest(
@@ -86,11 +135,70 @@ def run_force_periods(body: dict = Body(default=None)):
             prefix=prefix,
             dataset=dataset,
             run_date=run_date,
-            force_periods=periods
+            force_periods=periods,
+            http_client=os.getenv("SB_HTTP_CLIENT", "requests"),
+            bq_staging=os.getenv("SB_BQ_STAGING", "false").lower() == "true",
+            replay=replay,
+            projection=body.get("projection") if body else None,
         )
+        bq = refresh_if_enabled(res, run_date)
+        if bq is not None:
+            res["bigquery"] = bq
         return {"ok": True, "date_partition": f"dt={run_date}", "forced_periods": periods, **res}
     except HTTPException:
         raise
     except Exception as e:
         log.exception("run force periods failed")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/run/gaps")
+def run_gaps(body: dict = Body(default=None)):
+    """
+    Rellena huecos: compara los períodos esperados desde SB_START_YEAR con el
+    manifest de landing y descarga (en paralelo) solo los faltantes o sospechosamente pequeños.
+    Body (opcional): {"run_date": "2025-01-15", "start_year": 2012}
+    (y "replay" y "projection", como en /run)
+    """
+    from simbad.harvester_incremental import run_incremental_harvest
+    from simbad.orchestrator import refresh_if_enabled
+
+    try:
+        run_date = _normalize_date(body.get("run_date") if body else None)
+        bucket = os.getenv("GCS_BUCKET", "")
+        prefix = os.getenv("LANDING_PREFIX", "")
+        api_key = os.getenv("SB_API_KEY", "")
+        tipo_entidad = os.getenv("SB_TIPO_ENTIDAD", "AAyP")
+        dataset = os.getenv("SB_DATASET", "simbad_carteras_aayp_hipotecarios")
+        start_year = int((body or {}).get("start_year") or os.getenv("SB_START_YEAR", "2012"))
+        max_workers = int(os.getenv("SB_MAX_WORKERS", "4"))
+
+        replay = _replay(body)
+
+        if not bucket or not prefix or not (api_key or replay):
+            raise HTTPException(status_code=500, detail="Faltan env vars: GCS_BUCKET, LANDING_PREFIX o SB_API_KEY")
+
+        res = run_incremental_harvest(
+            api_key=api_key,
+            tipo_entidad=tipo_entidad,
+            bucket=bucket,
+            prefix=prefix,
+            dataset=dataset,
+            run_date=run_date,
+            mode="gaps",
+            start_year=start_year,
+            max_workers=max_workers,
+            http_client=os.getenv("SB_HTTP_CLIENT", "requests"),
+            bq_staging=os.getenv("SB_BQ_STAGING", "false").lower() == "true",
+            replay=replay,
+            projection=body.get("projection") if body else None,
+        )
+        bq = refresh_if_enabled(res, run_date)
+        if bq is not None:
+            res["bigquery"] = bq
+        return {"ok": True, "date_partition": f"dt={run_date}", **res}
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.exception("run gaps failed")
+        raise HTTPException(status_code=500, detail=str(e))
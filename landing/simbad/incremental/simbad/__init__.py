@@ -1,3 +0,0 @@
-from .harvester import run_harvest
-__all__ = ["run_harvest"]
-__version__ = "1.0.0"
\ No newline at end of file
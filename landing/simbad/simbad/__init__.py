@@ -0,0 +1,28 @@
+# Importación perezosa (PEP 562): `import simbad` no carga pandas/requests/GCS hasta
+# usar un harvester; ver simbad.startup
+import importlib
+
+_EXPORTS = {
+    "run_harvest": ".harvester",
+    "run_incremental_harvest": ".harvester_incremental",
+    "PeriodStrategy": ".periods",
+    "FullRange": ".periods",
+    "Lookback": ".periods",
+    "ForcedPeriods": ".periods",
+    "GapFill": ".periods",
+    "Sharded": ".periods",
+}
+__all__ = list(_EXPORTS)
+__version__ = "1.1.0"
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,146 @@
+# landing/simbad/simbad/aio.py
+"""
+Cliente asíncrono (httpx, HTTP/2) para la API de la SB.
+
+Misma política que `_requests_session` (API key, timeout, reintentos con
+backoff 0.8 para 500/502/504 y errores de red, throttling vía `AdaptiveLimiter`),
+pero cientos de páginas/meses en vuelo comparten un solo event loop y un
+pool de conexiones en lugar de un hilo por request.
+"""
+import time
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+import httpx
+import pandas as pd
+
+from .client import (API_BASE, MAX_THROTTLE_RETRIES, USER_AGENT, _month_frame, _month_params, _observe_page,
+                     _parse_page, _range_params, _window_frames)
+from .ratelimit import THROTTLE_STATUS, AdaptiveLimiter, PageSizer
+from .tracing import span
+
+log = logging.getLogger("simbad.aio")
+
+RETRY_TOTAL = 8
+RETRY_BACKOFF = 0.8
+RETRY_STATUS = (500, 502, 504)
+
+
+def _async_client(api_key: str, timeout: int = 15, user_agent: str = USER_AGENT,
+                  pool_size: int = 100, limiter: Optional[AdaptiveLimiter] = None,
+                  page_sizer: Optional[PageSizer] = None) -> httpx.AsyncClient:
+    """AsyncClient con API key, HTTP/2 (si `h2` está instalado), pool, limitador y tamaño de página."""
+    try:
+        import h2  # noqa: F401
+        http2 = True
+    except ImportError:
+        http2 = False
+    c = httpx.AsyncClient(
+        headers={"Ocp-Apim-Subscription-Key": api_key, "User-Agent": user_agent},
+        timeout=timeout,
+        http2=http2,
+        limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+    )
+    c.is_async = True
+    c.request_timeout = timeout
+    c.limiter = limiter or AdaptiveLimiter()
+    c.page_sizer = page_sizer or PageSizer()
+    return c
+
+
+async def _aget(client: httpx.AsyncClient, params: dict) -> httpx.Response:
+    """GET con limitador + reintentos (backoff exponencial como urllib3 Retry)."""
+    limiter = getattr(client, "limiter", None)
+    throttled = 0
+    attempt = 0
+    while True:
+        if limiter:
+            with span("http.wait"):
+                await limiter.acquire_async()
+        try:
+            with span("http.request") as sp:
+                t0 = time.perf_counter()
+                r = await client.get(API_BASE, params=params)
+                r.seconds = time.perf_counter() - t0
+                sp.set(status=r.status_code, bytes=len(r.content))
+        except httpx.TransportError:
+            attempt += 1
+            if attempt >= RETRY_TOTAL:
+                raise
+            await asyncio.sleep(RETRY_BACKOFF * (2 ** (attempt - 1)))
+            continue
+
+        if limiter:
+            limiter.observe(r.status_code, r.headers)
+        if r.status_code in THROTTLE_STATUS and throttled < MAX_THROTTLE_RETRIES:
+            throttled += 1
+            continue
+        if r.status_code in RETRY_STATUS and attempt < RETRY_TOTAL - 1:
+            attempt += 1
+            await asyncio.sleep(RETRY_BACKOFF * (2 ** (attempt - 1)))
+            continue
+        return r
+
+
+def _overloaded_async(e: Exception) -> bool:
+    """Como `client._overloaded`, para las excepciones de httpx."""
+    if isinstance(e, httpx.TransportError):
+        return True
+    return isinstance(e, httpx.HTTPStatusError) and e.response.status_code >= 500
+
+
+async def _fetch_pages_async(client: httpx.AsyncClient, params: dict, label: str) -> List[pd.DataFrame]:
+    """Versión asíncrona de `_fetch_pages` (misma paginación, parseo y tamaño de página)."""
+    sizer = getattr(client, "page_sizer", None)
+    while True:
+        size = sizer.size if sizer else params["registros"]
+        try:
+            return await _fetch_chain_async(client, params, label, size)
+        except Exception as e:
+            if sizer is None or not _overloaded_async(e) or not sizer.failed(size):
+                raise
+            log.warning("%s con registros=%d: %s; reintentando con %d", label, size, e, sizer.size)
+
+
+async def _fetch_chain_async(client: httpx.AsyncClient, params: dict, label: str, size: int) -> List[pd.DataFrame]:
+    archive = getattr(client, "raw_archive", None)
+    dfs, raw_pages = [], []
+    page = 1
+
+    while True:
+        query = {**params, "paginas": page, "registros": size}
+        with span("page", periodo=label, page=page, registros=size) as sp:
+            r = await _aget(client, query)
+            r.raise_for_status()
+            t0 = time.perf_counter()
+            with span("parse"):
+                df, has_next = _parse_page(r, label)
+            _observe_page(client, size, df, r.seconds + time.perf_counter() - t0)
+            sp.set(bytes=len(r.content), rows=0 if df is None else len(df))
+        if df is None:
+            break
+        dfs.append(df)
+        if archive is not None:
+            raw_pages.append(r.content)
+        if not has_next:
+            break
+        page += 1
+
+    if archive is not None:
+        await asyncio.to_thread(archive.write, {**params, "registros": size}, raw_pages,
+                                sum(len(d) for d in dfs))
+    return dfs
+
+
+async def _fetch_month_df_async(client: httpx.AsyncClient, y: int, m: int, tipo_entidad: str) -> pd.DataFrame:
+    """Versión asíncrona de `_fetch_month_df`."""
+    periodo = f"{y:04d}-{m:02d}"
+    return _month_frame(await _fetch_pages_async(client, _month_params(periodo, tipo_entidad), periodo), periodo)
+
+
+async def _fetch_range_dfs_async(client: httpx.AsyncClient, periodos: List[str],
+                                 tipo_entidad: str) -> Dict[str, pd.DataFrame]:
+    """Versión asíncrona de `_fetch_range_dfs`."""
+    params = _range_params(periodos[0], periodos[-1], tipo_entidad)
+    return _window_frames(await _fetch_pages_async(client, params, f"{periodos[0]}..{periodos[-1]}"), periodos)
@@ -0,0 +1,90 @@
+# landing/simbad/simbad/bq_sink.py
+"""
+Sink opcional directo a BigQuery: staging ya tipado, particionado por periodo_date.
+
+Cada período se carga con un load job Parquet (`load_table_from_dataframe`) sobre
+su partición mensual (`tabla$YYYYMM`, WRITE_TRUNCATE): recargar un período
+reemplaza solo esa partición, y `sp_promote_staging_to_silver` promueve a Silver
+leyendo únicamente las particiones del lote, sin REGEXP/SAFE_CAST sobre CSV.
+"""
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import pandas as pd
+from google.cloud import bigquery
+
+from .orchestrator import BQ_PROJECT, _bq_client
+from .tracing import span
+from .transform import SILVER_COLUMNS, SILVER_FLOAT_COLUMNS, SILVER_STRING_COLUMNS, _to_silver_frame
+
+log = logging.getLogger("simbad.bq_sink")
+
+STAGING_TABLE = "bronze.simbad_silver_staging"
+
+
+def _staging_schema() -> List[bigquery.SchemaField]:
+    types = {c: "STRING" for c in SILVER_STRING_COLUMNS}
+    types.update({c: "FLOAT64" for c in SILVER_FLOAT_COLUMNS})
+    types.update({c: "INT64" for c in ["cantidadCredito", "anio", "mes", "periodo_ym",
+                                       "flg_periodo_invalido", "flg_importe_negativo"]})
+    types.update({"periodo_date": "DATE", "dt_captura": "DATE", "row_key": "STRING"})
+    return [bigquery.SchemaField(c, types[c]) for c in SILVER_COLUMNS]
+
+
+def _ensure_staging(client: bigquery.Client, table_id: str) -> None:
+    table = bigquery.Table(table_id, schema=_staging_schema())
+    table.time_partitioning = bigquery.TimePartitioning(
+        type_=bigquery.TimePartitioningType.MONTH, field="periodo_date"
+    )
+    table.clustering_fields = ["entidad", "tipoCliente"]
+    client.create_table(table, exists_ok=True)
+
+
+def _load_period(client: bigquery.Client, table_id: str, piece: pd.DataFrame, run_date: str) -> Optional[dict]:
+    """Reemplaza la partición del período con sus filas tipadas. None si no queda nada que cargar."""
+    periodo = str(piece["__periodo"].iloc[0])
+    frame = _to_silver_frame(piece, run_date)
+    month = pd.Timestamp(periodo + "-01").date()
+    outside = frame["periodo_date"] != month
+    if outside.any():
+        log.warning("[BQ] %s: %d filas con periodo fuera del mes (inválido o distinto); se omiten",
+                    periodo, int(outside.sum()))
+        frame = frame[~outside]
+    if frame.empty:
+        return None
+
+    job_config = bigquery.LoadJobConfig(
+        schema=_staging_schema(),
+        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+        source_format=bigquery.SourceFormat.PARQUET,
+    )
+    with span("bq.load", periodo=periodo, rows=len(frame)):
+        job = client.load_table_from_dataframe(
+            frame, f"{table_id}${periodo.replace('-', '')}", job_config=job_config
+        )
+        job.result()
+    log.info("[BQ] staging %s$%s (%d filas)", table_id, periodo.replace("-", ""), len(frame))
+    return {"periodo": periodo, "rows": len(frame), "job": job.job_id}
+
+
+def load_pieces_to_staging(pieces: List[pd.DataFrame], run_date: str, project: Optional[str] = None,
+                           max_workers: int = 4) -> dict:
+    """Carga cada pieza por período en su partición del staging; un load job por período."""
+    project = project or BQ_PROJECT
+    client = _bq_client(project)
+    table_id = f"{project}.{STAGING_TABLE}"
+    _ensure_staging(client, table_id)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="bq-load") as pool:
+        futures = [pool.submit(contextvars.copy_context().run, _load_period, client, table_id, p, run_date)
+                   for p in pieces]
+        loaded = [r for r in (f.result() for f in futures) if r]
+
+    return {
+        "table": table_id,
+        "periods": sorted(r["periodo"] for r in loaded),
+        "rows": sum(r["rows"] for r in loaded),
+        "jobs": [r["job"] for r in loaded],
+    }
@@ -0,0 +1,246 @@
+# landing/simbad/simbad/client.py
+import json
+import time
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .ratelimit import DEFAULT_PAGE_SIZE, THROTTLE_STATUS, AdaptiveLimiter, PageSizer
+from .tracing import span
+
+log = logging.getLogger("simbad.client")
+
+
+API_BASE = "https://apis.sb.gob.do/estadisticas/v2/carteras/creditos"
+USER_AGENT = "simbad-harvester/1.0 (+cloud-run)"
+MAX_THROTTLE_RETRIES = 8
+
+
+def _requests_session(api_key: str, timeout: int = 15, user_agent: str = USER_AGENT,
+                      pool_size: int = 10, limiter: Optional[AdaptiveLimiter] = None,
+                      page_sizer: Optional[PageSizer] = None) -> requests.Session:
+    """Sesión HTTP con API key, reintentos, timeout por defecto y limitador adaptativo.
+
+    `pool_size` debe cubrir el número de hilos que comparten la sesión.
+    429/503 no los reintenta urllib3: los gestiona `sess.limiter` (AIMD + Retry-After).
+    `sess.page_sizer` decide `registros` de cada consulta paginada.
+    """
+    s = requests.Session()
+    s.headers.update({
+        "Ocp-Apim-Subscription-Key": api_key,
+        "User-Agent": user_agent
+    })
+    retry = Retry(
+        total=8, connect=5, read=5,
+        backoff_factor=0.8,
+        status_forcelist=[500, 502, 504],
+        allowed_methods=["GET"]
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    s.request_timeout = timeout
+    s.limiter = limiter or AdaptiveLimiter()
+    s.page_sizer = page_sizer or PageSizer()
+    return s
+
+
+def _open_session(api_key: str, user_agent: str = USER_AGENT, max_workers: int = 1,
+                  http_client: str = "requests", page_size: Optional[int] = None, raw_archive=None):
+    """
+    Sesión para el pipeline: "requests" (bloqueante, hilos) o "async" (httpx, event loop).
+    `page_size` es el `registros` inicial (p. ej. el recordado en el manifest);
+    `raw_archive` (`simbad.raw.RawArchive`) guarda las páginas de cada consulta.
+    """
+    sizer = PageSizer(page_size)
+    if http_client == "async":
+        from .aio import _async_client
+        sess = _async_client(api_key, user_agent=user_agent, pool_size=max(100, max_workers), page_sizer=sizer)
+    elif http_client == "requests":
+        sess = _requests_session(api_key, user_agent=user_agent, pool_size=max(10, max_workers), page_sizer=sizer)
+    else:
+        raise ValueError(f"http_client inválido: {http_client} (requests | async)")
+    sess.raw_archive = raw_archive
+    return sess
+
+
+def _get(sess: requests.Session, params: dict) -> requests.Response:
+    """GET a la API pasando por el limitador; reintenta throttling (429/503)."""
+    limiter = getattr(sess, "limiter", None)
+    for _ in range(MAX_THROTTLE_RETRIES):
+        if limiter:
+            with span("http.wait"):
+                limiter.acquire()
+        with span("http.request") as sp:
+            t0 = time.perf_counter()
+            r = sess.get(API_BASE, params=params, timeout=getattr(sess, "request_timeout", 15))
+            r.seconds = time.perf_counter() - t0
+            sp.set(status=r.status_code, bytes=len(r.content))
+        if limiter:
+            limiter.observe(r.status_code, r.headers)
+        if r.status_code not in THROTTLE_STATUS:
+            return r
+    return r
+
+
+def _month_params(periodo: str, tipo_entidad: str) -> dict:
+    return _range_params(periodo, periodo, tipo_entidad)
+
+
+def _range_params(desde: str, hasta: str, tipo_entidad: str) -> dict:
+    return {
+        "periodoInicial": desde,
+        "periodoFinal": hasta,
+        "tipoEntidad": tipo_entidad,
+        "paginas": 1,
+        "registros": DEFAULT_PAGE_SIZE,
+    }
+
+
+def _parse_page(r, periodo: str) -> Tuple[Optional[pd.DataFrame], bool]:
+    """
+    Interpreta una página (requests o httpx). Devuelve (DataFrame o None, hay_siguiente).
+    None significa que el mes termina aquí (204, vacío, HTML, sin Data).
+    """
+    # Chequear si hay contenido
+    if r.status_code == 204 or not r.text.strip():
+        return None, False
+
+    # Parse JSON
+    try:
+        payload = r.json()
+    except Exception:
+        # Si devuelve HTML por mantenimiento u otro, paramos este mes
+        log.warning("Respuesta no JSON para %s: %s...", periodo, r.headers.get("content-type"))
+        return None, False
+
+    # Data
+    if isinstance(payload, list) and payload:
+        df = pd.DataFrame(payload)
+    elif isinstance(payload, dict) and payload.get("Data"):
+        # Por si algún endpoint devuelve {Data:[...]}
+        df = pd.DataFrame(payload["Data"])
+    else:
+        # Puede que sea 200 sin body válido → salimos
+        return None, False
+
+    # Paginación
+    xp = r.headers.get("x-pagination")
+    if not xp:
+        return df, False
+    try:
+        meta = json.loads(xp)
+        has_next = meta.get("HasNext", False)
+    except Exception:
+        has_next = False
+    return df, bool(has_next)
+
+
+def _month_frame(dfs: List[pd.DataFrame], periodo: str) -> pd.DataFrame:
+    if dfs:
+        with span("concat", periodo=periodo, pages=len(dfs)) as sp:
+            out = pd.concat(dfs, ignore_index=True)
+            out["__periodo"] = periodo  # guardamos el período
+            sp.set(rows=len(out))
+        return out
+    return pd.DataFrame()
+
+
+def _window_frames(dfs: List[pd.DataFrame], periodos: List[str]) -> Dict[str, pd.DataFrame]:
+    """
+    Separa por `periodo` las páginas de un rango de meses: {periodo: DataFrame}
+    con `__periodo`, vacío para los meses sin filas.
+    """
+    if not dfs:
+        return {p: pd.DataFrame() for p in periodos}
+    label = f"{periodos[0]}..{periodos[-1]}"
+    with span("concat", periodo=label, pages=len(dfs)) as sp:
+        raw = pd.concat(dfs, ignore_index=True)
+        sp.set(rows=len(raw))
+    if "periodo" not in raw.columns:
+        raise ValueError(f"Respuesta de rango sin columna periodo ({label})")
+
+    key = raw["periodo"].astype(str).str[:7]
+    groups = {p: g.reset_index(drop=True) for p, g in raw.groupby(key, sort=False)}
+    extra = sorted(set(groups) - set(periodos))
+    if extra:
+        log.warning("Rango %s devolvió períodos fuera de la ventana: %s", label, extra)
+    return {p: groups[p].assign(__periodo=p) if p in groups else pd.DataFrame() for p in periodos}
+
+
+def _overloaded(e: Exception) -> bool:
+    """Timeout, conexión agotada tras reintentos o 5xx: señal de página demasiado grande."""
+    if isinstance(e, (requests.Timeout, requests.ConnectionError, requests.exceptions.RetryError)):
+        return True
+    response = getattr(e, "response", None)
+    return response is not None and response.status_code >= 500
+
+
+def _observe_page(sess, size: int, df: Optional[pd.DataFrame], seconds: float) -> None:
+    sizer = getattr(sess, "page_sizer", None)
+    if sizer is not None and df is not None:
+        sizer.observe(size, len(df), seconds)
+
+
+def _fetch_pages(sess: requests.Session, params: dict, label: str) -> List[pd.DataFrame]:
+    """
+    Recorre la paginación de una consulta con el tamaño de página de la sesión y
+    devuelve las páginas con datos. Si la API falla por sobrecarga, reinicia desde
+    la página 1 con un tamaño menor.
+    """
+    if getattr(sess, "is_replay", False):
+        return sess.frames(params["periodoInicial"], params["periodoFinal"])
+    sizer = getattr(sess, "page_sizer", None)
+    while True:
+        size = sizer.size if sizer else params["registros"]
+        try:
+            return _fetch_chain(sess, params, label, size)
+        except Exception as e:
+            if sizer is None or not _overloaded(e) or not sizer.failed(size):
+                raise
+            log.warning("%s con registros=%d: %s; reintentando con %d", label, size, e, sizer.size)
+
+
+def _fetch_chain(sess: requests.Session, params: dict, label: str, size: int) -> List[pd.DataFrame]:
+    archive = getattr(sess, "raw_archive", None)
+    dfs, raw_pages = [], []
+    page = 1
+
+    while True:
+        query = {**params, "paginas": page, "registros": size}
+        with span("page", periodo=label, page=page, registros=size) as sp:
+            r = _get(sess, query)
+            r.raise_for_status()
+            t0 = time.perf_counter()
+            with span("parse"):
+                df, has_next = _parse_page(r, label)
+            _observe_page(sess, size, df, r.seconds + time.perf_counter() - t0)
+            sp.set(bytes=len(r.content), rows=0 if df is None else len(df))
+        if df is None:
+            break
+        dfs.append(df)
+        if archive is not None:
+            raw_pages.append(r.content)
+        if not has_next:
+            break
+        page += 1
+
+    if archive is not None:
+        archive.write({**params, "registros": size}, raw_pages, sum(len(d) for d in dfs))
+    return dfs
+
+
+def _fetch_month_df(sess: requests.Session, y: int, m: int, tipo_entidad: str) -> pd.DataFrame:
+    """Descarga un mes, pagina y devuelve DataFrame bruto (sin filtrar)."""
+    periodo = f"{y:04d}-{m:02d}"
+    return _month_frame(_fetch_pages(sess, _month_params(periodo, tipo_entidad), periodo), periodo)
+
+
+def _fetch_range_dfs(sess: requests.Session, periodos: List[str], tipo_entidad: str) -> Dict[str, pd.DataFrame]:
+    """Descarga `periodos` (consecutivos) en una sola consulta de rango; ver `_window_frames`."""
+    params = _range_params(periodos[0], periodos[-1], tipo_entidad)
+    return _window_frames(_fetch_pages(sess, params, f"{periodos[0]}..{periodos[-1]}"), periodos)
@@ -0,0 +1,186 @@
+# landing/simbad/simbad/compaction.py
+"""
+Layout de landing por período y compactación.
+
+Con SB_LANDING_LAYOUT=period cada `periodo` tiene un único objeto canónico:
+
+    {prefix}/{dataset}/periodos/periodo=YYYY-MM/carteras_{tipo}_hipotecarios_YYYY-MM.csv
+
+Cada corrida escribe una revisión pequeña junto a él (`_rev/...__{run_date}_{ts}.csv`)
+y la compactación promueve la más reciente a canónica (copia en el servidor, sin
+descargar) y retira las revisiones superadas. Cada descarga de SIMBAD trae el mes
+completo, así que la revisión más nueva reemplaza al canónico; el upsert por
+row_key de Silver borra lo que desapareció.
+
+Los lectores podan por período (`periodo=YYYY-MM/carteras_*`) y el almacenamiento
+queda proporcional a los datos únicos. `migrate_legacy` reparte los consolidados
+y archivos mensuales del layout anterior en canónicos por período y los retira.
+
+Uso (p. ej. si las corridas usan SB_COMPACT=false):
+    python -m simbad.compaction --bucket B --prefix P --dataset D [--legacy] [--dry-run]
+"""
+import os
+import re
+import sys
+import json
+import logging
+import argparse
+import datetime as dt
+from typing import Dict, List, Optional
+
+from .lock import ensure_lease
+from .manifest import update_manifest
+from .sink import (LANDING_EXTENSIONS, SKIP_IDENTICAL, _download_landing, _landing_object, _same_object,
+                   _storage_client, _upload_landing)
+from .tracing import span
+
+log = logging.getLogger("simbad.compaction")
+
+LANDING_LAYOUT = os.getenv("SB_LANDING_LAYOUT", "consolidated").lower()
+COMPACT_ON_WRITE = os.getenv("SB_COMPACT", "true").lower() == "true"
+PERIOD_DIR = "periodos"
+REVISION_DIR = "_rev"
+_REV_SEP = "__"
+_PERIOD_DIR_RE = re.compile(r"/" + PERIOD_DIR + r"/periodo=(\d{4}-\d{2})/")
+_LEGACY_DIRS = ("dt=", "monthly/", "incremental/")
+
+
+def _period_dir(prefix: str, dataset: str, periodo: str) -> str:
+    return f"{prefix}/{dataset}/{PERIOD_DIR}/periodo={periodo}"
+
+
+def canonical_object(prefix: str, dataset: str, tipo_entidad: str, periodo: str) -> str:
+    """Objeto canónico (con extensión .csv; `_upload_landing` la cambia según el formato)."""
+    return f"{_period_dir(prefix, dataset, periodo)}/carteras_{tipo_entidad}_hipotecarios_{periodo}.csv"
+
+
+def revision_object(prefix: str, dataset: str, tipo_entidad: str, periodo: str, run_date: str) -> str:
+    """Revisión de una corrida; el nombre ordena cronológicamente y lleva el del canónico."""
+    stamp = dt.datetime.utcnow().strftime("%Y%m%d_%H%M%S_%f")
+    return (f"{_period_dir(prefix, dataset, periodo)}/{REVISION_DIR}/"
+            f"carteras_{tipo_entidad}_hipotecarios_{periodo}{_REV_SEP}{run_date}_{stamp}.csv")
+
+
+def _canonical_for(revision_name: str) -> str:
+    """`.../_rev/carteras_X_YYYY-MM__dt_ts.ext` → `.../carteras_X_YYYY-MM.ext`."""
+    folder, base = revision_name.rsplit(f"/{REVISION_DIR}/", 1)
+    stem, ext = os.path.splitext(base)
+    return f"{folder}/{stem.split(_REV_SEP)[0]}{ext}"
+
+
+def compact_periods(bucket: str, prefix: str, dataset: str, periods: Optional[List[str]] = None,
+                    dry_run: bool = False) -> dict:
+    """
+    Promueve la revisión más reciente de cada período a canónica y retira las
+    demás revisiones (y canónicos de otro formato). `periods=None` recorre todos.
+
+    Returns:
+        {"canonical": {periodo: gs://...}, "retired": n, "bytes_retired": n}
+    """
+    b = _storage_client().bucket(bucket)
+    base = f"{prefix}/{dataset}/{PERIOD_DIR}/"
+    prefixes = [_period_dir(prefix, dataset, p) + "/" for p in periods] if periods is not None else [base]
+
+    by_period: Dict[str, list] = {}
+    for pfx in prefixes:
+        for blob in b.list_blobs(prefix=pfx):
+            m = _PERIOD_DIR_RE.search("/" + blob.name)
+            if m:
+                by_period.setdefault(m.group(1), []).append(blob)
+
+    canonical, retired, bytes_retired = {}, 0, 0
+    for periodo, blobs in sorted(by_period.items()):
+        revisions = sorted((x for x in blobs if f"/{REVISION_DIR}/" in x.name), key=lambda x: x.name)
+        if not revisions:
+            current = [x.name for x in blobs if x.name.endswith(tuple(LANDING_EXTENSIONS.values()))]
+            if current:
+                canonical[periodo] = f"gs://{bucket}/{current[0]}"
+            continue
+
+        newest = revisions[-1]
+        target = _canonical_for(newest.name)
+        current = next((x for x in blobs if x.name == target), None)
+        # Revisión idéntica al canónico: no se copia (su generación no cambia)
+        identical = SKIP_IDENTICAL and current is not None and _same_object(current, newest)
+        if not dry_run:
+            ensure_lease()
+        if not dry_run and not identical:
+            with span("compact", periodo=periodo, bytes=int(newest.size or 0)):
+                b.copy_blob(newest, b, target, if_generation_match=current.generation if current is not None else 0)
+        canonical[periodo] = f"gs://{bucket}/{target}"
+
+        superseded = [old for old in blobs if old.name != target]
+        for old in superseded:
+            bytes_retired += int(old.size or 0)
+            if not dry_run:
+                old.delete()
+        retired += len(superseded)
+        log.info("[COMPACT] %s ← %s%s (%d objeto(s) retirado(s))", target, newest.name,
+                 " (idéntica, sin copia)" if identical else "", len(superseded))
+
+    return {"canonical": canonical, "retired": retired, "bytes_retired": bytes_retired}
+
+
+def migrate_legacy(bucket: str, prefix: str, dataset: str, tipo_entidad: str,
+                   dry_run: bool = False) -> dict:
+    """
+    Reparte consolidados (`dt=`), mensuales (`monthly/`) e incrementales del layout
+    anterior en canónicos por período. Para cada período gana el archivo subido más
+    recientemente; después se retiran todos los archivos legacy. Lee un archivo a la vez.
+    """
+    b = _storage_client().bucket(bucket)
+    root = f"{prefix}/{dataset}/"
+    legacy = [x for x in b.list_blobs(prefix=root)
+              if x.name[len(root):].startswith(_LEGACY_DIRS) and x.name.endswith(tuple(LANDING_EXTENSIONS.values()))]
+    legacy.sort(key=lambda x: (getattr(x, "updated", None) or dt.datetime.min.replace(tzinfo=dt.timezone.utc), x.name),
+                reverse=True)
+
+    # Un canónico ya existente es más nuevo que cualquier archivo legacy
+    done = set(compact_periods(bucket, prefix, dataset, dry_run=True)["canonical"])
+    entries, written = {}, {}
+    for blob in legacy:
+        df = _download_landing(bucket, blob.name)
+        col = "__periodo" if "__periodo" in df.columns else "periodo"
+        for periodo, piece in df.groupby(df[col].astype(str).str[:7], sort=True):
+            if periodo in done or not re.fullmatch(r"\d{4}-\d{2}", periodo):
+                continue
+            done.add(periodo)
+            obj = canonical_object(prefix, dataset, tipo_entidad, periodo)
+            path = f"gs://{bucket}/{_landing_object(obj)}" if dry_run else _upload_landing(piece, bucket, obj)
+            written[periodo] = path
+            entries[periodo] = {"rows": int(len(piece)), "path": path}
+        log.info("[MIGRATE] %s → %d período(s) acumulados", blob.name, len(written))
+
+    bytes_retired = sum(int(x.size or 0) for x in legacy)
+    if not dry_run:
+        if entries:
+            update_manifest(bucket, prefix, dataset, entries)
+        for blob in legacy:
+            blob.delete()
+
+    return {"canonical": written, "retired": len(legacy), "bytes_retired": bytes_retired}
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Compacta el landing SIMBAD en un objeto por período")
+    ap.add_argument("--bucket", default=os.getenv("GCS_BUCKET"))
+    ap.add_argument("--prefix", default=os.getenv("LANDING_PREFIX"))
+    ap.add_argument("--dataset", default=os.getenv("SB_DATASET"))
+    ap.add_argument("--tipo-entidad", default=os.getenv("SB_TIPO_ENTIDAD", "AAyP"))
+    ap.add_argument("--period", action="append", help="YYYY-MM (repetible); default: todos")
+    ap.add_argument("--legacy", action="store_true", help="migrar además consolidados/mensuales del layout anterior")
+    ap.add_argument("--dry-run", action="store_true")
+    args = ap.parse_args(argv)
+    if not all([args.bucket, args.prefix, args.dataset]):
+        ap.error("Faltan --bucket/--prefix/--dataset (o GCS_BUCKET/LANDING_PREFIX/SB_DATASET)")
+
+    logging.basicConfig(level=logging.INFO)
+    out = {"revisions": compact_periods(args.bucket, args.prefix, args.dataset, args.period, args.dry_run)}
+    if args.legacy:
+        out["legacy"] = migrate_legacy(args.bucket, args.prefix, args.dataset, args.tipo_entidad, args.dry_run)
+    print(json.dumps(out, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+# landing/simbad/simbad/delta.py
+"""
+Change-sets por período: solo las filas que cambiaron entre revisiones.
+
+Con SB_DELTA=true cada período descargado se compara por row_key con su versión
+anterior y se escribe un change-set con las filas insertadas (`I`), cambiadas
+(`U`) y borradas (`D`, solo periodo y row_key) en la columna `op`:
+
+    {prefix}/{dataset}/_delta/periodo=YYYY-MM/changes_{tipo}_hipotecarios_YYYY-MM__{run_date}_{ts}.csv
+    {prefix}/{dataset}/_delta/periodo=YYYY-MM/_state.csv.gz
+    {prefix}/{dataset}/_delta/periodo=YYYY-MM/_state__{ts}.pending.csv.gz
+
+La versión anterior es `_state`: un hash de 64 bits del contenido (todo lo que no
+es dimensión) por row_key, así que comparar no descarga el archivo de landing
+anterior. Un período sin estado (primera corrida con SB_DELTA) no escribe change-set:
+queda marcado `base` y Silver lo procesa desde su archivo completo.
+
+`_state` es la última versión que Silver ya aplicó. El estado nuevo se escribe como
+pendiente (`state` en el resultado) y el orquestador lo promueve con `promote_states`
+solo cuando los SP terminaron. Si el refresh falla o no corre, la próxima corrida
+vuelve a comparar contra lo aplicado y su change-set incluye también esas filas.
+
+El archivo de landing completo se sigue escribiendo (replay, gap-fill, gold_local).
+El orquestador carga solo los change-sets en `bronze.simbad_landing_changes` y
+`sp_apply_landing_changes_to_silver` los aplica con un MERGE que toca esas filas.
+"""
+import io
+import os
+import gzip
+import logging
+import contextvars
+import datetime as dt
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from .sink import _storage_client, _upload_landing
+from .tracing import span
+from .transform import DERIVED_COLUMNS, DIMENSION_COLUMNS, PREFERRED_COLUMNS, ROW_KEY
+
+log = logging.getLogger("simbad.delta")
+
+DELTA = os.getenv("SB_DELTA", "false").lower() == "true"
+DELTA_DIR = "_delta"
+STATE_NAME = "_state.csv.gz"
+PENDING_PREFIX = "_state__"
+PENDING_SUFFIX = ".pending.csv.gz"
+OP_COLUMN = "op"
+# Orden posicional del change-set (el del landing + op), igual que `bronze.simbad_landing_changes`
+CHANGE_COLUMNS = PREFERRED_COLUMNS + [ROW_KEY] + DERIVED_COLUMNS + [OP_COLUMN]
+_HASH = "row_hash"
+
+
+def _delta_dir(prefix: str, dataset: str, periodo: str) -> str:
+    return f"{prefix}/{dataset}/{DELTA_DIR}/periodo={periodo}"
+
+
+def changes_object(prefix: str, dataset: str, tipo_entidad: str, periodo: str, run_date: str) -> str:
+    """Change-set de una corrida (con extensión .csv; `_upload_landing` la cambia según el formato)."""
+    stamp = dt.datetime.utcnow().strftime("%Y%m%d_%H%M%S_%f")
+    return f"{_delta_dir(prefix, dataset, periodo)}/changes_{tipo_entidad}_hipotecarios_{periodo}__{run_date}_{stamp}.csv"
+
+
+def pending_state_object(prefix: str, dataset: str, periodo: str) -> str:
+    """Estado pendiente de una corrida; el sello hace que el orden por nombre sea el de escritura."""
+    stamp = dt.datetime.utcnow().strftime("%Y%m%d_%H%M%S_%f")
+    return f"{_delta_dir(prefix, dataset, periodo)}/{PENDING_PREFIX}{stamp}{PENDING_SUFFIX}"
+
+
+def _content_hash(df: pd.DataFrame) -> pd.Series:
+    """
+    Hash (uint64) por fila de las columnas que no son dimensión, row_key ni __periodo,
+    sobre sus tipos nativos (sin pasar a texto). Si la API cambia el tipo de una
+    medida entre corridas las filas salen como `U`: de más, nunca de menos.
+    """
+    skip = set(DIMENSION_COLUMNS) | {ROW_KEY, "__periodo"}
+    cols = sorted(c for c in df.columns if c not in skip)
+    return pd.util.hash_pandas_object(df[cols], index=False)
+
+
+def _load_state(bucket: str, name: str) -> Optional[pd.Series]:
+    """{row_key: hash} de la versión anterior; None si el período no tiene estado."""
+    blob = _storage_client().bucket(bucket).blob(name)
+    if not blob.exists():
+        return None
+    state = pd.read_csv(io.BytesIO(blob.download_as_bytes()), compression="gzip",
+                        dtype={ROW_KEY: str, _HASH: "uint64"})
+    return state.set_index(ROW_KEY)[_HASH]
+
+
+def _save_state(bucket: str, name: str, hashes: pd.Series) -> str:
+    csv = hashes.rename(_HASH).rename_axis(ROW_KEY).reset_index().to_csv(index=False)
+    data = gzip.compress(csv.encode("utf-8"), compresslevel=6)
+    _storage_client().bucket(bucket).blob(name).upload_from_string(data, content_type="application/gzip")
+    return f"gs://{bucket}/{name}"
+
+
+def _diff(df: pd.DataFrame, hashes: pd.Series, previous: pd.Series, periodo: str) -> pd.DataFrame:
+    """Filas I/U de `df` y D (periodo + row_key) de lo que ya no está, con el layout del change-set."""
+    old = previous.reindex(hashes.index)
+    ops = pd.Series("U", index=hashes.index).where(old.notna(), "I")
+    keep = old.isna() | (old != hashes)
+    upserts = df.set_index(ROW_KEY, drop=False).loc[keep[keep].index].assign(**{OP_COLUMN: ops[keep]})
+
+    gone = previous.index.difference(hashes.index)
+    deletes = pd.DataFrame({"periodo": periodo, ROW_KEY: gone, OP_COLUMN: "D"})
+    return pd.concat([upserts.reset_index(drop=True), deletes], ignore_index=True).reindex(columns=CHANGE_COLUMNS)
+
+
+def write_changeset(piece: pd.DataFrame, bucket: str, prefix: str, dataset: str, tipo_entidad: str,
+                    run_date: str) -> dict:
+    """
+    Compara una pieza por período con su estado aplicado, sube el change-set (si hay
+    cambios) y después el estado nuevo como pendiente. Devuelve {"periodo", "insert",
+    "change", "delete", "path", "state"} o {"periodo", "base": True, "state"} si no
+    había estado; sin cambios, `path` y `state` son None.
+    """
+    periodo = str(piece["__periodo"].iloc[0])
+    state_name = f"{_delta_dir(prefix, dataset, periodo)}/{STATE_NAME}"
+    with span("delta", periodo=periodo, rows=len(piece)) as sp:
+        df = piece.drop_duplicates(ROW_KEY, keep="last")
+        hashes = pd.Series(_content_hash(df).to_numpy(), index=pd.Index(df[ROW_KEY], name=ROW_KEY))
+        previous = _load_state(bucket, state_name)
+        if previous is None:
+            out = {"periodo": periodo, "base": True}
+        else:
+            changes = _diff(df, hashes, previous, periodo)
+            counts = changes[OP_COLUMN].value_counts()
+            path = None
+            if not changes.empty:
+                path = _upload_landing(changes, bucket, changes_object(prefix, dataset, tipo_entidad, periodo, run_date))
+            out = {"periodo": periodo, "insert": int(counts.get("I", 0)), "change": int(counts.get("U", 0)),
+                   "delete": int(counts.get("D", 0)), "path": path}
+        # El estado nuevo queda pendiente hasta que el orquestador confirma que Silver lo aplicó
+        out["state"] = None
+        if previous is None or out["path"]:
+            out["state"] = _save_state(bucket, pending_state_object(prefix, dataset, periodo), hashes)
+        sp.set(**{k: v for k, v in out.items() if k in ("insert", "change", "delete", "base")})
+    if out.get("base"):
+        log.info("[DELTA] %s sin estado previo: base completa (%d filas)", periodo, len(df))
+    else:
+        log.info("[DELTA] %s: +%d ~%d -%d", periodo, out["insert"], out["change"], out["delete"])
+    return out
+
+
+def promote_states(states: List[str]) -> List[str]:
+    """
+    Convierte cada estado pendiente (gs://...) en el `_state` de su período y borra
+    los pendientes de ese período hasta él. Un pendiente que ya no existe lo dejó
+    atrás la promoción de una corrida posterior: se omite. Devuelve los promovidos.
+    """
+    client = _storage_client()
+    promoted = []
+    for uri in states:
+        bucket, name = uri[len("gs://"):].split("/", 1)
+        bkt = client.bucket(bucket)
+        pending = bkt.get_blob(name)
+        if pending is None:
+            log.info("[DELTA] %s ya no está pendiente; se omite", uri)
+            continue
+        folder = name.rsplit("/", 1)[0]
+        bkt.copy_blob(pending, bkt, f"{folder}/{STATE_NAME}")
+        for blob in bkt.list_blobs(prefix=f"{folder}/{PENDING_PREFIX}"):
+            if blob.name.endswith(PENDING_SUFFIX) and blob.name <= name:
+                blob.delete()
+        promoted.append(uri)
+    log.info("[DELTA] %d estado(s) promovido(s)", len(promoted))
+    return promoted
+
+
+def write_changesets(pieces: List[pd.DataFrame], bucket: str, prefix: str, dataset: str, tipo_entidad: str,
+                     run_date: str, max_workers: int = 4) -> Dict[str, dict]:
+    """`write_changeset` de cada pieza en paralelo: {periodo: resultado sin `periodo`}."""
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="delta") as pool:
+        futures = [pool.submit(contextvars.copy_context().run, write_changeset, p, bucket, prefix, dataset,
+                               tipo_entidad, run_date) for p in pieces]
+        results = [f.result() for f in futures]
+    return {r.pop("periodo"): r for r in results}
@@ -0,0 +1,223 @@
+# landing/simbad/simbad/gcs_common.py
+"""
+Utilidades GCS compartidas por la librería simbad y el servicio de macroeconomía.
+
+Módulo autónomo (sin imports de simbad): la imagen de landing/macroeconomics lo
+copia como `gcs_common.py` junto a su main.py (ver su Dockerfile). Las
+dependencias de Google se importan en el primer uso, así el /healthz de ese
+servicio no las carga.
+
+- `same_content` / `put_if_changed`: no re-subir un objeto que ya tiene el mismo
+  contenido (CRC32C o MD5 de sus metadatos) y escribir con `if_generation_match`
+  de la generación comparada.
+- `Lease` sobre un backend con versión (`GcsLeaseBackend`: la generación del
+  objeto): crear si no existe, tomar uno vencido o renovar el propio; `heartbeat`
+  lo renueva cada TTL/3 y `ensure_lease` lanza `LeaseLost` si la corrida en curso
+  lo perdió.
+"""
+import os
+import json
+import time
+import base64
+import socket
+import hashlib
+import logging
+import threading
+import uuid
+import contextvars
+import datetime as dt
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+# Lease de la corrida en curso (lo fija `Lease.heartbeat`; los hilos del pipeline heredan el contexto)
+_current: contextvars.ContextVar[Optional["Lease"]] = contextvars.ContextVar("gcs_lease", default=None)
+
+
+def same_content(blob, data: bytes) -> bool:
+    """True si `blob` (con metadatos cargados) ya contiene `data`: CRC32C o, si falta, MD5."""
+    if blob.crc32c:
+        try:
+            import google_crc32c
+        except ImportError:
+            pass
+        else:
+            return blob.crc32c == base64.b64encode(google_crc32c.value(data).to_bytes(4, "big")).decode()
+    if blob.md5_hash:
+        return blob.md5_hash == base64.b64encode(hashlib.md5(data).digest()).decode()
+    return False
+
+
+def put_if_changed(bkt, object_name: str, data: bytes, content_type: str,
+                   skip_identical: bool = True, retries: int = 3) -> bool:
+    """
+    Sube `data` a `bkt` salvo que el objeto ya tenga ese contenido. La escritura lleva
+    `if_generation_match` de la generación comparada: si otro escritor cambió el
+    objeto entre medio se vuelve a comparar. True si subió.
+    """
+    from google.api_core.exceptions import PreconditionFailed
+
+    if not skip_identical:
+        bkt.blob(object_name).upload_from_string(data, content_type=content_type)
+        return True
+    for attempt in range(retries):
+        current = bkt.get_blob(object_name)
+        if current is not None and same_content(current, data):
+            return False
+        try:
+            bkt.blob(object_name).upload_from_string(
+                data, content_type=content_type, if_generation_match=current.generation if current is not None else 0)
+            return True
+        except PreconditionFailed:
+            if attempt == retries - 1:
+                raise
+            log.info("[WRITE] %s cambió durante la subida; se vuelve a comparar", object_name)
+
+
+class LeaseLost(RuntimeError):
+    """El lease de la corrida ya no es nuestro: seguir escribiendo pisaría a otra corrida."""
+
+
+class GcsLeaseBackend:
+    """Lease como objeto GCS (`bkt` es un `storage.Bucket`); la generación del objeto es la versión."""
+
+    def __init__(self, bkt, name: str):
+        self.bucket = bkt
+        self.name = name
+
+    def read(self) -> Optional[Tuple[dict, int]]:
+        from google.api_core.exceptions import NotFound, PreconditionFailed
+
+        blob = self.bucket.get_blob(self.name)
+        if blob is None:
+            return None
+        try:
+            return json.loads(blob.download_as_bytes(if_generation_match=blob.generation)), blob.generation
+        except (NotFound, PreconditionFailed):
+            return self.read()  # cambió entre metadatos y descarga
+
+    def write(self, record: dict, generation: int) -> bool:
+        from google.api_core.exceptions import PreconditionFailed
+
+        try:
+            self.bucket.blob(self.name).upload_from_string(
+                json.dumps(record), content_type="application/json", if_generation_match=generation)
+            return True
+        except PreconditionFailed:
+            return False
+
+    def delete(self, generation: int) -> bool:
+        from google.api_core.exceptions import NotFound, PreconditionFailed
+
+        try:
+            self.bucket.blob(self.name).delete(if_generation_match=generation)
+            return True
+        except (NotFound, PreconditionFailed):
+            return False
+
+
+class Lease:
+    """
+    Lease sobre `backend` (read/write/delete con versión). `acquire` no bloquea;
+    `heartbeat` lo renueva mientras dura la corrida.
+    """
+    thread_name = "lease"
+
+    def __init__(self, backend, owner: Optional[str] = None, ttl: float = 300.0):
+        self.backend = backend
+        self.owner = owner or f"run:{uuid.uuid4().hex}"
+        self.ttl = ttl
+        self.holder: Optional[dict] = None
+        self.lost = False
+        self.expires = 0.0
+        self.acquired_at = dt.datetime.utcnow().isoformat(timespec="seconds") + "Z"
+
+    def _record(self) -> dict:
+        return {"owner": self.owner, "host": socket.gethostname(), "pid": os.getpid(),
+                "acquired": self.acquired_at, "expires": time.time() + self.ttl, "ttl": self.ttl}
+
+    def _write(self, generation: int) -> bool:
+        record = self._record()
+        if self.backend.write(record, generation):
+            self.expires = record["expires"]
+            return True
+        return False
+
+    def _swap(self, take_expired: bool) -> Optional[bool]:
+        """
+        Escribe el lease si está libre, es nuestro o (con `take_expired`) vencido.
+        False si es de otro (o desapareció al renovar); None si otras tareas del
+        mismo dueño ganaron todas las carreras.
+        """
+        for _ in range(3):
+            current = self.backend.read()
+            if current is None:
+                if not take_expired:
+                    return False
+                generation = 0
+            else:
+                held, generation = current
+                mine = held.get("owner") == self.owner
+                if not mine and not (take_expired and float(held.get("expires", 0)) < time.time()):
+                    self.holder = held
+                    return False
+            if self._write(generation):
+                return True
+        return None
+
+    def acquire(self) -> bool:
+        """True si el lease quedó a nuestro nombre; si no, `holder` dice quién lo tiene."""
+        won = self._swap(take_expired=True)
+        if won is None:  # las carreras las ganaron otras tareas: es nuestro si el dueño es el mismo
+            current = self.backend.read()
+            won = current is not None and current[0].get("owner") == self.owner
+            if won:
+                self.expires = float(current[0].get("expires", 0))
+        return won
+
+    def renew(self) -> bool:
+        """Extiende `expires`; False si el lease ya no es nuestro (venció y otro lo tomó)."""
+        if self._swap(take_expired=False) is False:
+            self.lost = True
+            log.warning("[LOCK] Lease perdido (%s): lo tiene %s", self.owner, (self.holder or {}).get("owner"))
+        return not self.lost
+
+    def valid(self) -> bool:
+        """False si se perdió o venció sin renovarse (p. ej. el heartbeat quedó bloqueado)."""
+        return not self.lost and time.time() < self.expires
+
+    def release(self) -> None:
+        """Borra el lock si sigue siendo nuestro."""
+        current = self.backend.read()
+        if current is not None and current[0].get("owner") == self.owner:
+            self.backend.delete(current[1])
+
+    @contextmanager
+    def heartbeat(self):
+        """Renueva el lease cada TTL/3 mientras dura el bloque; es el lease de `ensure_lease`."""
+        stop = threading.Event()
+        token = _current.set(self)
+
+        def beat():
+            while not stop.wait(self.ttl / 3):
+                if not self.renew():
+                    return
+
+        t = threading.Thread(target=beat, name=self.thread_name, daemon=True)
+        t.start()
+        try:
+            yield self
+        finally:
+            stop.set()
+            t.join()
+            _current.reset(token)
+
+
+def ensure_lease() -> None:
+    """Lanza `LeaseLost` si la corrida en curso tiene lease y ya no es válido (sin lease, no hace nada)."""
+    lease = _current.get()
+    if lease is not None and not lease.valid():
+        lease.lost = True
+        raise LeaseLost(f"Lease perdido ({lease.owner}); se aborta la corrida para no pisar a "
+                        f"{(lease.holder or {}).get('owner') or 'otra corrida'}")
@@ -0,0 +1,360 @@
+# landing/simbad/simbad/gold_local.py
+"""
+Motor local de Gold: recalcula `gold.simbad_gold` desde archivos de landing con
+DuckDB embebido, sin ida y vuelta a BigQuery.
+
+Replica en SQL DuckDB la misma cadena que BigQuery:
+
+    landing CSV/Parquet → limpieza de sp_process_landing_batch_to_silver
+                        → un hecho por row_key (el más reciente por dt_captura)
+                        → agregación de sp_process_silver_to_gold_periods
+
+Sirve para iterar KPIs (TASA_MORA, COUNT(DISTINCT ...), etc.) y para el caso de
+pocos datos offline. `check_parity` compara el resultado contra una referencia
+pandas construida con `_to_silver_frame` (la limpieza del sink a staging).
+
+Uso:
+    python -m simbad.gold_local "landing/simbad/**/*.csv" --from 2024-01 --to 2025-06
+    python -m simbad.gold_local data/ --inflacion infl.csv --tipo-cambio tc.csv --out gold.csv --check
+
+Lee los tres formatos de landing (SB_LANDING_FORMAT): CSV, Parquet y Arrow IPC.
+Requiere `duckdb` (solo local; no forma parte de la imagen de Cloud Run).
+"""
+import os
+import re
+import sys
+import glob
+import json
+import time
+import logging
+import argparse
+import datetime as dt
+from typing import List, Optional, Sequence
+
+import pandas as pd
+
+from .delta import DELTA_DIR
+from .periods import _parse_period
+from .transform import PREFERRED_COLUMNS, ROW_KEY, DIMENSION_COLUMNS, SILVER_FLOAT_COLUMNS, _to_silver_frame
+
+log = logging.getLogger("simbad.gold_local")
+
+GOLD_KEY = ["periodo_date", "PROVINCIA"]
+GOLD_SUMS = {
+    "DEUDACAPITAL": "deudaCapital",
+    "DEUDAVENCIDA": "deudaVencida",
+    "DEUDAVENCIDADE31A90DIAS": "deudaVencidaDe31A90Dias",
+    "CANTIDADCREDITO": "cantidadCredito",
+    "VALORDESEMBOLSO": "valorDesembolso",
+    "VALORGARANTIA": "valorGarantia",
+    "VALORPROVISIONCAPITALYRENDIMIENTO": "valorProvisionCapitalYRendimiento",
+    "DEUDA": "deuda",
+}
+GOLD_DISTINCTS = {
+    "GENERO": "genero", "PERSONA": "persona", "MONEDA": "moneda",
+    "SECTOR": "sector", "ENTIDAD": "entidad", "RESIDENCIA": "residencia",
+}
+GOLD_COLUMNS = (
+    ["periodo_date", "ANIO", "MES", "PROVINCIA"] + list(GOLD_SUMS) + list(GOLD_DISTINCTS)
+    + ["PD_AGREGADA", "TASA_MORA", "COBERTURA_GARANTIA", "PROPORCION_PROVISIONADA",
+       "INFLACION", "TC_VENTA", "TC_COMPRA"]
+)
+
+LANDING_SUFFIXES = (".csv", ".parquet", ".arrow")
+_DT_RE = re.compile(r"/dt=(\d{4}-\d{2}-\d{2})/")
+_ROW_KEY_SQL = "left(sha256(concat_ws(chr(31), {})), 32)".format(
+    ", ".join(f"coalesce(trim({c}), '')" for c in DIMENSION_COLUMNS)
+)
+
+
+def _num_sql(col: str) -> str:
+    # REGEXP_REPLACE + SAFE_CAST del SP (DuckDB necesita 'g' para reemplazar todo)
+    return (f"TRY_CAST(regexp_replace(regexp_replace(coalesce({col}, '0'), '[,$]', '', 'g'), "
+            f"'[^0-9.-]', '', 'g') AS DOUBLE)")
+
+
+_SILVER_SQL = f"""
+CREATE OR REPLACE TEMP TABLE silver AS
+WITH cleaned AS (
+  SELECT
+    {", ".join(f"trim({c}) AS {c}" for c in ["periodo", "tipoCliente", "actividad", "entidad", "sector",
+                                             "moneda", "provincia", "residencia", "genero", "persona"])},
+    {", ".join(f"{_num_sql(c)} AS {c}" for c in SILVER_FLOAT_COLUMNS)},
+    -- SAFE_CAST(... AS INT64) de BigQuery no acepta decimales; TRY_CAST de DuckDB sí
+    CASE WHEN regexp_full_match(coalesce(cantidadCredito, ''), '\\s*[+-]?[0-9]+\\s*')
+         THEN TRY_CAST(trim(cantidadCredito) AS BIGINT) END AS cantidadCredito,
+    CAST(coalesce(try_strptime(trim(periodo), '%Y-%m'), try_strptime(trim(periodo), '%Y/%m'),
+                  try_strptime(trim(periodo), '%m/%Y'), try_strptime(trim(periodo), '%Y%m')) AS DATE) AS periodo_date,
+    dt_captura,
+    CASE WHEN regexp_full_match(coalesce({ROW_KEY}, ''), '[0-9a-f]{{32}}') THEN {ROW_KEY}
+         ELSE {_ROW_KEY_SQL} END AS {ROW_KEY}
+  FROM landing
+)
+SELECT
+  *,
+  year(periodo_date) AS anio,
+  month(periodo_date) AS mes,
+  year(periodo_date) * 100 + month(periodo_date) AS periodo_ym,
+  CASE WHEN periodo_date IS NULL OR coalesce(periodo, '') = '' THEN 1 ELSE 0 END AS flg_periodo_invalido,
+  CASE WHEN deudaCapital < 0 OR deudaVencida < 0 OR deuda < 0 THEN 1 ELSE 0 END AS flg_importe_negativo
+FROM cleaned
+WHERE entidad IS NOT NULL AND provincia IS NOT NULL
+QUALIFY row_number() OVER (PARTITION BY {ROW_KEY} ORDER BY dt_captura DESC) = 1
+"""
+
+_GOLD_SQL = f"""
+WITH simbad_aggregated AS (
+  SELECT
+    periodo_date,
+    CAST(year(periodo_date) AS BIGINT) AS ANIO,
+    CAST(month(periodo_date) AS BIGINT) AS MES,
+    provincia AS PROVINCIA,
+    {", ".join(f"CAST(SUM(coalesce({c}, 0)) AS {'BIGINT' if k == 'CANTIDADCREDITO' else 'DOUBLE'}) AS {k}"
+               for k, c in GOLD_SUMS.items())},
+    {", ".join(f"COUNT(DISTINCT {c}) AS {k}" for k, c in GOLD_DISTINCTS.items())},
+    1 AS PD_AGREGADA
+  FROM silver
+  WHERE periodo_date BETWEEN $desde AND $hasta
+    AND flg_periodo_invalido = 0
+    AND provincia IS NOT NULL
+    AND periodo_date IS NOT NULL
+  GROUP BY periodo_date, provincia
+)
+SELECT
+  s.*,
+  CASE WHEN s.DEUDACAPITAL > 0 THEN s.DEUDAVENCIDA / s.DEUDACAPITAL ELSE 0 END AS TASA_MORA,
+  CASE WHEN s.DEUDACAPITAL > 0 THEN s.VALORGARANTIA / s.DEUDACAPITAL ELSE 0 END AS COBERTURA_GARANTIA,
+  CASE WHEN s.DEUDACAPITAL > 0 THEN s.VALORPROVISIONCAPITALYRENDIMIENTO / s.DEUDACAPITAL ELSE 0 END
+    AS PROPORCION_PROVISIONADA,
+  coalesce(inf.inflacion, 0) AS INFLACION,
+  coalesce(tc.tc_venta, 0) AS TC_VENTA,
+  coalesce(tc.tc_compra, 0) AS TC_COMPRA
+FROM simbad_aggregated s
+LEFT JOIN macro_inflacion inf ON s.periodo_date = inf.periodo_date
+LEFT JOIN macro_tipo_cambio tc ON s.periodo_date = tc.periodo_date
+ORDER BY periodo_date, PROVINCIA
+"""
+
+
+def _connect():
+    try:
+        import duckdb
+    except ImportError as e:
+        raise RuntimeError("simbad.gold_local requiere duckdb (pip install duckdb)") from e
+    return duckdb.connect()
+
+
+def _expand(paths: Sequence[str]) -> List[str]:
+    """Archivos .csv/.parquet/.arrow a partir de rutas, directorios (recursivo) o globs."""
+    files = []
+    for p in paths:
+        if os.path.isdir(p):
+            matches = glob.glob(os.path.join(p, "**", "*"), recursive=True)
+        else:
+            matches = glob.glob(p, recursive=True) or [p]
+        # Los change-sets (`_delta/`, ver `simbad.delta`) no son landing completo
+        files.extend(f for f in matches if f.endswith(LANDING_SUFFIXES) and os.path.isfile(f)
+                     and f"/{DELTA_DIR}/" not in f.replace(os.sep, "/"))
+    if not files:
+        raise FileNotFoundError(f"Sin archivos CSV/Parquet/Arrow de landing en {list(paths)}")
+    return sorted(set(files))
+
+
+def _dt_captura(path: str, default: str) -> str:
+    m = _DT_RE.search(path.replace(os.sep, "/"))
+    return m.group(1) if m else default
+
+
+def _register_landing(con, files: List[str], default_dt: str) -> None:
+    """
+    Vista `landing`: columnas de landing como VARCHAR (como la external table),
+    más dt_captura tomada de `dt=YYYY-MM-DD` en la ruta. Columnas ausentes → NULL.
+    """
+    selects = []
+    arrow_files = [f for f in files if f.endswith(".arrow")]
+    if arrow_files:
+        # Arrow IPC (SB_LANDING_FORMAT=arrow): se registra la tabla en memoria sin copiar
+        import pyarrow as pa
+        tables = []
+        for f in arrow_files:
+            table = pa.ipc.open_file(f).read_all()
+            tables.append(table.append_column("filename", pa.array([f] * table.num_rows, pa.string())))
+        con.register("landing_arrow", pa.concat_tables(tables, promote_options="default"))
+
+    for kind, reader in (("csv", "read_csv({}, all_varchar=true, union_by_name=true, filename=true)"),
+                         ("parquet", "read_parquet({}, union_by_name=true, filename=true)"),
+                         ("arrow", "landing_arrow")):
+        group = [f for f in files if f.endswith("." + kind)]
+        if not group:
+            continue
+        source = reader.format("[" + ", ".join("'" + f.replace("'", "''") + "'" for f in group) + "]")
+        present = {r[0] for r in con.execute(f"DESCRIBE SELECT * FROM {source}").fetchall()}
+        cols = [f"CAST({c} AS VARCHAR) AS {c}" if c in present else f"CAST(NULL AS VARCHAR) AS {c}"
+                for c in PREFERRED_COLUMNS + [ROW_KEY]]
+        selects.append(f"SELECT {', '.join(cols)}, filename FROM {source}")
+
+    dts = pd.DataFrame({"filename": files, "dt_captura": [dt.date.fromisoformat(_dt_captura(f, default_dt))
+                                                           for f in files]})
+    con.register("landing_dt", dts)
+    con.execute(
+        "CREATE OR REPLACE TEMP VIEW landing AS SELECT l.*, d.dt_captura FROM ("
+        + " UNION ALL BY NAME ".join(selects)
+        + ") l JOIN landing_dt d USING (filename)"
+    )
+
+
+def _register_macro(con, inflacion: Optional[str], tipo_cambio: Optional[str]) -> None:
+    """
+    Promedios mensuales de inflación y tipo de cambio. Acepta la forma bronze
+    (`fecha`, `inflacion_anual` / `tipo_cambio` + `tasa_cambio`) o la de landing
+    (`Fecha` + `inflacion` / `fecha` + `tc_venta` + `tc_compra`). Sin archivo → 0.
+    """
+    fecha = ("date_trunc('month', coalesce(try_strptime(CAST({} AS VARCHAR), '%Y-%m-%d'), "
+             "try_strptime(CAST({} AS VARCHAR), '%Y-%m')))::DATE")
+
+    if inflacion:
+        src = f"read_csv('{inflacion}', all_varchar=true)" if inflacion.endswith(".csv") else f"read_parquet('{inflacion}')"
+        cols = {r[0] for r in con.execute(f"DESCRIBE SELECT * FROM {src}").fetchall()}
+        f_col = "fecha" if "fecha" in cols else "Fecha"
+        v_col = "inflacion_anual" if "inflacion_anual" in cols else "inflacion"
+        con.execute(f"""CREATE OR REPLACE TEMP VIEW macro_inflacion AS
+            SELECT {fecha.format(f_col, f_col)} AS periodo_date, AVG(TRY_CAST({v_col} AS DOUBLE)) AS inflacion
+            FROM {src} GROUP BY 1""")
+    else:
+        con.execute("CREATE OR REPLACE TEMP VIEW macro_inflacion AS "
+                    "SELECT CAST(NULL AS DATE) AS periodo_date, CAST(NULL AS DOUBLE) AS inflacion WHERE false")
+
+    if tipo_cambio:
+        src = f"read_csv('{tipo_cambio}', all_varchar=true)" if tipo_cambio.endswith(".csv") else f"read_parquet('{tipo_cambio}')"
+        cols = {r[0] for r in con.execute(f"DESCRIBE SELECT * FROM {src}").fetchall()}
+        if "tipo_cambio" in cols:
+            venta = "AVG(CASE WHEN tipo_cambio = 'VENTA' THEN TRY_CAST(tasa_cambio AS DOUBLE) END)"
+            compra = "AVG(CASE WHEN tipo_cambio = 'COMPRA' THEN TRY_CAST(tasa_cambio AS DOUBLE) END)"
+        else:
+            venta, compra = "AVG(TRY_CAST(tc_venta AS DOUBLE))", "AVG(TRY_CAST(tc_compra AS DOUBLE))"
+        con.execute(f"""CREATE OR REPLACE TEMP VIEW macro_tipo_cambio AS
+            SELECT {fecha.format('fecha', 'fecha')} AS periodo_date, {venta} AS tc_venta, {compra} AS tc_compra
+            FROM {src} GROUP BY 1""")
+    else:
+        con.execute("CREATE OR REPLACE TEMP VIEW macro_tipo_cambio AS SELECT CAST(NULL AS DATE) AS periodo_date, "
+                    "CAST(NULL AS DOUBLE) AS tc_venta, CAST(NULL AS DOUBLE) AS tc_compra WHERE false")
+
+
+def _bounds(desde: Optional[str], hasta: Optional[str]) -> tuple:
+    lo = dt.date(*_parse_period(desde), 1) if desde else dt.date(1900, 1, 1)
+    hi = dt.date(*_parse_period(hasta), 1) if hasta else dt.date(9999, 12, 1)
+    return lo, hi
+
+
+def compute_gold(paths: Sequence[str], desde: Optional[str] = None, hasta: Optional[str] = None,
+                 inflacion: Optional[str] = None, tipo_cambio: Optional[str] = None,
+                 run_date: Optional[str] = None) -> pd.DataFrame:
+    """
+    Gold (mismas columnas que `gold.simbad_gold`) para los períodos [desde, hasta]
+    a partir de archivos de landing locales. Archivos sin `dt=` en la ruta usan run_date.
+    """
+    files = _expand(paths)
+    con = _connect()
+    t0 = time.perf_counter()
+    _register_landing(con, files, run_date or dt.date.today().isoformat())
+    _register_macro(con, inflacion, tipo_cambio)
+    con.execute(_SILVER_SQL)
+    lo, hi = _bounds(desde, hasta)
+    gold = con.execute(_GOLD_SQL, {"desde": lo, "hasta": hi}).df()[GOLD_COLUMNS]
+    log.info("[GOLD] %d archivo(s) → %d filas gold en %.3fs", len(files), len(gold), time.perf_counter() - t0)
+    return gold
+
+
+def _reference_gold(files: List[str], desde: Optional[str], hasta: Optional[str], run_date: str) -> pd.DataFrame:
+    """Referencia pandas de la misma semántica (silver vía `_to_silver_frame`), solo CSV."""
+    frames = []
+    for f in files:
+        if f.endswith(".csv"):
+            raw = pd.read_csv(f, dtype=str)
+            silver = _to_silver_frame(raw, _dt_captura(f, run_date))
+            # SAFE_CAST(... AS INT64) rechaza "12.0"; _to_silver_frame lo acepta
+            strict = raw.loc[raw["entidad"].notna() & raw["provincia"].notna(), "cantidadCredito"] \
+                .str.fullmatch(r"\s*[+-]?[0-9]+\s*").fillna(False).to_numpy()
+            silver["cantidadCredito"] = silver["cantidadCredito"].where(strict)
+            frames.append(silver)
+    silver = pd.concat(frames, ignore_index=True)
+    silver = silver.sort_values("dt_captura", ascending=False).drop_duplicates(ROW_KEY)
+
+    lo, hi = _bounds(desde, hasta)
+    silver = silver[(silver["flg_periodo_invalido"] == 0) & silver["periodo_date"].notna()]
+    silver = silver[(silver["periodo_date"] >= lo) & (silver["periodo_date"] <= hi)]
+    grouped = silver.groupby(["periodo_date", "provincia"])
+    gold = pd.concat(
+        [grouped[c].apply(lambda s: s.fillna(0).sum()).rename(k) for k, c in GOLD_SUMS.items()]
+        + [grouped[c].nunique().rename(k) for k, c in GOLD_DISTINCTS.items()],
+        axis=1,
+    ).reset_index().rename(columns={"provincia": "PROVINCIA"})
+    return gold
+
+
+def check_parity(paths: Sequence[str], desde: Optional[str] = None, hasta: Optional[str] = None,
+                 run_date: Optional[str] = None, rel_tol: float = 1e-9) -> dict:
+    """
+    Compara agregados de DuckDB contra la referencia pandas: mismas claves
+    (periodo_date, PROVINCIA) y sumas/conteos iguales dentro de `rel_tol`.
+    """
+    run_date = run_date or dt.date.today().isoformat()
+    files = _expand(paths)
+    ours = compute_gold(files, desde, hasta, run_date=run_date)
+    ref = _reference_gold(files, desde, hasta, run_date)
+
+    ours = ours.assign(periodo_date=pd.to_datetime(ours["periodo_date"]).dt.date)
+    merged = ours.merge(ref, on=GOLD_KEY, how="outer", suffixes=("", "_ref"), indicator=True)
+    missing = merged[merged["_merge"] != "both"]
+    both = merged[merged["_merge"] == "both"]
+
+    diffs = {}
+    for k in list(GOLD_SUMS) + list(GOLD_DISTINCTS):
+        a, b = both[k].astype("float64"), both[f"{k}_ref"].astype("float64")
+        bad = (a - b).abs() > rel_tol * b.abs().clip(lower=1.0)
+        if bad.any():
+            diffs[k] = int(bad.sum())
+
+    return {
+        "ok": missing.empty and not diffs,
+        "rows": len(ours),
+        "rows_ref": len(ref),
+        "key_mismatches": missing[GOLD_KEY + ["_merge"]].astype(str).to_dict("records"),
+        "column_mismatches": diffs,
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Recalcula gold.simbad_gold localmente desde landing (DuckDB)")
+    ap.add_argument("paths", nargs="+", help="CSV/Parquet de landing, directorios o globs")
+    ap.add_argument("--from", dest="desde", help="YYYY-MM (default: sin límite)")
+    ap.add_argument("--to", dest="hasta", help="YYYY-MM (default: sin límite)")
+    ap.add_argument("--inflacion", help="CSV/Parquet de inflación (bronze o landing)")
+    ap.add_argument("--tipo-cambio", help="CSV/Parquet de tipo de cambio (bronze o landing)")
+    ap.add_argument("--run-date", default=dt.date.today().isoformat(), help="dt_captura si la ruta no trae dt=")
+    ap.add_argument("--out", help="guardar gold en CSV o Parquet")
+    ap.add_argument("--check", action="store_true", help="verificar paridad contra la referencia pandas")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    t0 = time.perf_counter()
+    gold = compute_gold(args.paths, args.desde, args.hasta, args.inflacion, args.tipo_cambio, args.run_date)
+    seconds = round(time.perf_counter() - t0, 3)
+
+    if args.out:
+        if args.out.endswith(".parquet"):
+            gold.to_parquet(args.out, index=False)
+        else:
+            gold.to_csv(args.out, index=False)
+    else:
+        print(gold.to_string(index=False, max_rows=40))
+
+    summary = {"rows": len(gold), "seconds": seconds, "out": args.out}
+    if args.check:
+        summary["parity"] = check_parity(args.paths, args.desde, args.hasta, args.run_date)
+    print(json.dumps(summary, indent=2, default=str))
+    return 0 if summary.get("parity", {}).get("ok", True) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+# landing/simbad/simbad/harvester.py
+import logging
+import datetime as dt
+from typing import Optional
+
+from .compaction import COMPACT_ON_WRITE, LANDING_LAYOUT, revision_object
+from .delta import DELTA, write_changesets
+from .lock import locked_run
+from .manifest import period_entries, tuned_page_size, update_manifest
+from .periods import FullRange, PeriodStrategy, _fmt_period
+from .pipeline import consolidate, harvest_periods
+from .publish import PUBLISH, Publisher, compact_unpublished
+from .raw import REPLAY, harvest_session
+from .sink import _upload_landing
+from .tracing import traced_run
+from .transform import PROJECTION, _projection_columns
+
+log = logging.getLogger("simbad.harvester")
+
+
+MONTHLY_DIR = "monthly"  # subcarpeta opcional para CSV por mes
+
+
+def consolidated_object(prefix: str, dataset: str, tipo_entidad: str, run_date: str, months) -> str:
+    """Ruta del consolidado histórico de una corrida (`months` en orden cronológico)."""
+    timestamp = dt.datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    return (
+        f"{prefix}/{dataset}/dt={run_date}/"
+        f"consolidado_{tipo_entidad}_hipotecarios_{months[0][0]}_{months[-1][0]}_{timestamp}.csv"
+    )
+
+
+@traced_run("run_harvest")
+@locked_run
+def run_harvest(
+    api_key: str,
+    tipo_entidad: str,
+    start_year: int,
+    bucket: str,
+    prefix: str,
+    dataset: str,
+    keep_monthly: bool,
+    run_date: str,
+    strategy: Optional[PeriodStrategy] = None,
+    max_workers: int = 1,
+    http_client: str = "requests",
+    bq_staging: bool = False,
+    layout: Optional[str] = None,
+    finalize: bool = True,
+    replay: Optional[bool] = None,
+    projection: Optional[str] = None,
+    delta: Optional[bool] = None,
+    priority: Optional[str] = None,
+    publish: Optional[bool] = None,
+) -> dict:
+    """
+    Descarga 2012→mes actual, filtra 'Créditos Hipotecarios',
+    sube CSVs mensuales (si keep_monthly) y un consolidado final por dt=run_date.
+
+    `strategy` permite sustituir el rango completo por otra selección de períodos;
+    `max_workers` descarga varios meses en paralelo; `http_client="async"` usa
+    el cliente httpx (HTTP/2) sobre un solo event loop en lugar de hilos.
+    `bq_staging` carga además las filas ya tipadas en el staging BigQuery
+    particionado por periodo_date (ver `simbad.bq_sink`).
+    `layout="period"` (default SB_LANDING_LAYOUT) escribe un objeto por período en
+    lugar del consolidado, compactado a su canónico (ver `simbad.compaction`).
+    `finalize=False` (tareas de un job con shards) escribe siempre archivos por
+    período y devuelve `entries` sin consolidado ni manifest: los arma
+    `simbad.sharding.finalize` cuando terminan todas las tareas.
+    `replay=True` (default SB_REPLAY) reconstruye el landing desde el archivo raw
+    sin llamar a la API (ver `simbad.raw`); no requiere api_key.
+    `projection` ("full", "silver" o "a,b,c"; default SB_PROJECTION) descarta tras
+    row_key las columnas de la API que Silver no usa (ver `transform.PROJECTIONS`).
+    `delta=True` (default SB_DELTA) escribe además el change-set de cada período
+    respecto de su versión anterior (ver `simbad.delta`).
+    `priority` ("recent" u "oldest"; default SB_PRIORITY) fija el orden de descarga
+    y `publish=True` (default SB_PUBLISH) publica cada período en landing y emite su
+    evento en cuanto termina (ver `simbad.publish`). En layout consolidated eso
+    escribe los archivos mensuales aunque `keep_monthly=False`: el resultado lo
+    indica con `publish["monthly_files"]`.
+    """
+    replay = REPLAY if replay is None else replay
+    if not all([api_key or replay, bucket, prefix, dataset]):
+        raise ValueError("Faltan parámetros requeridos (api_key, bucket, prefix, dataset)")
+    layout = layout or LANDING_LAYOUT
+    projection = projection or PROJECTION
+    delta = DELTA if delta is None else delta
+    publish = PUBLISH if publish is None else publish
+    columns = _projection_columns(projection)
+
+    strategy = strategy or FullRange(start_year)
+    sess = harvest_session(api_key, bucket, prefix, tipo_entidad, replay, max_workers=max_workers,
+                           http_client=http_client, page_size=tuned_page_size(bucket, prefix, dataset))
+    months = strategy.periods()
+
+    log.info("=== SIMBAD harvest: tipoEntidad=%s, %s, keep_monthly=%s ===",
+             tipo_entidad, strategy.describe(), keep_monthly)
+
+    period_object = None
+    if layout == "period":
+        def period_object(periodo: str) -> str:
+            return revision_object(prefix, dataset, tipo_entidad, periodo, run_date)
+    elif keep_monthly or not finalize or publish:
+        def period_object(periodo: str) -> str:
+            return f"{prefix}/{dataset}/{MONTHLY_DIR}/periodo={periodo}/carteras_{tipo_entidad}_hipotecarios_{periodo}.csv"
+
+    # publish necesita un archivo por período: en consolidated fuerza los de monthly/
+    forced_monthly = bool(publish and layout != "period" and finalize and not keep_monthly)
+    if forced_monthly:
+        log.info("publish=True escribe los archivos mensuales aunque keep_monthly=False")
+    publisher = None
+    if publish:
+        publisher = Publisher(bucket, prefix, dataset, tipo_entidad, run_date, len(months),
+                              compact=layout == "period" and COMPACT_ON_WRITE, manifest=finalize)
+
+    all_pieces, saved_by_period = harvest_periods(
+        sess, months, tipo_entidad, bucket, period_object, max_workers=max_workers, columns=columns,
+        priority=priority, on_period=publisher
+    )
+    if layout == "period" and COMPACT_ON_WRITE and saved_by_period:
+        saved_by_period = compact_unpublished(bucket, prefix, dataset, saved_by_period, publisher)
+    saved_paths = list(saved_by_period.values())
+
+    if not all_pieces:
+        return {"saved": saved_paths, "consolidated": None, "rows": 0, "periods": [],
+                "rate": sess.limiter.stats(), "page_size": sess.page_sizer.stats()}
+
+    rows = sum(len(p) for p in all_pieces)
+    consolidated_path = None
+    if layout != "period" and finalize:
+        full = consolidate(all_pieces, columns)
+        consolidated_path = _upload_landing(
+            full, bucket, consolidated_object(prefix, dataset, tipo_entidad, run_date, months)
+        )
+
+    changes = {}
+    if delta:
+        changes = write_changesets(all_pieces, bucket, prefix, dataset, tipo_entidad, run_date,
+                                   max_workers=max(4, max_workers))
+
+    # Registrar filas por período (base del modo gap-fill)
+    entries = period_entries(all_pieces, saved_by_period)
+    for periodo, entry in entries.items():
+        entry["path"] = entry["path"] or consolidated_path
+        if periodo in changes:
+            entry["changes"] = changes[periodo]
+    if finalize:
+        update_manifest(bucket, prefix, dataset, entries, tuning=None if replay else {"page_size": sess.page_sizer.best})
+
+    staging = None
+    if bq_staging:
+        from .bq_sink import load_pieces_to_staging
+        staging = load_pieces_to_staging(all_pieces, run_date, max_workers=max(4, max_workers))
+
+    return {
+        "saved": saved_paths,
+        "consolidated": consolidated_path,
+        "rows": rows,
+        "periods": sorted(entries),
+        "from": _fmt_period(months[0]),
+        "to": _fmt_period(months[-1]),
+        "layout": layout,
+        "rate": sess.limiter.stats(),
+        "page_size": sess.page_sizer.stats(),
+        **({"replay": True} if replay else {}),
+        **({"projection": projection} if columns is not None else {}),
+        **({"changes": changes} if changes else {}),
+        **({"publish": {**publisher.stats(), **({"monthly_files": True} if forced_monthly else {})}}
+           if publisher else {}),
+        **({"bq_staging": staging} if staging else {}),
+        **({} if finalize else {"entries": entries}),
+    }
@@ -0,0 +1,259 @@
+# landing/simbad/simbad/harvester_incremental.py
+import logging
+import datetime as dt
+from typing import List, Optional
+
+from .compaction import COMPACT_ON_WRITE, LANDING_LAYOUT, PERIOD_DIR, revision_object
+from .delta import DELTA, write_changesets
+from .lock import locked_run
+from .manifest import landed_period_sizes, period_entries, tuned_page_size, update_manifest
+from .periods import ForcedPeriods, GapFill, Lookback, PeriodStrategy, _fmt_period
+from .pipeline import consolidate, harvest_periods
+from .publish import PUBLISH, Publisher, compact_unpublished
+from .raw import REPLAY, harvest_session
+from .sink import LANDING_EXTENSIONS, _storage_client, _upload_landing
+from .tracing import traced_run
+from .transform import PROJECTION, _projection_columns
+
+log = logging.getLogger("simbad.harvester_incremental")
+
+USER_AGENT = "simbad-incremental-harvester/1.0 (+cloud-run)"
+
+
+def consolidated_object(prefix: str, dataset: str, tipo_entidad: str, run_date: str, periods) -> str:
+    """Ruta del consolidado incremental de una corrida."""
+    timestamp = dt.datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    return (
+        f"{prefix}/{dataset}/incremental/dt={run_date}/"
+        f"incremental_{tipo_entidad}_hipotecarios_{len(periods)}months_{timestamp}.csv"
+    )
+
+
+def _get_latest_data_period(bucket: str, prefix: str, dataset: str) -> Optional[str]:
+    """
+    Busca en GCS cuál fue el último período cargado exitosamente.
+    Retorna YYYY-MM o None si no encuentra datos.
+    """
+    try:
+        b = _storage_client().bucket(bucket)
+
+        # Buscar archivos consolidados más recientes
+        blobs = b.list_blobs(prefix=f"{prefix}/{dataset}/")
+
+        latest_period = None
+        for blob in blobs:
+            # Layout por período: el canónico dice el período directamente
+            if f"/{PERIOD_DIR}/periodo=" in blob.name and "/_rev/" not in blob.name:
+                period = blob.name.split(f"/{PERIOD_DIR}/periodo=")[1][:7]
+                if not latest_period or period > latest_period:
+                    latest_period = period
+                continue
+            # Buscar archivos que contengan "consolidado" y extraer período
+            if "consolidado" in blob.name and blob.name.endswith(tuple(LANDING_EXTENSIONS.values())):
+                # Extraer fecha del path dt=YYYY-MM-DD
+                parts = blob.name.split("/")
+                for part in parts:
+                    if part.startswith("dt="):
+                        date_str = part[3:]  # Remover "dt="
+                        period = date_str[:7]  # YYYY-MM-DD -> YYYY-MM
+                        if not latest_period or period > latest_period:
+                            latest_period = period
+
+        return latest_period
+
+    except Exception as e:
+        log.warning("Error al buscar último período en GCS: %s", str(e))
+        return None
+
+
+def select_strategy(bucket: str, prefix: str, dataset: str, lookback_months: int = 3,
+                    force_periods: Optional[List[str]] = None, mode: str = "lookback",
+                    start_year: int = 2012) -> PeriodStrategy:
+    """Estrategia de períodos del incremental: forzados, gap-fill (según manifest) o lookback."""
+    if force_periods:
+        return ForcedPeriods(force_periods)
+    if mode == "gaps":
+        return GapFill(start_year, landed_period_sizes(bucket, prefix, dataset))
+    return Lookback(lookback_months)
+
+
+@traced_run("run_incremental_harvest")
+@locked_run
+def run_incremental_harvest(
+    api_key: str,
+    tipo_entidad: str,
+    bucket: str,
+    prefix: str,
+    dataset: str,
+    run_date: str,
+    lookback_months: int = 3,
+    force_periods: Optional[List[str]] = None,
+    strategy: Optional[PeriodStrategy] = None,
+    mode: str = "lookback",
+    start_year: int = 2012,
+    max_workers: int = 1,
+    http_client: str = "requests",
+    bq_staging: bool = False,
+    layout: Optional[str] = None,
+    finalize: bool = True,
+    replay: Optional[bool] = None,
+    projection: Optional[str] = None,
+    delta: Optional[bool] = None,
+    priority: Optional[str] = None,
+    publish: Optional[bool] = None,
+) -> dict:
+    """
+    Carga incremental inteligente de SIMBAD.
+
+    Args:
+        api_key: Clave API de SIMBAD
+        tipo_entidad: Tipo de entidad (AAyP, etc.)
+        bucket: Bucket de GCS
+        prefix: Prefijo en GCS
+        dataset: Nombre del dataset
+        run_date: Fecha de ejecución (YYYY-MM-DD)
+        lookback_months: Cuántos meses hacia atrás revisar (default: 3)
+        force_periods: Lista de períodos específicos a cargar (YYYY-MM)
+        strategy: Estrategia de períodos explícita (tiene prioridad sobre los anteriores)
+        mode: "lookback" (default) o "gaps": solo meses faltantes o sospechosamente
+              pequeños desde start_year según el manifest de landing
+        start_year: Año inicial esperado para el modo "gaps"
+        max_workers: Períodos descargados en paralelo
+        http_client: "requests" (hilos) o "async" (httpx/HTTP2 en un event loop)
+        bq_staging: Cargar también las filas tipadas al staging BigQuery por periodo_date
+        layout: "consolidated" o "period" (default SB_LANDING_LAYOUT): un objeto canónico
+                por período, sin consolidado por corrida (ver `simbad.compaction`)
+        finalize: False en tareas de un job con shards: sin consolidado ni manifest,
+                  devuelve `entries` para `simbad.sharding.finalize`
+        replay: Reconstruir desde el archivo raw sin llamar a la API (default
+                SB_REPLAY; ver `simbad.raw`); no requiere api_key
+        projection: Columnas de la API a conservar: "full", "silver" o "a,b,c"
+                    (default SB_PROJECTION; ver `transform.PROJECTIONS`)
+        delta: Escribir además el change-set I/U/D de cada período respecto de su
+               versión anterior (default SB_DELTA; ver `simbad.delta`)
+        priority: Orden de descarga: "recent" u "oldest" (default SB_PRIORITY)
+        publish: Publicar cada período y emitir su evento en cuanto termina
+                 (default SB_PUBLISH; ver `simbad.publish`)
+
+    Returns:
+        Dict con resultados de la carga
+    """
+    replay = REPLAY if replay is None else replay
+    if not all([api_key or replay, bucket, prefix, dataset]):
+        raise ValueError("Faltan parámetros requeridos")
+
+    if mode not in ("lookback", "gaps"):
+        raise ValueError(f"mode inválido: {mode} (lookback | gaps)")
+    layout = layout or LANDING_LAYOUT
+    projection = projection or PROJECTION
+    delta = DELTA if delta is None else delta
+    publish = PUBLISH if publish is None else publish
+    columns = _projection_columns(projection)
+
+    sess = harvest_session(api_key, bucket, prefix, tipo_entidad, replay, user_agent=USER_AGENT,
+                           max_workers=max_workers, http_client=http_client,
+                           page_size=tuned_page_size(bucket, prefix, dataset))
+
+    # Determinar qué períodos cargar
+    if strategy is None:
+        strategy = select_strategy(bucket, prefix, dataset, lookback_months, force_periods, mode, start_year)
+
+    periods_to_load = strategy.periods()
+    if isinstance(strategy, Lookback):
+        # Carga inteligente: últimos N meses
+        last_loaded = _get_latest_data_period(bucket, prefix, dataset)
+        log.info("=== SIMBAD INCREMENTAL: Último período en GCS: %s ===", last_loaded or "Ninguno")
+        log.info("=== Cargando últimos %d meses: %s ===",
+                 strategy.months, [_fmt_period(p) for p in periods_to_load])
+    else:
+        log.info("=== SIMBAD INCREMENTAL: %s → %s ===",
+                 strategy.describe(), [_fmt_period(p) for p in periods_to_load])
+
+    # Guardar archivo individual por período
+    def period_object(periodo: str) -> str:
+        if layout == "period":
+            return revision_object(prefix, dataset, tipo_entidad, periodo, run_date)
+        return f"{prefix}/{dataset}/incremental/periodo={periodo}/carteras_{tipo_entidad}_hipotecarios_{periodo}.csv"
+
+    if not periods_to_load:
+        log.info("=== SIMBAD INCREMENTAL: nada que cargar ===")
+        return {
+            "type": "incremental",
+            "saved": [],
+            "consolidated": None,
+            "rows": 0,
+            "periods_loaded": 0,
+            "periods": [],
+            **strategy.describe(),
+        }
+
+    publisher = None
+    if publish:
+        publisher = Publisher(bucket, prefix, dataset, tipo_entidad, run_date, len(periods_to_load),
+                              compact=layout == "period" and COMPACT_ON_WRITE, manifest=finalize)
+
+    all_pieces, saved_by_period = harvest_periods(
+        sess, periods_to_load, tipo_entidad, bucket, period_object,
+        label="incremental", max_workers=max_workers, columns=columns, priority=priority, on_period=publisher
+    )
+    if layout == "period" and COMPACT_ON_WRITE and saved_by_period:
+        saved_by_period = compact_unpublished(bucket, prefix, dataset, saved_by_period, publisher)
+    saved_paths = list(saved_by_period.values())
+    changes = {}
+    if delta and all_pieces:
+        changes = write_changesets(all_pieces, bucket, prefix, dataset, tipo_entidad, run_date,
+                                   max_workers=max(4, max_workers))
+    entries = period_entries(all_pieces, saved_by_period)
+    for periodo, change in changes.items():
+        entries[periodo]["changes"] = change
+    if finalize:
+        update_manifest(bucket, prefix, dataset, entries, tuning=None if replay else {"page_size": sess.page_sizer.best})
+
+    if not all_pieces:
+        return {
+            "type": "incremental",
+            "saved": saved_paths,
+            "consolidated": None,
+            "rows": 0,
+            "periods_loaded": 0,
+            "periods": [],
+            "rate": sess.limiter.stats(),
+            "page_size": sess.page_sizer.stats(),
+            **({} if finalize else {"entries": {}}),
+        }
+
+    rows = sum(len(p) for p in all_pieces)
+    consolidated_path = None
+    if layout != "period" and finalize:
+        # Crear consolidado incremental (mismo orden de columnas que el histórico)
+        full = consolidate(all_pieces, columns)
+        consolidated_path = _upload_landing(
+            full, bucket, consolidated_object(prefix, dataset, tipo_entidad, run_date, periods_to_load)
+        )
+
+    staging = None
+    if bq_staging:
+        from .bq_sink import load_pieces_to_staging
+        staging = load_pieces_to_staging(all_pieces, run_date, max_workers=max(4, max_workers))
+
+    return {
+        "type": "incremental",
+        "saved": saved_paths,
+        "consolidated": consolidated_path,
+        "rows": rows,
+        "periods_loaded": len(periods_to_load),
+        "periods": sorted(entries),
+        "from": _fmt_period(periods_to_load[0]),
+        "to": _fmt_period(periods_to_load[-1]),
+        "lookback_months": lookback_months,
+        "layout": layout,
+        "rate": sess.limiter.stats(),
+        "page_size": sess.page_sizer.stats(),
+        **({"replay": True} if replay else {}),
+        **({"projection": projection} if columns is not None else {}),
+        **({"changes": changes} if changes else {}),
+        **({"publish": publisher.stats()} if publisher else {}),
+        **strategy.describe(),
+        **({"bq_staging": staging} if staging else {}),
+        **({} if finalize else {"entries": entries}),
+    }
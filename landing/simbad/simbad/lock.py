@@ -0,0 +1,147 @@
+# landing/simbad/simbad/lock.py
+"""
+Lock de corrida por dataset (lease): a lo sumo un harvest por dataset a la vez.
+
+    gs://{bucket}/{prefix}/{dataset}/_lock.json
+    {"owner": "...", "host": "...", "pid": 1, "acquired": "...", "expires": 1718000000.0, "ttl": 300}
+
+Con SB_LOCK_URI (`gs://bucket/prefijo` o un directorio local, p. ej. para pruebas)
+el lock vive en `{uri}/{prefix}/{dataset}/_lock.json`.
+
+Cada escritura es una comparación-e-intercambio sobre la generación leída
+(`if_generation_match` en GCS; generación guardada en el propio archivo, bajo
+`flock`, en local): crear solo si no existe, tomar uno vencido o renovar el propio.
+Mientras corre, un hilo renueva `expires` cada TTL/3 (SB_LOCK_TTL, default 300 s);
+si el proceso muere el lease vence solo. Una invocación duplicada (reintento de
+Cloud Scheduler, `/run/force-periods` manual, otra ejecución del job) no espera:
+el harvester devuelve `{"skipped": "locked", "lock": {...}}` enseguida.
+
+Si el lease se pierde a mitad de corrida (no se pudo renovar, o venció y otro lo
+tomó) la corrida se aborta: `ensure_lease` lanza `LeaseLost` antes de cada archivo
+de landing, compactación y escritura del manifest (ver `sink._upload_landing`,
+`compaction.compact_periods`, `manifest.update_manifest`), así nunca escriben dos
+corridas del mismo dataset a la vez.
+
+Las tareas de un Cloud Run Job con shards comparten el lease de su ejecución
+(`owner=execution:...`); lo libera la tarea que finaliza (ver `simbad.sharding`).
+"""
+import os
+import json
+import fcntl
+import inspect
+import logging
+import pathlib
+import functools
+from contextlib import contextmanager
+from typing import Callable, Optional, Tuple
+
+# Lease, backend GCS y ensure_lease viven en gcs_common (los comparte el servicio de macro)
+from .gcs_common import GcsLeaseBackend, Lease, LeaseLost, ensure_lease  # noqa: F401
+
+log = logging.getLogger("simbad.lock")
+
+RUN_LOCK = os.getenv("SB_RUN_LOCK", "true").lower() == "true"
+LOCK_TTL = float(os.getenv("SB_LOCK_TTL", "300"))
+LOCK_URI = os.getenv("SB_LOCK_URI", "")
+LOCK_NAME = "_lock.json"
+
+
+class _FileBackend:
+    """Lock como archivo local (pruebas, un solo host); la generación va en el archivo."""
+
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    @contextmanager
+    def _guard(self):
+        with open(f"{self.path}.guard", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read(self) -> Optional[Tuple[dict, int]]:
+        try:
+            data = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return None
+        return data, data.pop("_generation")
+
+    def read(self) -> Optional[Tuple[dict, int]]:
+        with self._guard():
+            return self._read()
+
+    def write(self, record: dict, generation: int) -> bool:
+        with self._guard():
+            current = self._read()
+            if (current[1] if current else 0) != generation:
+                return False
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({**record, "_generation": generation + 1}))
+            os.replace(tmp, self.path)
+            return True
+
+    def delete(self, generation: int) -> bool:
+        with self._guard():
+            current = self._read()
+            if current is None or current[1] != generation:
+                return False
+            self.path.unlink()
+            return True
+
+
+def _backend(bucket: str, prefix: str, dataset: str):
+    root = LOCK_URI.rstrip("/") + f"/{prefix}/{dataset}" if LOCK_URI else f"gs://{bucket}/{prefix}/{dataset}"
+    if root.startswith("gs://"):
+        from .sink import _storage_client  # sink importa este módulo
+        lock_bucket, _, path = root[5:].partition("/")
+        return GcsLeaseBackend(_storage_client().bucket(lock_bucket), f"{path}/{LOCK_NAME}")
+    return _FileBackend(pathlib.Path(root) / LOCK_NAME)
+
+
+class RunLease(Lease):
+    """Lease sobre el lock de un dataset. `acquire` no bloquea; `heartbeat` lo renueva."""
+    thread_name = "simbad-lock"
+
+    def __init__(self, bucket: str, prefix: str, dataset: str, owner: Optional[str] = None,
+                 ttl: float = LOCK_TTL):
+        super().__init__(_backend(bucket, prefix, dataset), owner=owner, ttl=ttl)
+
+
+def locked_result(lease: RunLease) -> dict:
+    """Resultado de una invocación duplicada (forma mínima de un resultado de harvest)."""
+    holder = {k: lease.holder.get(k) for k in ("owner", "host", "acquired", "expires")} if lease.holder else None
+    return {"skipped": "locked", "lock": holder, "saved": [], "consolidated": None, "rows": 0, "periods": []}
+
+
+def locked_run(fn: Callable) -> Callable:
+    """
+    Decorador de harvesters: toma el lease del dataset (`bucket`/`prefix`/`dataset`)
+    durante la corrida. Si se pierde, las escrituras lanzan `LeaseLost` y la corrida
+    falla. Con `finalize=False` (tareas con shards) no hace nada: el lease lo tiene
+    `sharding.run_shard`.
+    """
+    sig = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        bound = sig.bind(*args, **kwargs)
+        bound.apply_defaults()
+        a = bound.arguments
+        if not RUN_LOCK or not a.get("finalize", True) or not all(a.get(k) for k in ("bucket", "prefix", "dataset")):
+            return fn(*args, **kwargs)
+
+        lease = RunLease(a["bucket"], a["prefix"], a["dataset"], ttl=LOCK_TTL)
+        if not lease.acquire():
+            log.warning("[LOCK] %s/%s ya tiene una corrida en curso (%s); se omite",
+                        a["prefix"], a["dataset"], (lease.holder or {}).get("owner"))
+            return locked_result(lease)
+        try:
+            with lease.heartbeat():
+                return fn(*args, **kwargs)
+        finally:
+            lease.release()
+
+    return wrapper
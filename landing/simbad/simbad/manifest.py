@@ -0,0 +1,131 @@
+# landing/simbad/simbad/manifest.py
+"""
+Manifest de landing por dataset: qué períodos se han escrito y con cuántas filas.
+
+    gs://<bucket>/<prefix>/<dataset>/_manifest.json
+    {"dataset": "...", "periods": {"2024-01": {"rows": 5120, "path": "gs://...", "updated": "..."}},
+     "tuning": {"page_size": 15000}}
+
+Lo usan el modo gap-fill (para detectar meses faltantes o sospechosamente
+pequeños) y los harvesters (para registrar lo que acaban de escribir y arrancar
+con el tamaño de página que mejor funcionó en la corrida anterior).
+"""
+import re
+import json
+import logging
+import datetime as dt
+from typing import Dict, Optional, Tuple
+
+from google.api_core.exceptions import NotFound, PreconditionFailed
+
+from .lock import ensure_lease
+from .sink import LANDING_EXTENSIONS, _storage_client
+from .tracing import span
+
+log = logging.getLogger("simbad.manifest")
+
+MANIFEST_NAME = "_manifest.json"
+_PRECONDITION_RETRIES = 5
+_PERIODO_RE = re.compile(r"periodo=(\d{4}-\d{2})/")
+
+
+def _manifest_object(prefix: str, dataset: str) -> str:
+    return f"{prefix}/{dataset}/{MANIFEST_NAME}"
+
+
+def _read(bucket: str, prefix: str, dataset: str) -> Tuple[dict, int]:
+    """
+    (manifest, generación leída). Solo un objeto inexistente cuenta como manifest
+    vacío (generación 0); un JSON corrupto o un error de GCS se propagan: tratarlos
+    como vacío haría que la siguiente escritura borrara todos los períodos.
+    """
+    b = _storage_client().bucket(bucket)
+    name = _manifest_object(prefix, dataset)
+    blob = b.get_blob(name)
+    if blob is None:
+        return {"dataset": dataset, "periods": {}}, 0
+    try:
+        text = blob.download_as_text()
+    except NotFound:
+        return {"dataset": dataset, "periods": {}}, 0
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        raise ValueError(f"Manifest corrupto en gs://{bucket}/{name}: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError(f"Manifest corrupto en gs://{bucket}/{name}: no es un objeto JSON")
+    data.setdefault("periods", {})
+    return data, int(blob.generation or 0)
+
+
+def load_manifest(bucket: str, prefix: str, dataset: str) -> dict:
+    """Lee el manifest; uno vacío si no existe. Si está corrupto o GCS falla, lanza."""
+    return _read(bucket, prefix, dataset)[0]
+
+
+def update_manifest(bucket: str, prefix: str, dataset: str, entries: Dict[str, dict],
+                    tuning: Optional[dict] = None) -> dict:
+    """
+    Fusiona `entries` ({periodo: {"rows":..., "path":...}}) y `tuning` (parámetros
+    aprendidos por la corrida, p. ej. `page_size`) en el manifest y lo reescribe.
+    La escritura lleva `if_generation_match` de la generación leída: si otro
+    escritor lo cambió entre medio se vuelve a leer y fusionar.
+    """
+    if not entries and not tuning:
+        return load_manifest(bucket, prefix, dataset)
+    ensure_lease()
+    blob = _storage_client().bucket(bucket).blob(_manifest_object(prefix, dataset))
+    for attempt in range(_PRECONDITION_RETRIES):
+        manifest, generation = _read(bucket, prefix, dataset)
+        now = dt.datetime.utcnow().isoformat(timespec="seconds") + "Z"
+        for periodo, entry in entries.items():
+            manifest["periods"][periodo] = {**entry, "updated": now}
+        if tuning:
+            manifest["tuning"] = {**manifest.get("tuning", {}), **tuning}
+        manifest["dataset"] = dataset
+        manifest["updated"] = now
+
+        data = json.dumps(manifest, sort_keys=True, indent=1)
+        try:
+            with span("manifest", bytes=len(data)):
+                blob.upload_from_string(data, content_type="application/json", if_generation_match=generation)
+            break
+        except PreconditionFailed:
+            if attempt == _PRECONDITION_RETRIES - 1:
+                raise
+            log.info("[MANIFEST] %s cambió durante la actualización; se vuelve a leer", blob.name)
+    log.info("[MANIFEST] %s (%d períodos)", blob.name, len(manifest["periods"]))
+    return manifest
+
+
+def tuned_page_size(bucket: str, prefix: str, dataset: str) -> Optional[int]:
+    """Tamaño de página recordado por la última corrida (None si no hay)."""
+    size = load_manifest(bucket, prefix, dataset).get("tuning", {}).get("page_size")
+    return int(size) if size else None
+
+
+def period_entries(pieces, paths: Dict[str, str]) -> Dict[str, dict]:
+    """Entradas de manifest a partir de las piezas por período y sus rutas escritas."""
+    entries = {}
+    for df in pieces:
+        periodo = str(df["__periodo"].iloc[0])
+        entries[periodo] = {"rows": int(len(df)), "path": paths.get(periodo)}
+    return entries
+
+
+def landed_period_sizes(bucket: str, prefix: str, dataset: str) -> Dict[str, int]:
+    """
+    {periodo: tamaño} de lo ya aterrizado. Usa filas del manifest; si no hay
+    manifest (datasets anteriores a él), cae a los bytes de los archivos por período.
+    """
+    manifest = load_manifest(bucket, prefix, dataset)
+    if manifest["periods"]:
+        return {p: int(e.get("rows") or 0) for p, e in manifest["periods"].items()}
+
+    log.info("Sin manifest para %s; usando tamaño de archivos periodo=YYYY-MM", dataset)
+    sizes: Dict[str, int] = {}
+    for blob in _storage_client().bucket(bucket).list_blobs(prefix=f"{prefix}/{dataset}/"):
+        m = _PERIODO_RE.search(blob.name)
+        if m and blob.name.endswith(tuple(LANDING_EXTENSIONS.values())):
+            sizes[m.group(1)] = max(sizes.get(m.group(1), 0), int(blob.size or 0))
+    return sizes
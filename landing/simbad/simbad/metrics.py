@@ -0,0 +1,80 @@
+# landing/simbad/simbad/metrics.py
+"""
+Métricas Prometheus de los servicios harvester (endpoint `/metrics`).
+
+Se alimentan de los spans de `simbad.tracing`: importar este módulo registra un
+listener, así que la librería no depende de prometheus_client salvo en los
+servicios que exponen `/metrics`. Todas las series llevan `dataset` y
+`tipo_entidad` de la corrida. Con un solo worker uvicorn por contenedor (como en
+los Dockerfile) el registro en proceso es suficiente.
+"""
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+
+from .ratelimit import THROTTLE_STATUS
+from .tracing import add_listener
+
+LABELS = ("dataset", "tipo_entidad")
+
+API_LATENCY = Histogram(
+    "simbad_api_request_seconds", "Latencia de cada request a la API SIMBAD", LABELS,
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+API_RETRIES = Counter(
+    "simbad_api_retries_total", "Respuestas que obligan a reintentar (throttled = 429/503)",
+    LABELS + ("reason",),
+)
+PAGES_PER_PERIOD = Histogram(
+    "simbad_pages_per_period", "Páginas descargadas por período con datos", LABELS,
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34),
+)
+ROWS_PER_SECOND = Histogram(
+    "simbad_run_rows_per_second", "Filas de landing por segundo de corrida", LABELS,
+    buckets=(100, 500, 1_000, 2_500, 5_000, 10_000, 25_000, 50_000),
+)
+UPLOAD_THROUGHPUT = Histogram(
+    "simbad_upload_bytes_per_second", "Throughput de cada subida a GCS", LABELS,
+    buckets=(1e5, 5e5, 1e6, 5e6, 1e7, 5e7, 1e8),
+)
+PUBLISH_LATENCY = Histogram(
+    "simbad_period_publish_seconds", "Segundos desde el inicio de la corrida hasta publicar cada período", LABELS,
+    buckets=(5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600),
+)
+RUN_DURATION = Histogram(
+    "simbad_run_duration_seconds", "Duración de la corrida completa", LABELS + ("run",),
+    buckets=(10, 30, 60, 120, 300, 600, 1200, 1800, 3600),
+)
+
+
+def _retry_reason(status) -> str:
+    if status is None:
+        return "transport"
+    if status in THROTTLE_STATUS:
+        return "throttled"
+    return "server_error" if status >= 500 else ""
+
+
+def _observe(name: str, seconds: float, attrs: dict, labels: dict) -> None:
+    lv = (labels.get("dataset", ""), labels.get("tipo_entidad", ""))
+    if name == "http.request":
+        API_LATENCY.labels(*lv).observe(seconds)
+        reason = _retry_reason(attrs.get("status"))
+        if reason:
+            API_RETRIES.labels(*lv, reason).inc()
+    elif name == "concat":
+        PAGES_PER_PERIOD.labels(*lv).observe(attrs.get("pages") or 0)
+    elif name == "upload" and seconds > 0:
+        UPLOAD_THROUGHPUT.labels(*lv).observe((attrs.get("bytes") or 0) / seconds)
+    elif name == "publish" and attrs.get("since_start") is not None:
+        PUBLISH_LATENCY.labels(*lv).observe(attrs["since_start"])
+    elif attrs.get("root"):
+        RUN_DURATION.labels(*lv, name).observe(seconds)
+        if seconds > 0:
+            ROWS_PER_SECOND.labels(*lv).observe((attrs.get("rows") or 0) / seconds)
+
+
+add_listener(_observe)
+
+
+def render() -> tuple:
+    """(cuerpo, content-type) para la respuesta de `/metrics`."""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,233 @@
+# landing/simbad/simbad/orchestrator.py
+"""
+Orquestación BigQuery posterior a un harvest.
+
+`sp_full_pipeline_refresh` y `sp_process_landing_to_silver_incremental`
+descubren el trabajo escaneando todo `simbad_landing_csv_ext`. Aquí el dict de
+resultado del harvester ya dice qué se escribió, así que solo se procesa eso:
+
+    1. load job de los CSV exactos de la corrida → bronze.simbad_landing_batch
+    2. CALL bronze.sp_process_landing_batch_to_silver(periodos, dt_captura)
+    3. CALL silver_clean.sp_process_silver_to_gold_periods(periodos)
+
+El load job no factura bytes escaneados y los SP solo tocan los períodos del lote.
+El staging es una tabla por proyecto: una corrida a la vez.
+
+Si la corrida usó el sink directo (`bq_staging`, ver `simbad.bq_sink`) las filas
+ya están tipadas en `bronze.simbad_silver_staging` y los pasos 1-2 se sustituyen por
+`CALL bronze.sp_promote_staging_to_silver(periodos)`, que solo lee esas particiones.
+
+Con change-sets (`changes`, ver `simbad.delta`) los períodos que ya tenían versión
+anterior no pasan por 1-2: sus change-sets se cargan en `bronze.simbad_landing_changes`
+y `CALL bronze.sp_apply_landing_changes_to_silver(periodos, dt_captura)` aplica solo
+esas filas; los períodos sin cambios no tocan Silver ni Gold. Cuando los SP terminan
+se promueven los estados pendientes (`state`) de los períodos procesados; si algo falla
+quedan pendientes y la próxima corrida compara contra lo último aplicado.
+
+Uso manual (con el JSON que imprime el runner o devuelve /run):
+    python -m simbad.orchestrator --result resultado.json --run-date 2025-07-15
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import datetime as dt
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from google.cloud import bigquery
+
+from .delta import CHANGE_COLUMNS, promote_states
+from .periods import _fmt_period, _month_iter, _parse_period
+from .transform import DERIVED_COLUMNS, PREFERRED_COLUMNS, ROW_KEY
+
+log = logging.getLogger("simbad.orchestrator")
+
+BQ_PROJECT = os.getenv("BQ_PROJECT", "proyecto-integrador-dae-2025")
+BATCH_TABLE = "bronze.simbad_landing_batch"
+CHANGES_TABLE = "bronze.simbad_landing_changes"
+SP_SILVER = "bronze.sp_process_landing_batch_to_silver"
+SP_PROMOTE = "bronze.sp_promote_staging_to_silver"
+SP_CHANGES = "bronze.sp_apply_landing_changes_to_silver"
+SP_GOLD = "silver_clean.sp_process_silver_to_gold_periods"
+
+
+@lru_cache(maxsize=None)
+def _bq_client(project: str) -> bigquery.Client:
+    return bigquery.Client(project=project)
+
+
+def affected_from_result(result: dict) -> Tuple[List[str], List[str]]:
+    """
+    (uris, periodos) a partir del resultado de `run_harvest` / `run_incremental_harvest`.
+
+    El consolidado ya contiene todos los períodos de la corrida; si no existe se
+    usan los CSV por período. Resultados sin `periods` caen al rango from→to.
+    """
+    consolidated = result.get("consolidated")
+    uris = [consolidated] if consolidated else list(result.get("saved") or [])
+
+    periodos = sorted(set(result.get("periods") or []))
+    if not periodos and result.get("from") and result.get("to"):
+        start, end = _parse_period(result["from"]), _parse_period(result["to"])
+        periodos = [_fmt_period(p) for p in _month_iter(start[0], dt.date(end[0], end[1], 1)) if p >= start]
+    return uris, periodos
+
+
+def changes_from_result(result: dict) -> Tuple[List[str], List[str], List[str]]:
+    """
+    (uris, periodos con cambios, periodos sin cambios) de los change-sets del
+    resultado. Los períodos `base` (sin versión anterior) no cuentan: van por el lote completo.
+    """
+    changes = {p: c for p, c in (result.get("changes") or {}).items() if not c.get("base")}
+    changed = sorted(p for p, c in changes.items() if c.get("path"))
+    unchanged = sorted(p for p, c in changes.items() if not c.get("path"))
+    return [changes[p]["path"] for p in changed], changed, unchanged
+
+
+def pending_states(result: dict, periodos: List[str]) -> List[str]:
+    """Estados pendientes (ver `simbad.delta`) de `periodos` en el resultado."""
+    changes = result.get("changes") or {}
+    return [changes[p]["state"] for p in periodos if (changes.get(p) or {}).get("state")]
+
+
+def _period_uris(uris: List[str], periodos: List[str]) -> List[str]:
+    """Archivos que pueden contener `periodos` (los consolidados, sin `periodo=`, siempre)."""
+    return [u for u in uris if "periodo=" not in u or any(f"periodo={p}/" in u for p in periodos)]
+
+
+def _load_batch(client: bigquery.Client, uris: List[str], table: str,
+                columns: Optional[List[str]] = None) -> bigquery.LoadJob:
+    """
+    Carga los archivos de landing (o change-sets, con `columns`) al staging. CSV:
+    todo STRING, como la external table. Parquet: con sus tipos (medidas FLOAT64),
+    sin volver a parsear texto.
+    """
+    if all(u.endswith(".parquet") for u in uris):
+        job_config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.PARQUET,
+            write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+        )
+    elif all(u.endswith(".csv") for u in uris):
+        job_config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.CSV,
+            skip_leading_rows=1,
+            schema=[bigquery.SchemaField(c, "STRING")
+                    for c in columns or PREFERRED_COLUMNS + [ROW_KEY] + DERIVED_COLUMNS],
+            write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+            allow_jagged_rows=True,
+            ignore_unknown_values=True,
+        )
+    else:
+        raise ValueError("El lote debe ser solo CSV o solo Parquet (BigQuery no carga Arrow IPC): "
+                         f"{uris}")
+    job = client.load_table_from_uri(uris, table, job_config=job_config)
+    job.result()
+    log.info("[BQ] load %s ← %d archivo(s), %s filas", table, len(uris), job.output_rows)
+    return job
+
+
+def _period_dates(periodos: List[str]) -> bigquery.ArrayQueryParameter:
+    return bigquery.ArrayQueryParameter("periodos", "DATE", [dt.date(*_parse_period(p), 1) for p in periodos])
+
+
+def _call(client: bigquery.Client, sql: str, params: list) -> bigquery.QueryJob:
+    job = client.query(sql, job_config=bigquery.QueryJobConfig(query_parameters=params))
+    job.result()
+    log.info("[BQ] %s (%s bytes procesados)", sql, job.total_bytes_processed)
+    return job
+
+
+def refresh_affected(result: dict, run_date: str, project: Optional[str] = None,
+                     client: Optional[bigquery.Client] = None) -> dict:
+    """Procesa en Silver y Gold solo los archivos/períodos (o change-sets) de un resultado de harvest."""
+    staging = (result.get("bq_staging") or {}).get("periods") and result["bq_staging"]
+    uris, periodos = affected_from_result(result)
+    change_uris, changed, unchanged = [], [], []
+    if staging:
+        uris, periodos = [], staging["periods"]
+    else:
+        # Los períodos con change-set (o sin cambios) no recargan su archivo completo
+        change_uris, changed, unchanged = changes_from_result(result)
+        periodos = [p for p in periodos if p not in changed and p not in unchanged]
+        uris = _period_uris(uris, periodos) if periodos else []
+    full = periodos if uris or staging else []
+    if not full and not change_uris:
+        log.info("[BQ] Nada que procesar (sin archivos, cambios o períodos nuevos)")
+        return {"skipped": True, "files": uris, "periods": periodos,
+                **({"unchanged": unchanged} if unchanged else {})}
+
+    project = project or BQ_PROJECT
+    client = client or _bq_client(project)
+    t0 = time.perf_counter()
+    dt_captura = bigquery.ScalarQueryParameter("dt_captura", "DATE", dt.date.fromisoformat(run_date))
+    affected = sorted(set(full) | set(changed))
+
+    load = changes_load = None
+    queries = []
+    if staging:
+        queries.append(_call(client, f"CALL `{project}.{SP_PROMOTE}`(@periodos)", [_period_dates(full)]))
+    elif full:
+        load = _load_batch(client, uris, f"{project}.{BATCH_TABLE}")
+        queries.append(_call(client, f"CALL `{project}.{SP_SILVER}`(@periodos, @dt_captura)", [
+            bigquery.ArrayQueryParameter("periodos", "STRING", full), dt_captura,
+        ]))
+    if change_uris:
+        changes_load = _load_batch(client, change_uris, f"{project}.{CHANGES_TABLE}", CHANGE_COLUMNS)
+        queries.append(_call(client, f"CALL `{project}.{SP_CHANGES}`(@periodos, @dt_captura)", [
+            bigquery.ArrayQueryParameter("periodos", "STRING", changed), dt_captura,
+        ]))
+    queries.append(_call(client, f"CALL `{project}.{SP_GOLD}`(@periodos)", [_period_dates(affected)]))
+    # Silver ya tiene esta versión: el próximo diff parte de ella
+    promoted = promote_states(pending_states(result, affected))
+
+    return {
+        "source": "staging" if staging else "files",
+        "files": uris,
+        "periods": affected,
+        "batch_rows": staging.get("rows") if staging else (load.output_rows if load else 0),
+        **({"changes": {"files": change_uris, "periods": changed, "unchanged": unchanged,
+                        "rows": changes_load.output_rows if changes_load else 0}}
+           if change_uris or unchanged else {}),
+        **({"states_promoted": len(promoted)} if promoted else {}),
+        "bytes_processed": sum(q.total_bytes_processed or 0 for q in queries),
+        "jobs": [j.job_id for j in (load, changes_load) if j] + [q.job_id for q in queries],
+        "seconds": round(time.perf_counter() - t0, 2),
+    }
+
+
+def refresh_if_enabled(result: dict, run_date: str) -> Optional[dict]:
+    """
+    Ejecuta `refresh_affected` si BQ_REFRESH=true. Un fallo aquí no invalida
+    el landing ya escrito: se registra y se devuelve en el resultado.
+    """
+    if os.getenv("BQ_REFRESH", "false").lower() != "true":
+        return None
+    try:
+        return refresh_affected(result, run_date)
+    except Exception as e:
+        log.exception("Refresh BigQuery falló")
+        return {"error": str(e)}
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Procesa en BigQuery solo lo aterrizado por un harvest")
+    ap.add_argument("--result", required=True, help="JSON con el resultado del harvester ('-' = stdin)")
+    ap.add_argument("--run-date", default=dt.date.today().isoformat())
+    ap.add_argument("--project", default=BQ_PROJECT)
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.result == "-":
+        result = json.load(sys.stdin)
+    else:
+        with open(args.result, encoding="utf-8") as f:
+            result = json.load(f)
+    print(json.dumps(refresh_affected(result, args.run_date, project=args.project), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
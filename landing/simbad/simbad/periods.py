@@ -0,0 +1,205 @@
+# landing/simbad/simbad/periods.py
+"""
+Estrategias de selección de períodos (YYYY, MM) para el harvester SIMBAD.
+
+Cada estrategia solo decide QUÉ meses descargar; el fetch/filtro/escritura
+es compartido en `simbad.pipeline`, que las procesa en el orden de
+`prioritize` (SB_PRIORITY: `oldest`, default, cronológico; `recent`, del más
+reciente al más antiguo). Las estrategias siempre devuelven orden cronológico.
+"""
+import os
+import datetime as dt
+from statistics import median
+from typing import Dict, List, Optional, Tuple
+
+Period = Tuple[int, int]
+
+PRIORITY = os.getenv("SB_PRIORITY", "oldest").lower()
+PRIORITIES = ("recent", "oldest")
+
+
+def _fmt_period(p: Period) -> str:
+    return f"{p[0]:04d}-{p[1]:02d}"
+
+
+def _parse_period(s: str) -> Period:
+    """'YYYY-MM' → (YYYY, MM). Lanza ValueError si el formato no es válido."""
+    s = str(s).strip()
+    if len(s) < 7 or s[4] != "-":
+        raise ValueError(f"Período inválido (se espera YYYY-MM): {s}")
+    y, m = int(s[:4]), int(s[5:7])
+    if not 1 <= m <= 12:
+        raise ValueError(f"Mes inválido en período: {s}")
+    return (y, m)
+
+
+def prioritize(periods: List[Period], priority: Optional[str] = None) -> List[Period]:
+    """Orden de trabajo: `oldest` (default SB_PRIORITY) cronológico, `recent` primero lo último."""
+    priority = (priority or PRIORITY).lower()
+    if priority not in PRIORITIES:
+        raise ValueError(f"priority inválida: {priority} (recent | oldest)")
+    return sorted(periods, reverse=priority == "recent")
+
+
+def _month_iter(start_year: int, today: Optional[dt.date] = None) -> List[Period]:
+    """Devuelve [(YYYY, MM), ...] desde start_year-01 hasta el mes actual."""
+    today = today or dt.date.today()
+    months = []
+    y, m = start_year, 1
+    while (y < today.year) or (y == today.year and m <= today.month):
+        months.append((y, m))
+        if m == 12:
+            y += 1
+            m = 1
+        else:
+            m += 1
+    return months
+
+
+def _get_last_available_periods(lookback_months: int = 3, today: Optional[dt.date] = None) -> List[Period]:
+    """
+    Devuelve los últimos N meses incluyendo el actual.
+    Por defecto 3 meses para asegurar que capturamos datos nuevos/actualizados.
+    """
+    today = today or dt.date.today()
+    months = []
+
+    # Empezar desde hace lookback_months
+    current_date = today.replace(day=1)  # Primer día del mes actual
+
+    for i in range(lookback_months):
+        if i > 0:
+            # Retroceder un mes
+            if current_date.month == 1:
+                current_date = current_date.replace(year=current_date.year - 1, month=12)
+            else:
+                current_date = current_date.replace(month=current_date.month - 1)
+
+        months.append((current_date.year, current_date.month))
+
+    # Devolver en orden cronológico (más antiguo primero)
+    return list(reversed(months))
+
+
+class PeriodStrategy:
+    """Base: subclases implementan `periods()` en orden cronológico."""
+    name = "base"
+
+    def periods(self) -> List[Period]:
+        raise NotImplementedError
+
+    def describe(self) -> dict:
+        return {"strategy": self.name}
+
+
+class FullRange(PeriodStrategy):
+    """Rango completo start_year-01 → mes actual (carga histórica)."""
+    name = "full"
+
+    def __init__(self, start_year: int, today: Optional[dt.date] = None):
+        self.start_year = start_year
+        self.today = today
+
+    def periods(self) -> List[Period]:
+        return _month_iter(self.start_year, self.today)
+
+    def describe(self) -> dict:
+        return {"strategy": self.name, "start_year": self.start_year}
+
+
+class Lookback(PeriodStrategy):
+    """Últimos N meses incluyendo el actual (carga incremental)."""
+    name = "lookback"
+
+    def __init__(self, months: int = 3, today: Optional[dt.date] = None):
+        self.months = months
+        self.today = today
+
+    def periods(self) -> List[Period]:
+        return _get_last_available_periods(self.months, self.today)
+
+    def describe(self) -> dict:
+        return {"strategy": self.name, "lookback_months": self.months}
+
+
+class ForcedPeriods(PeriodStrategy):
+    """Lista explícita de períodos YYYY-MM (reprocesos manuales)."""
+    name = "forced"
+
+    def __init__(self, periods: List[str]):
+        # Sin duplicados y en orden cronológico
+        self._periods = sorted({_parse_period(p) for p in periods})
+
+    def periods(self) -> List[Period]:
+        return list(self._periods)
+
+    def describe(self) -> dict:
+        return {"strategy": self.name, "forced_periods": [_fmt_period(p) for p in self._periods]}
+
+
+class GapFill(PeriodStrategy):
+    """
+    Solo los meses que faltan en landing o que son sospechosamente pequeños.
+
+    `landed` es {periodo: tamaño} (filas del manifest o bytes del CSV). Un mes
+    es sospechoso si su tamaño < min_ratio × mediana de sus `window` vecinos
+    aterrizados a cada lado (los meses escasos legítimos tienen vecinos escasos).
+    """
+    name = "gaps"
+
+    def __init__(self, start_year: int, landed: Dict[str, int], min_ratio: float = 0.5,
+                 window: int = 3, today: Optional[dt.date] = None):
+        self.start_year = start_year
+        self.landed = landed
+        self.min_ratio = min_ratio
+        self.window = window
+        self.today = today
+        self.missing: List[str] = []
+        self.small: List[str] = []
+
+    def periods(self) -> List[Period]:
+        expected = _month_iter(self.start_year, self.today)
+        present = [p for p in expected if _fmt_period(p) in self.landed]
+        self.missing = [_fmt_period(p) for p in expected if _fmt_period(p) not in self.landed]
+        self.small = []
+
+        for i, p in enumerate(present):
+            neighbours = present[max(0, i - self.window):i] + present[i + 1:i + 1 + self.window]
+            if not neighbours:
+                continue
+            ref = median(self.landed[_fmt_period(n)] for n in neighbours)
+            if self.landed[_fmt_period(p)] < self.min_ratio * ref:
+                self.small.append(_fmt_period(p))
+
+        return sorted(_parse_period(p) for p in self.missing + self.small)
+
+    def describe(self) -> dict:
+        return {"strategy": self.name, "start_year": self.start_year,
+                "missing": self.missing, "small": self.small}
+
+
+class Sharded(PeriodStrategy):
+    """
+    Parte determinista de otra estrategia para la tarea `index` de `count` (Cloud Run
+    Jobs). Bloques contiguos de igual número de meses, para que cada tarea pueda
+    pedirlos en rangos (ver `simbad.windows`).
+    `plan` fija la lista completa (ver `simbad.sharding.freeze_plan`) para que todas
+    las tareas partan de la misma aunque el estado de GCS cambie entre ellas.
+    """
+    name = "sharded"
+
+    def __init__(self, inner: PeriodStrategy, index: int, count: int, plan: Optional[List[Period]] = None):
+        if count < 1 or not 0 <= index < count:
+            raise ValueError(f"Shard inválido: {index}/{count}")
+        self.inner = inner
+        self.index = index
+        self.count = count
+        self.plan = plan
+
+    def periods(self) -> List[Period]:
+        full = self.plan if self.plan is not None else self.inner.periods()
+        n = len(full)
+        return list(full[self.index * n // self.count:(self.index + 1) * n // self.count])
+
+    def describe(self) -> dict:
+        return {**self.inner.describe(), "shard": f"{self.index}/{self.count}"}
@@ -0,0 +1,291 @@
+# landing/simbad/simbad/pipeline.py
+"""
+Pipeline compartido fetch → filtro → escritura para todos los modos de carga.
+
+Los harvesters (histórico e incremental) solo eligen la estrategia de
+períodos y las rutas de salida; cualquier mejora aquí aplica a ambos.
+"""
+import asyncio
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+import requests
+
+from .client import _fetch_month_df, _fetch_range_dfs
+from .periods import Period, _fmt_period, _parse_period, prioritize
+from .sink import _upload_landing
+from .tracing import span
+from .transform import (DERIVE_COLUMNS, ROW_KEY, _derived_columns, _filter_hipotecarios, _landing_layout,
+                        _order_columns, _project, _row_key)
+from .windows import RangePlanner
+
+log = logging.getLogger("simbad.pipeline")
+
+# on_period(periodo, df, ruta escrita o None): se llama al terminar cada período
+PeriodHook = Callable[[str, pd.DataFrame, Optional[str]], None]
+
+
+def _notify(on_period: Optional[PeriodHook], done: dict) -> None:
+    """Avisa al hook de cada período con filas de una ventana recién terminada."""
+    if on_period is None:
+        return
+    for p, res in sorted(done.items()):
+        if res is not None:
+            on_period(_fmt_period(p), *res)
+
+
+def _log_fetch_error(e: Exception, periodo: str) -> None:
+    response = getattr(e, "response", None)
+    if response is not None:
+        log.warning("HTTP %s en %s: %s", response.status_code, periodo, str(e))
+    else:
+        log.warning("Error en %s: %s", periodo, str(e))
+
+
+def _finish_period(
+    raw_df: pd.DataFrame,
+    periodo: str,
+    bucket: str,
+    period_object: Optional[Callable[[str], str]],
+    columns: Optional[List[str]] = None,
+) -> Optional[Tuple[pd.DataFrame, Optional[str]]]:
+    """
+    filtro → row_key → columnas derivadas → proyección (`columns`, ver
+    `transform.PROJECTIONS`) → (opcional) archivo de landing de un período ya
+    descargado. None si no hay filas.
+    """
+    if raw_df.empty:
+        log.info("Sin datos en %s", periodo)
+        return None
+
+    with span("transform", periodo=periodo) as sp:
+        df = _filter_hipotecarios(raw_df)
+        # Clave estable por hecho: permite el upsert por período en Silver
+        if not df.empty:
+            df = df.assign(**{ROW_KEY: _row_key(df)})
+            # Fecha, año/mes y flags de Silver una sola vez aquí: los SP solo proyectan
+            if DERIVE_COLUMNS:
+                df = df.join(_derived_columns(df))
+            # Orden posicional del landing (el orquestador carga los CSV por posición)
+            df = _project(_order_columns(df), columns)
+        sp.set(rows=len(df))
+    if df.empty:
+        log.info("Sin filas de 'Créditos Hipotecarios' en %s", periodo)
+        return None
+
+    path = None
+    if period_object is not None:
+        path = _upload_landing(_landing_layout(df, columns), bucket, period_object(periodo))
+    return df, path
+
+
+def _harvest_one(
+    sess: requests.Session,
+    period: Period,
+    tipo_entidad: str,
+    bucket: str,
+    period_object: Optional[Callable[[str], str]],
+    suffix: str,
+    planner: Optional[RangePlanner] = None,
+    columns: Optional[List[str]] = None,
+) -> Optional[Tuple[pd.DataFrame, Optional[str]]]:
+    """fetch → filtro → (opcional) CSV de un período. None si no hay filas."""
+    y, m = period
+    periodo = _fmt_period(period)
+    log.info("⏬ Descargando %s%s…", periodo, suffix)
+    with span("period", periodo=periodo) as sp:
+        try:
+            raw_df = _fetch_month_df(sess, y, m, tipo_entidad)
+        except Exception as e:
+            _log_fetch_error(e, periodo)
+            sp.set(error=type(e).__name__)
+            return None
+        if planner is not None:
+            planner.observe(1, len(raw_df))
+        res = _finish_period(raw_df, periodo, bucket, period_object, columns)
+        sp.set(rows=len(res[0]) if res else 0)
+    return res
+
+
+def _harvest_window(
+    sess: requests.Session,
+    window: List[Period],
+    tipo_entidad: str,
+    bucket: str,
+    period_object: Optional[Callable[[str], str]],
+    suffix: str,
+    planner: RangePlanner,
+    columns: Optional[List[str]] = None,
+) -> Dict[Period, Optional[Tuple[pd.DataFrame, Optional[str]]]]:
+    """Un rango de meses en una sola consulta; si falla, los reintenta mes a mes."""
+    if len(window) == 1:
+        return {window[0]: _harvest_one(sess, window[0], tipo_entidad, bucket, period_object, suffix, planner, columns)}
+
+    periodos = [_fmt_period(p) for p in window]
+    label = f"{periodos[0]}..{periodos[-1]}"
+    log.info("⏬ Descargando %s (%d meses)%s…", label, len(window), suffix)
+    with span("window", periodo=label, months=len(window)) as sp:
+        try:
+            frames = _fetch_range_dfs(sess, periodos, tipo_entidad)
+        except Exception as e:
+            _log_fetch_error(e, label)
+            sp.set(error=type(e).__name__)
+            frames = None
+        if frames is not None:
+            planner.observe(len(window), sum(len(f) for f in frames.values()))
+            out = {p: _finish_period(frames[_fmt_period(p)], _fmt_period(p), bucket, period_object, columns)
+                   for p in window}
+            sp.set(rows=sum(len(r[0]) for r in out.values() if r))
+            return out
+
+    log.info("Reintentando %s mes a mes", label)
+    return {p: _harvest_one(sess, p, tipo_entidad, bucket, period_object, suffix, planner, columns) for p in window}
+
+
+async def _harvest_async(
+    client,
+    planner: RangePlanner,
+    tipo_entidad: str,
+    bucket: str,
+    period_object: Optional[Callable[[str], str]],
+    suffix: str,
+    max_workers: int,
+    columns: Optional[List[str]] = None,
+    on_period: Optional[PeriodHook] = None,
+) -> dict:
+    """Descarga concurrente en un solo event loop; filtro/subida (y `on_period`) en hilos auxiliares."""
+    from .aio import _fetch_month_df_async, _fetch_range_dfs_async
+
+    async def fetch(periodos: List[str]) -> Dict[str, pd.DataFrame]:
+        if len(periodos) == 1:
+            y, m = _parse_period(periodos[0])
+            return {periodos[0]: await _fetch_month_df_async(client, y, m, tipo_entidad)}
+        return await _fetch_range_dfs_async(client, periodos, tipo_entidad)
+
+    async def one(window: List[Period]) -> dict:
+        periodos = [_fmt_period(p) for p in window]
+        label = periodos[0] if len(window) == 1 else f"{periodos[0]}..{periodos[-1]}"
+        name = "period" if len(window) == 1 else "window"
+        with span(name, periodo=label, **({} if len(window) == 1 else {"months": len(window)})) as sp:
+            try:
+                log.info("⏬ Descargando %s%s…", label, suffix)
+                frames = await fetch(periodos)
+            except Exception as e:
+                _log_fetch_error(e, label)
+                sp.set(error=type(e).__name__)
+                frames = None
+            if frames is not None:
+                planner.observe(len(window), sum(len(f) for f in frames.values()))
+                out = {}
+                for p, periodo in zip(window, periodos):
+                    out[p] = await asyncio.to_thread(_finish_period, frames[periodo], periodo, bucket, period_object,
+                                                     columns)
+                sp.set(rows=sum(len(r[0]) for r in out.values() if r))
+                return out
+        if len(window) == 1:
+            return {window[0]: None}
+        log.info("Reintentando %s mes a mes", label)
+        out = {}
+        for p in window:
+            out.update(await one([p]))
+        return out
+
+    # Cada worker pide la siguiente ventana al terminar la anterior: el tamaño
+    # de las ventanas se ajusta con lo observado hasta ese momento
+    async def worker() -> dict:
+        out = {}
+        while window := planner.next():
+            done = await one(window)
+            if on_period is not None:
+                await asyncio.to_thread(_notify, on_period, done)
+            out.update(done)
+        return out
+
+    async with client:
+        parts = await asyncio.gather(*(worker() for _ in range(max(1, max_workers))))
+    return {p: res for part in parts for p, res in part.items()}
+
+
+def harvest_periods(
+    sess,
+    periods: List[Period],
+    tipo_entidad: str,
+    bucket: str,
+    period_object: Optional[Callable[[str], str]] = None,
+    label: str = "",
+    max_workers: int = 1,
+    range_months: Optional[int] = None,
+    columns: Optional[List[str]] = None,
+    priority: Optional[str] = None,
+    on_period: Optional[PeriodHook] = None,
+) -> Tuple[List[pd.DataFrame], Dict[str, str]]:
+    """
+    Descarga y filtra cada período. Si `period_object` viene, sube además un
+    archivo por período (CSV, Parquet o Arrow según SB_LANDING_FORMAT) a la ruta
+    que devuelve `period_object(periodo)`.
+
+    `sess` es una `requests.Session` (`_requests_session`) o un cliente
+    asíncrono (`simbad.aio._async_client`, que se cierra al terminar). Con
+    `max_workers > 1` se descargan varias ventanas en paralelo (hilos sobre la
+    sesión, o tareas en el event loop); el resultado conserva el orden de `periods`.
+    Los meses consecutivos se piden en rangos de hasta `range_months` meses
+    (default SB_RANGE_MONTHS; ver `simbad.windows`). `columns` proyecta las
+    piezas y los archivos (`transform._projection_columns`; None = todas).
+    Los meses se descargan en el orden de `priority` (default SB_PRIORITY, ver
+    `periods.prioritize`) y `on_period(periodo, df, ruta)` se llama en cuanto
+    termina cada uno (desde los hilos de trabajo: debe ser seguro entre hilos).
+
+    Returns:
+        (piezas filtradas por período, {periodo: ruta gs://} escritas)
+    """
+    suffix = f" ({label})" if label else ""
+    sizer = getattr(sess, "page_sizer", None)
+    planner = RangePlanner(prioritize(periods, priority), max_months=range_months,
+                           page_size=sizer and (lambda: sizer.size))
+
+    def worker() -> dict:
+        out = {}
+        while window := planner.next():
+            done = _harvest_window(sess, window, tipo_entidad, bucket, period_object, suffix, planner, columns)
+            _notify(on_period, done)
+            out.update(done)
+        return out
+
+    if getattr(sess, "is_async", False):
+        results = asyncio.run(
+            _harvest_async(sess, planner, tipo_entidad, bucket, period_object, suffix, max_workers, columns,
+                           on_period)
+        )
+    elif max_workers > 1 and len(periods) > 1:
+        # Cada worker corre en una copia del contexto: los spans cuelgan de la corrida
+        n = min(max_workers, len(periods))
+        with ThreadPoolExecutor(max_workers=n, thread_name_prefix="simbad") as pool:
+            futures = [pool.submit(contextvars.copy_context().run, worker) for _ in range(n)]
+            results = {p: res for f in futures for p, res in f.result().items()}
+    else:
+        results = worker()
+
+    pieces = []
+    saved_paths = {}
+    for period in periods:
+        res = results.get(period)
+        if res is None:
+            continue
+        df, path = res
+        pieces.append(df)
+        if path:
+            saved_paths[_fmt_period(period)] = path
+    log.info("%d períodos en %d ventanas", len(periods), planner.windows)
+
+    return pieces, saved_paths
+
+
+def consolidate(pieces: List[pd.DataFrame], columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Concatena las piezas por período con el orden de columnas estándar (y la proyección `columns`)."""
+    with span("consolidate") as sp:
+        full = _landing_layout(_order_columns(pd.concat(pieces, ignore_index=True)), columns)
+        sp.set(rows=len(full))
+    return full
@@ -0,0 +1,121 @@
+# landing/simbad/simbad/publish.py
+"""
+Publicación progresiva: cada período queda usable en cuanto termina, no al final
+de la corrida.
+
+Con SB_PUBLISH=true (o `publish=True`) el harvester pasa un `Publisher` como
+`on_period` de `pipeline.harvest_periods`. Por cada período terminado:
+
+    1. layout `period`: su revisión se compacta al canónico en ese momento
+       (layout `consolidated`: se escribe su archivo en `monthly/`; el consolidado
+       sigue saliendo al final);
+    2. se registra en el manifest (no en tareas con shards: lo hace `finalize`);
+    3. se emite el evento de período completo, un objeto por período y corrida:
+
+    gs://{bucket}/{prefix}/{dataset}/_events/dt={run_date}/periodo=YYYY-MM.json
+    {"event": "simbad.period_published", "periodo": "2025-06", "rows": 5120,
+     "path": "gs://...", "seq": 1, "total": 162, "since_start_s": 4.2, ...}
+
+Una notificación de GCS (Pub/Sub o Eventarc) filtrada por `_events/` entrega cada
+evento a quien lo escuche. Junto con SB_PRIORITY=recent (ver `periods.prioritize`)
+un backfill de años publica los últimos meses en los primeros minutos.
+
+Un fallo al publicar un período solo se registra: el harvester lo compacta y lo
+anota al final como en una corrida sin publicación.
+"""
+import os
+import json
+import time
+import logging
+import threading
+import datetime as dt
+from typing import Dict, Optional
+
+import pandas as pd
+
+from .compaction import compact_periods
+from .manifest import update_manifest
+from .sink import _storage_client
+from .tracing import span
+
+log = logging.getLogger("simbad.publish")
+
+PUBLISH = os.getenv("SB_PUBLISH", "false").lower() == "true"
+EVENTS_DIR = "_events"
+EVENT_TYPE = "simbad.period_published"
+
+
+def event_object(prefix: str, dataset: str, run_date: str, periodo: str) -> str:
+    return f"{prefix}/{dataset}/{EVENTS_DIR}/dt={run_date}/periodo={periodo}.json"
+
+
+def compact_unpublished(bucket: str, prefix: str, dataset: str, saved: Dict[str, str],
+                        publisher: Optional["Publisher"]) -> Dict[str, str]:
+    """`compact_periods` de lo que la publicación no compactó ya; {periodo: canónico} de todo `saved`."""
+    published = publisher.published if publisher is not None and publisher.compact else {}
+    pending = sorted(set(saved) - set(published))
+    canonical = compact_periods(bucket, prefix, dataset, pending)["canonical"] if pending else {}
+    return {p: canonical.get(p) or published.get(p) or path for p, path in saved.items()}
+
+
+class Publisher:
+    """Hook `on_period` que publica cada período al terminar (seguro entre hilos)."""
+
+    def __init__(self, bucket: str, prefix: str, dataset: str, tipo_entidad: str, run_date: str,
+                 total: int, compact: bool = False, manifest: bool = True):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.dataset = dataset
+        self.tipo_entidad = tipo_entidad
+        self.run_date = run_date
+        self.total = total
+        self.compact = compact
+        self.manifest = manifest
+        self.published: Dict[str, Optional[str]] = {}
+        self._seconds: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+
+    def __call__(self, periodo: str, df: pd.DataFrame, path: Optional[str]) -> None:
+        try:
+            with span("publish", periodo=periodo, rows=len(df)) as sp:
+                if self.compact and path:
+                    canonical = compact_periods(self.bucket, self.prefix, self.dataset, [periodo])["canonical"]
+                    path = canonical.get(periodo, path)
+                # El manifest es read-modify-write: una actualización a la vez
+                with self._lock:
+                    if self.manifest:
+                        update_manifest(self.bucket, self.prefix, self.dataset,
+                                        {periodo: {"rows": int(len(df)), "path": path}})
+                    since_start = time.perf_counter() - self._t0
+                    self.published[periodo] = path
+                    self._seconds[periodo] = since_start
+                    seq = len(self.published)
+                self._emit(periodo, int(len(df)), path, seq, since_start)
+                sp.set(since_start=since_start)
+        except Exception as e:
+            log.warning("[PUBLISH] %s no se pudo publicar (se completa al final de la corrida): %s", periodo, e)
+            with self._lock:
+                self.published.pop(periodo, None)
+                self._seconds.pop(periodo, None)
+            return
+        log.info("[PUBLISH] %s publicado (%d/%d, %.1fs desde el inicio): %s",
+                 periodo, seq, self.total, since_start, path)
+
+    def _emit(self, periodo: str, rows: int, path: Optional[str], seq: int, since_start: float) -> None:
+        event = {
+            "event": EVENT_TYPE, "dataset": self.dataset, "tipo_entidad": self.tipo_entidad,
+            "periodo": periodo, "rows": rows, "path": path, "run_date": self.run_date,
+            "seq": seq, "total": self.total, "since_start_s": round(since_start, 3),
+            "published": dt.datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        }
+        blob = _storage_client().bucket(self.bucket).blob(event_object(self.prefix, self.dataset, self.run_date, periodo))
+        blob.upload_from_string(json.dumps(event), content_type="application/json")
+
+    def stats(self) -> dict:
+        """Resumen para el resultado del harvester: cuántos y cuándo (s desde el inicio)."""
+        with self._lock:
+            seconds = sorted(self._seconds.values())
+        if not seconds:
+            return {"periods": 0}
+        return {"periods": len(seconds), "first_s": round(seconds[0], 2), "last_s": round(seconds[-1], 2)}
@@ -0,0 +1,257 @@
+# landing/simbad/simbad/ratelimit.py
+"""
+Limitador adaptativo (AIMD) y tamaño de página adaptativo para la API de la SB.
+
+Sustituye los `time.sleep` fijos: la tasa sube de forma aditiva mientras la
+API responde bien y se reduce a la mitad ante 429/503. Respeta `Retry-After`
+y las cabeceras de cuota de APIM (`x-ratelimit-remaining`, ...). Es seguro
+entre hilos: todos los workers de una sesión comparten el mismo limitador.
+
+`PageSizer` ajusta `registros` por corrida: crece mientras baja la latencia por
+fila y se achica ante timeouts/5xx.
+"""
+import os
+import time
+import asyncio
+import threading
+import logging
+from email.utils import parsedate_to_datetime
+from statistics import median
+from typing import Dict, List, Optional
+
+log = logging.getLogger("simbad.ratelimit")
+
+THROTTLE_STATUS = (429, 503)
+
+# Valores por defecto configurables por entorno (tasa inicial / techo en req/s)
+DEFAULT_RATE = float(os.getenv("SB_RATE_INITIAL", "5"))
+DEFAULT_MAX_RATE = float(os.getenv("SB_RATE_MAX", "50"))
+
+# Tamaño de página (`registros`) inicial y sus límites
+DEFAULT_PAGE_SIZE = int(os.getenv("SB_PAGE_SIZE", "10000"))
+MIN_PAGE_SIZE = int(os.getenv("SB_PAGE_SIZE_MIN", "1000"))
+MAX_PAGE_SIZE = int(os.getenv("SB_PAGE_SIZE_MAX", "50000"))
+
+# Cabeceras de cuota que APIM / gateways suelen exponer
+_REMAINING_HEADERS = ("x-ratelimit-remaining", "x-rate-limit-remaining", "ratelimit-remaining",
+                      "x-ratelimit-remaining-requests")
+_RESET_HEADERS = ("x-ratelimit-reset", "x-rate-limit-reset", "ratelimit-reset")
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After en segundos (acepta entero o fecha HTTP)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+def _first_header(headers, names) -> Optional[str]:
+    for n in names:
+        v = headers.get(n)
+        if v is not None:
+            return v
+    return None
+
+
+class AdaptiveLimiter:
+    """
+    Control de tasa AIMD compartido.
+
+    Args:
+        rate: requests/s iniciales
+        min_rate / max_rate: límites de la tasa
+        increase: incremento aditivo (req/s) por respuesta OK
+        decrease: factor multiplicativo ante throttling
+        low_remaining: si la cuota restante baja de aquí, frena antes de recibir 429
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, min_rate: float = 0.5, max_rate: float = DEFAULT_MAX_RATE,
+                 increase: float = 0.5, decrease: float = 0.5, low_remaining: int = 5):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.low_remaining = low_remaining
+
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self._blocked_until = 0.0
+
+        self._started = time.monotonic()
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self.peak_rate = rate
+
+    def _reserve(self) -> float:
+        """Reserva el siguiente hueco y devuelve cuántos segundos hay que esperar."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot, self._blocked_until)
+            self._next_slot = slot + 1.0 / self.rate
+            self.requests += 1
+        return slot - now
+
+    def acquire(self) -> None:
+        """Bloquea hasta el siguiente hueco permitido por la tasa y por Retry-After."""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """Igual que `acquire` pero sin bloquear el event loop."""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def observe(self, status: int, headers) -> None:
+        """Ajusta la tasa según el status y las cabeceras de la respuesta."""
+        with self._lock:
+            now = time.monotonic()
+            if status in THROTTLE_STATUS:
+                self.throttled += 1
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                pause = _parse_retry_after(headers.get("Retry-After")) or (1.0 / self.rate)
+                self._blocked_until = max(self._blocked_until, now + pause)
+                log.warning("Throttling HTTP %s: tasa → %.2f req/s, pausa %.1fs", status, self.rate, pause)
+                return
+
+            if status >= 500:
+                self.errors += 1
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                return
+
+            remaining = _first_header(headers, _REMAINING_HEADERS)
+            try:
+                remaining = int(float(remaining)) if remaining is not None else None
+            except ValueError:
+                remaining = None
+
+            if remaining is not None and remaining <= self.low_remaining:
+                # Cuota casi agotada: no subir y esperar al reset si lo indican
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                reset = _parse_retry_after(_first_header(headers, _RESET_HEADERS))
+                if reset:
+                    self._blocked_until = max(self._blocked_until, now + reset)
+                return
+
+            self.rate = min(self.max_rate, self.rate + self.increase)
+            self.peak_rate = max(self.peak_rate, self.rate)
+
+    def stats(self) -> dict:
+        """Métricas del limitador para el resultado de la corrida."""
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        return {
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "server_errors": self.errors,
+            "achieved_rps": round(self.requests / elapsed, 3),
+            "current_rate": round(self.rate, 3),
+            "peak_rate": round(self.peak_rate, 3),
+        }
+
+
+class PageSizer:
+    """
+    Tamaño de página adaptativo compartido por los workers de una sesión.
+
+    Cuenta solo páginas de al menos medio tamaño pedidas con el tamaño actual.
+    Con `samples` de ellas compara la mediana de segundos por fila con la del
+    tamaño anterior. Si mejora al menos `min_gain`, multiplica por `grow`; si no,
+    vuelve al mejor tamaño medido y se queda ahí. Un timeout o 5xx lo reduce a la
+    mitad y fija ese tamaño como techo para el resto de la corrida.
+    """
+
+    def __init__(self, size: Optional[int] = None, min_size: int = MIN_PAGE_SIZE, max_size: int = MAX_PAGE_SIZE,
+                 grow: float = 1.5, samples: int = 3, min_gain: float = 0.05):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.grow = grow
+        self.samples = samples
+        self.min_gain = min_gain
+
+        self._lock = threading.Lock()
+        self._ceiling = max_size
+        self._observed: Dict[int, List[float]] = {}
+        self._per_row: Dict[int, float] = {}
+        self._previous: Optional[int] = None
+        self.settled = False
+        self.failures = 0
+        self.size = self._clamp(size or DEFAULT_PAGE_SIZE)
+
+    def _clamp(self, size: float) -> int:
+        size = int(round(size / 500.0)) * 500 or 500
+        return max(self.min_size, min(self._ceiling, size))
+
+    def _best(self) -> int:
+        allowed = {k: v for k, v in self._per_row.items() if k <= self._ceiling}
+        return min(allowed, key=allowed.get) if allowed else self.size
+
+    @property
+    def best(self) -> int:
+        """Tamaño bajo el techo con menor latencia por fila medida (el actual si no hay medidas)."""
+        with self._lock:
+            return self._best()
+
+    def observe(self, size: int, rows: int, seconds: float) -> None:
+        """Registra una página de `rows` filas pedida con `registros=size` que tardó `seconds`."""
+        if rows <= 0 or rows * 2 < size:
+            return
+        with self._lock:
+            if size != self.size:
+                return
+            samples = self._observed.setdefault(size, [])
+            if len(samples) >= self.samples:
+                return
+            samples.append(seconds / rows)
+            if len(samples) < self.samples:
+                return
+            self._per_row[size] = median(samples)
+            if self.settled:
+                return
+
+            previous = self._previous
+            if previous is not None and self._per_row[size] > self._per_row[previous] * (1 - self.min_gain):
+                self.size = self._best()
+                self.settled = True
+                log.info("Página: %d registros sin mejora; se queda en %d", size, self.size)
+                return
+            nxt = self._clamp(size * self.grow)
+            if nxt <= size:
+                self.settled = True
+                return
+            self._previous, self.size = size, nxt
+            log.info("Página: %.3f ms/fila con %d registros → %d", self._per_row[size] * 1000, size, nxt)
+
+    def failed(self, size: int) -> bool:
+        """Timeout/5xx con `registros=size`: achica. False si ya no se puede bajar más."""
+        with self._lock:
+            self.failures += 1
+            if size <= self.min_size:
+                return False
+            self._ceiling = min(self._ceiling, max(self.min_size, size // 2))
+            self.size = min(self.size, self._ceiling)
+            self._previous = None
+            self.settled = False
+            log.warning("Página: fallo con %d registros → %d", size, self.size)
+            return True
+
+    def stats(self) -> dict:
+        """Tamaño actual, mejor medido y ms por 1000 filas de cada tamaño probado."""
+        best = self.best
+        with self._lock:
+            return {
+                "size": self.size,
+                "best": best,
+                "failures": self.failures,
+                "ms_per_krow": {str(k): round(v * 1e6, 2) for k, v in sorted(self._per_row.items())},
+            }
@@ -0,0 +1,229 @@
+# landing/simbad/simbad/raw.py
+"""
+Archivo de respuestas crudas de la API SB ("raw zone") y replay.
+
+Con SB_RAW_ARCHIVE=true (default: false) cada consulta paginada que termina bien deja
+el cuerpo de cada página tal como llegó (JSON comprimido, sin re-serializar) y
+un `_done.json` que la marca como completa:
+
+    {raw}/sb/tipoEntidad={tipo}/run={run_id}/{desde}_{hasta}/page-0001.json.gz
+    {raw}/sb/tipoEntidad={tipo}/run={run_id}/{desde}_{hasta}/_done.json
+
+`{raw}` es SB_RAW_URI: `gs://bucket/prefijo` o un directorio local; por defecto
+`gs://{bucket}/{prefix}/_raw`. SB_RAW_CODEC elige `gzip` (default) o `zstd`
+(paquete `zstandard`).
+
+Replay (`replay=True` en los harvesters, o SB_REPLAY=true): la sesión HTTP se
+sustituye por `ReplaySession`, que responde cada consulta con las filas de la
+corrida más reciente que cubrió cada mes. Filtro, row_key, orden de columnas y
+escritura son los mismos, así que un cambio de transformación se aplica a todo
+el histórico sin llamar a la API.
+"""
+import os
+import gzip
+import json
+import logging
+import pathlib
+import datetime as dt
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional
+
+import pandas as pd
+
+from .client import _open_session
+from .periods import _fmt_period, _parse_period
+from .ratelimit import AdaptiveLimiter, PageSizer
+from .sink import _storage_client
+from .tracing import span
+
+log = logging.getLogger("simbad.raw")
+
+RAW_ARCHIVE = os.getenv("SB_RAW_ARCHIVE", "false").lower() == "true"
+RAW_URI = os.getenv("SB_RAW_URI", "")
+RAW_CODEC = os.getenv("SB_RAW_CODEC", "gzip").lower()
+REPLAY = os.getenv("SB_REPLAY", "false").lower() == "true"
+RAW_DIR = "_raw"
+DONE_NAME = "_done.json"
+_CODEC_EXT = {"gzip": ".gz", "zstd": ".zst"}
+
+
+def raw_uri(bucket: str, prefix: str) -> str:
+    """Raíz del archivo raw: SB_RAW_URI o `gs://{bucket}/{prefix}/_raw`."""
+    return RAW_URI or f"gs://{bucket}/{prefix}/{RAW_DIR}"
+
+
+class _Store:
+    """Objetos bajo una raíz `gs://bucket/prefijo` o un directorio local."""
+
+    def __init__(self, uri: str):
+        if uri.startswith("gs://"):
+            self.bucket, _, root = uri[5:].partition("/")
+            self.root = root.strip("/")
+            self.local = None
+        else:
+            self.bucket, self.root = None, ""
+            self.local = pathlib.Path(uri)
+
+    def _name(self, name: str) -> str:
+        return f"{self.root}/{name}" if self.root else name
+
+    def put(self, name: str, data: bytes, content_type: str) -> None:
+        if self.local is not None:
+            path = self.local / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+        else:
+            _storage_client().bucket(self.bucket).blob(self._name(name)).upload_from_string(
+                data, content_type=content_type)
+
+    def get(self, name: str) -> bytes:
+        if self.local is not None:
+            return (self.local / name).read_bytes()
+        return _storage_client().bucket(self.bucket).blob(self._name(name)).download_as_bytes()
+
+    def list(self, prefix: str) -> List[str]:
+        """Nombres (relativos a la raíz) que empiezan por `prefix`."""
+        if self.local is not None:
+            base = self.local / prefix
+            if not base.exists():
+                return []
+            return sorted(p.relative_to(self.local).as_posix() for p in base.rglob("*") if p.is_file())
+        skip = len(self.root) + 1 if self.root else 0
+        return sorted(b.name[skip:] for b in _storage_client().bucket(self.bucket).list_blobs(prefix=self._name(prefix)))
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    if codec != "gzip":
+        raise ValueError(f"SB_RAW_CODEC inválido: {codec} (gzip | zstd)")
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(data: bytes, name: str) -> bytes:
+    if name.endswith(_CODEC_EXT["zstd"]):
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def _source_dir(tipo_entidad: str) -> str:
+    return f"sb/tipoEntidad={tipo_entidad}/"
+
+
+class RawArchive:
+    """Escribe las páginas de cada consulta completa de una corrida (`run_id`)."""
+
+    def __init__(self, uri: str, tipo_entidad: str, codec: str = RAW_CODEC, run_id: Optional[str] = None):
+        self.store = _Store(uri)
+        self.tipo_entidad = tipo_entidad
+        self.codec = codec
+        self.run_id = run_id or dt.datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+
+    def write(self, params: dict, pages: List[bytes], rows: int) -> None:
+        """Archiva `pages` (cuerpos de respuesta) de la consulta `params`; no falla la corrida."""
+        desde, hasta = params["periodoInicial"], params["periodoFinal"]
+        folder = f"{_source_dir(self.tipo_entidad)}run={self.run_id}/{desde}_{hasta}"
+        try:
+            with span("raw.write", periodo=f"{desde}..{hasta}", pages=len(pages)) as sp:
+                size = 0
+                for i, body in enumerate(pages, 1):
+                    data = _compress(body, self.codec)
+                    self.store.put(f"{folder}/page-{i:04d}.json{_CODEC_EXT[self.codec]}", data,
+                                   "application/octet-stream")
+                    size += len(data)
+                done = {"desde": desde, "hasta": hasta, "tipoEntidad": self.tipo_entidad,
+                        "pages": len(pages), "rows": rows,
+                        "registros": params.get("registros"), "codec": self.codec}
+                self.store.put(f"{folder}/{DONE_NAME}", json.dumps(done).encode("utf-8"), "application/json")
+                sp.set(bytes=size, rows=done["rows"])
+        except Exception as e:
+            log.warning("[RAW] No se pudo archivar %s..%s: %s", desde, hasta, e)
+
+
+class _Query(NamedTuple):
+    run: str
+    desde: str
+    hasta: str
+    folder: str
+
+
+def _months_between(desde: str, hasta: str) -> List[str]:
+    (y, m), end = _parse_period(desde), _parse_period(hasta)
+    out = []
+    while (y, m) <= end:
+        out.append(_fmt_period((y, m)))
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return out
+
+
+class ReplaySession:
+    """
+    Sustituto de la sesión HTTP que responde desde el archivo raw (sin red). Para
+    cada mes usa la consulta completa más reciente que lo cubre.
+    """
+
+    is_async = False
+    is_replay = True
+
+    def __init__(self, uri: str, tipo_entidad: str):
+        self.store = _Store(uri)
+        self.tipo_entidad = tipo_entidad
+        self.limiter = AdaptiveLimiter()
+        self.page_sizer = PageSizer()
+        self.queries: List[_Query] = []
+        for name in self.store.list(_source_dir(tipo_entidad)):
+            if not name.endswith("/" + DONE_NAME):
+                continue
+            run_part, range_part = name.split("/")[-3:-1]
+            desde, _, hasta = range_part.partition("_")
+            self.queries.append(_Query(run_part[len("run="):], desde, hasta, name.rsplit("/", 1)[0]))
+        log.info("[REPLAY] %d consultas archivadas para %s en %s", len(self.queries), tipo_entidad, uri)
+
+    def _latest(self, periodo: str) -> Optional[_Query]:
+        covering = [q for q in self.queries if q.desde <= periodo <= q.hasta]
+        return max(covering, key=lambda q: q.run) if covering else None
+
+    @lru_cache(maxsize=8)
+    def _pages(self, folder: str) -> List[list]:
+        pages = []
+        for name in self.store.list(folder + "/"):
+            if "/page-" in name:
+                # Mismas formas que acepta `client._parse_page`: lista o {Data: [...]}
+                payload = json.loads(_decompress(self.store.get(name), name))
+                pages.append(payload if isinstance(payload, list) else payload.get("Data") or [])
+        return pages
+
+    def frames(self, desde: str, hasta: str) -> List[pd.DataFrame]:
+        """Páginas (DataFrames crudos) que la API habría devuelto para `desde`..`hasta`."""
+        chosen: Dict[_Query, List[str]] = {}
+        for periodo in _months_between(desde, hasta):
+            q = self._latest(periodo)
+            if q is None:
+                log.info("[REPLAY] %s sin respuestas archivadas", periodo)
+                continue
+            chosen.setdefault(q, []).append(periodo)
+
+        dfs = []
+        with span("raw.read", periodo=f"{desde}..{hasta}") as sp:
+            for q, months in chosen.items():
+                for records in self._pages(q.folder):
+                    df = pd.DataFrame(records)
+                    if q.desde != q.hasta:
+                        if "periodo" not in df.columns:
+                            continue  # rango sin periodo: no se puede repartir por mes
+                        df = df[df["periodo"].astype(str).str[:7].isin(months)].reset_index(drop=True)
+                    if not df.empty:
+                        dfs.append(df)
+            sp.set(rows=sum(len(d) for d in dfs))
+        return dfs
+
+
+def harvest_session(api_key: str, bucket: str, prefix: str, tipo_entidad: str, replay: bool = False, **kwargs):
+    """Sesión de un harvester: `ReplaySession` en replay; si no, HTTP con archivo raw (SB_RAW_ARCHIVE)."""
+    uri = raw_uri(bucket, prefix)
+    if replay:
+        return ReplaySession(uri, tipo_entidad)
+    archive = RawArchive(uri, tipo_entidad) if RAW_ARCHIVE else None
+    return _open_session(api_key, raw_archive=archive, **kwargs)
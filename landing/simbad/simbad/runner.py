@@ -0,0 +1,44 @@
+# landing/simbad/simbad/runner.py
+import os, datetime as dt
+from simbad.harvester import consolidated_object, run_harvest
+from simbad.orchestrator import refresh_if_enabled
+from simbad.periods import FullRange
+from simbad.sharding import current_shard, run_shard
+from simbad.tracing import format_summary
+
+def main():
+    run_date = dt.date.today().isoformat()
+    start_year = int(os.getenv("SB_START_YEAR", "2012"))
+    kwargs = dict(
+        api_key=os.environ["SB_API_KEY"],
+        tipo_entidad=os.getenv("SB_TIPO_ENTIDAD", "AAyP"),
+        start_year=start_year,
+        bucket=os.environ["GCS_BUCKET"],
+        prefix=os.environ["LANDING_PREFIX"],
+        dataset=os.getenv("SB_DATASET", "simbad_carteras_aayp_hipotecarios"),
+        keep_monthly=os.getenv("SB_KEEP_MONTHLY", "false").lower() == "true",
+        run_date=run_date,
+        max_workers=int(os.getenv("SB_MAX_WORKERS", "1")),
+        http_client=os.getenv("SB_HTTP_CLIENT", "requests"),
+        bq_staging=os.getenv("SB_BQ_STAGING", "false").lower() == "true",
+    )
+
+    # Cloud Run Job con varias tareas: cada una su parte; la última finaliza
+    shard = current_shard(run_date)
+    if shard.count > 1:
+        res = run_shard(run_harvest, FullRange(start_year), shard, consolidated_object, **kwargs)
+        final = res.get("finalized")
+    else:
+        res = final = run_harvest(**kwargs)
+
+    if final is not None:
+        bq = refresh_if_enabled(final, run_date)
+        if bq is not None:
+            final["bigquery"] = bq
+    # El dict de la traza es largo: en la salida solo su resumen
+    trace = res.pop("trace", {})
+    print(f"Traza: {format_summary(trace)}")
+    print({"ok": True, "date_partition": f"dt={run_date}", **res})
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# landing/simbad/simbad/runner_incremental.py
+import os
+import datetime as dt
+from simbad.harvester_incremental import consolidated_object, run_incremental_harvest, select_strategy
+from simbad.orchestrator import refresh_if_enabled
+from simbad.sharding import current_shard, run_shard
+from simbad.tracing import format_summary
+
+def main():
+    """Entry point para Cloud Run Job incremental."""
+    run_date = dt.date.today().isoformat()
+
+    # Variables de entorno
+    bucket = os.environ["GCS_BUCKET"]
+    prefix = os.environ["LANDING_PREFIX"]
+    api_key = os.environ["SB_API_KEY"]
+    tipo_entidad = os.getenv("SB_TIPO_ENTIDAD", "AAyP")
+    dataset = os.getenv("SB_DATASET", "simbad_carteras_aayp_hipotecarios")
+    lookback_months = int(os.getenv("SB_LOOKBACK_MONTHS", "3"))
+    mode = os.getenv("SB_MODE", "lookback")  # lookback | gaps
+    start_year = int(os.getenv("SB_START_YEAR", "2012"))
+    max_workers = int(os.getenv("SB_MAX_WORKERS", "4" if mode == "gaps" else "1"))
+
+    print(f"🚀 SIMBAD Incremental Job iniciado - {run_date}")
+    print(f"📅 Modo: {mode} (lookback {lookback_months} meses, desde {start_year})")
+    print(f"🎯 Dataset: {dataset}")
+    print(f"📍 Destino: gs://{bucket}/{prefix}/{dataset}/incremental/")
+
+    try:
+        kwargs = dict(
+            api_key=api_key,
+            tipo_entidad=tipo_entidad,
+            bucket=bucket,
+            prefix=prefix,
+            dataset=dataset,
+            run_date=run_date,
+            lookback_months=lookback_months,
+            mode=mode,
+            start_year=start_year,
+            max_workers=max_workers,
+            http_client=os.getenv("SB_HTTP_CLIENT", "requests"),
+            bq_staging=os.getenv("SB_BQ_STAGING", "false").lower() == "true"
+        )
+
+        # Cloud Run Job con varias tareas: cada una su parte; la última finaliza
+        shard = current_shard(run_date)
+        if shard.count > 1:
+            print(f"🧩 Tarea {shard.index + 1}/{shard.count} (ejecución {shard.execution})")
+            strategy = select_strategy(bucket, prefix, dataset, lookback_months, mode=mode, start_year=start_year)
+            res = run_shard(run_incremental_harvest, strategy, shard, consolidated_object, **kwargs)
+            final = res.get("finalized")
+        else:
+            res = final = run_incremental_harvest(**kwargs)
+
+        print("✅ Carga incremental completada exitosamente:")
+        print(f"   - Períodos cargados: {res.get('periods_loaded', 0)}")
+        print(f"   - Filas procesadas: {res.get('rows', 0)}")
+        print(f"   - Rango: {res.get('from', 'N/A')} → {res.get('to', 'N/A')}")
+        print(f"   - Consolidado: {res.get('consolidated', 'N/A')}")
+        print(f"   - Tasa API: {res.get('rate', {})}")
+        print(f"   - Traza: {format_summary(res.get('trace', {}))}")
+
+        if final is not None:
+            if final is not res:
+                print(f"   - Finalizado: {final.get('periods_loaded', 0)} períodos de {shard.count} tareas → {final.get('consolidated', 'N/A')}")
+            bq = refresh_if_enabled(final, run_date)
+            if bq is not None:
+                final["bigquery"] = bq
+                print(f"   - BigQuery: {bq}")
+
+        result = {"ok": True, "date_partition": f"dt={run_date}", **res}
+        print(f"📊 Resultado final: {result}")
+
+    except Exception as e:
+        print(f"❌ Error en carga incremental: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,232 @@
+# landing/simbad/simbad/sharding.py
+"""
+Reparto de una corrida entre las tareas de un Cloud Run Job.
+
+Con CLOUD_RUN_TASK_COUNT > 1 cada tarea (CLOUD_RUN_TASK_INDEX) descarga su bloque
+contiguo de la lista de períodos (`periods.Sharded`) y escribe solo sus
+archivos por período. La lista completa se fija una vez por ejecución (la primera
+tarea crea `plan.json` con creación condicional), así todas reparten la misma
+aunque el manifest cambie mientras corren. La última tarea en terminar arma el
+consolidado y el manifest (`finalize`); una marca condicional evita que lo hagan dos.
+
+Estado por ejecución en GCS: {prefix}/{dataset}/_shards/{CLOUD_RUN_EXECUTION}/
+    plan.json         períodos de toda la ejecución + descripción de la estrategia
+    shard-0000.json   resultado de cada tarea (filas y ruta por período)
+    _finalized        marca de la tarea que finalizó
+
+Simulación local (un comando por tarea, mismo CLOUD_RUN_EXECUTION):
+    CLOUD_RUN_EXECUTION=prueba CLOUD_RUN_TASK_COUNT=3 CLOUD_RUN_TASK_INDEX=0 python -m simbad.runner
+Finalizar a mano si la última tarea falló al armar el consolidado:
+    python -m simbad.sharding --execution prueba --kind historical
+"""
+import os
+import sys
+import json
+import logging
+import argparse
+import datetime as dt
+from contextlib import nullcontext
+from typing import Callable, List, NamedTuple, Optional
+
+from google.api_core.exceptions import PreconditionFailed
+
+from .lock import LOCK_TTL, RUN_LOCK, RunLease, ensure_lease, locked_result
+from .manifest import update_manifest
+from .periods import Period, PeriodStrategy, Sharded, _fmt_period, _parse_period
+from .pipeline import consolidate
+from .sink import _download_landing, _storage_client, _upload_landing
+
+log = logging.getLogger("simbad.sharding")
+
+SHARD_DIR = "_shards"
+
+
+class Shard(NamedTuple):
+    index: int
+    count: int
+    execution: str
+
+
+def current_shard(run_date: str) -> Shard:
+    """Tarea actual según las variables de Cloud Run Jobs (1 tarea fuera de un job)."""
+    return Shard(
+        index=int(os.getenv("CLOUD_RUN_TASK_INDEX", "0")),
+        count=int(os.getenv("CLOUD_RUN_TASK_COUNT", "1")),
+        execution=os.getenv("CLOUD_RUN_EXECUTION") or f"local-{run_date}",
+    )
+
+
+def _shard_dir(prefix: str, dataset: str, execution: str) -> str:
+    return f"{prefix}/{dataset}/{SHARD_DIR}/{execution}"
+
+
+def _create_once(blob, data: str, content_type: str) -> bool:
+    """Crea el objeto solo si no existe; False si otra tarea lo creó antes."""
+    try:
+        blob.upload_from_string(data, content_type=content_type, if_generation_match=0)
+        return True
+    except PreconditionFailed:
+        return False
+
+
+def freeze_plan(bucket: str, prefix: str, dataset: str, shard: Shard, strategy: PeriodStrategy) -> List[Period]:
+    """Lista completa de períodos de la ejecución: la de la primera tarea que llega."""
+    blob = _storage_client().bucket(bucket).blob(f"{_shard_dir(prefix, dataset, shard.execution)}/plan.json")
+    periods = [_fmt_period(p) for p in strategy.periods()]
+    plan = json.dumps({"periods": periods, "strategy": strategy.describe()})
+    if not _create_once(blob, plan, "application/json"):
+        periods = json.loads(blob.download_as_bytes())["periods"]
+    return [_parse_period(p) for p in periods]
+
+
+def run_shard(harvest: Callable[..., dict], strategy: PeriodStrategy, shard: Shard,
+              consolidated_object: Callable[..., str], **kwargs) -> dict:
+    """
+    Corre la parte de esta tarea con `harvest(..., finalize=False)`, registra su
+    resultado y, si es la última en terminar, finaliza (ver `finalize`).
+    """
+    bucket, prefix, dataset = kwargs["bucket"], kwargs["prefix"], kwargs["dataset"]
+    # Todas las tareas de la ejecución comparten el lease; otra ejecución se omite
+    lease = RunLease(bucket, prefix, dataset, owner=f"execution:{shard.execution}", ttl=LOCK_TTL) if RUN_LOCK else None
+    if lease is not None and not lease.acquire():
+        log.warning("[SHARD] %s: otra corrida tiene el lock de %s (%s); se omite",
+                    shard.execution, dataset, (lease.holder or {}).get("owner"))
+        return locked_result(lease)
+    with lease.heartbeat() if lease is not None else nullcontext():
+        res = _run_shard(harvest, strategy, shard, consolidated_object, **kwargs)
+    # La tarea que finaliza libera el lock; las demás lo dejan vencer si no finaliza nadie
+    if lease is not None and "finalized" in res:
+        lease.release()
+    return res
+
+
+def _run_shard(harvest: Callable[..., dict], strategy: PeriodStrategy, shard: Shard,
+               consolidated_object: Callable[..., str], **kwargs) -> dict:
+    bucket, prefix, dataset = kwargs["bucket"], kwargs["prefix"], kwargs["dataset"]
+    plan = freeze_plan(bucket, prefix, dataset, shard, strategy)
+    res = harvest(strategy=Sharded(strategy, shard.index, shard.count, plan), finalize=False, **kwargs)
+
+    record = {
+        "index": shard.index,
+        "entries": res.get("entries", {}),
+        "layout": res.get("layout"),
+        "bq_staging": res.get("bq_staging"),
+        "page_size": res.get("page_size", {}).get("best"),
+    }
+    ensure_lease()
+    blob = _storage_client().bucket(bucket).blob(
+        f"{_shard_dir(prefix, dataset, shard.execution)}/shard-{shard.index:04d}.json"
+    )
+    blob.upload_from_string(json.dumps(record, default=str), content_type="application/json")
+    log.info("[SHARD] %d/%d: %d períodos, %d filas", shard.index, shard.count,
+             len(record["entries"]), res.get("rows", 0))
+
+    res["shard"] = shard._asdict()
+    final = finalize(bucket, prefix, dataset, kwargs["tipo_entidad"], kwargs["run_date"], shard, consolidated_object)
+    if final is not None:
+        res["finalized"] = final
+    return res
+
+
+def _merge_staging(records: List[dict]) -> Optional[dict]:
+    loads = [r["bq_staging"] for r in records if r.get("bq_staging")]
+    if not loads:
+        return None
+    return {
+        "table": loads[0]["table"],
+        "periods": sorted(p for x in loads for p in x["periods"]),
+        "rows": sum(x["rows"] for x in loads),
+        "jobs": [j for x in loads for j in x["jobs"]],
+    }
+
+
+def finalize(bucket: str, prefix: str, dataset: str, tipo_entidad: str, run_date: str, shard: Shard,
+             consolidated_object: Callable[..., str]) -> Optional[dict]:
+    """
+    Si ya terminaron las `shard.count` tareas, arma el consolidado (layout
+    consolidated) y el manifest con los archivos por período de todas. Devuelve un
+    resultado con la forma del de los harvesters (entrada del orquestador BigQuery),
+    o None si faltan tareas u otra ya finalizó.
+    """
+    b = _storage_client().bucket(bucket)
+    root = _shard_dir(prefix, dataset, shard.execution)
+    records = [json.loads(x.download_as_bytes()) for x in b.list_blobs(prefix=f"{root}/shard-")]
+    if len(records) < shard.count:
+        log.info("[SHARD] %d/%d tareas terminadas; finaliza la última", len(records), shard.count)
+        return None
+
+    marker = b.blob(f"{root}/_finalized")
+    if not _create_once(marker, dt.datetime.utcnow().isoformat(timespec="seconds") + "Z", "text/plain"):
+        log.info("[SHARD] %s ya finalizada por otra tarea", shard.execution)
+        return None
+
+    try:
+        plan = json.loads(b.blob(f"{root}/plan.json").download_as_bytes())
+        months = [_parse_period(p) for p in plan["periods"]]
+        entries = {}
+        for record in records:
+            entries.update(record["entries"])
+        layout = next((r["layout"] for r in records if r.get("layout")), None)
+
+        consolidated_path = None
+        if layout != "period" and entries:
+            pieces = [_download_landing(bucket, entries[p]["path"].split(f"gs://{bucket}/", 1)[1])
+                      for p in sorted(entries)]
+            consolidated_path = _upload_landing(
+                consolidate(pieces), bucket, consolidated_object(prefix, dataset, tipo_entidad, run_date, months)
+            )
+        sizes = sorted(r["page_size"] for r in records if r.get("page_size"))
+        update_manifest(bucket, prefix, dataset, entries,
+                        tuning={"page_size": sizes[len(sizes) // 2]} if sizes else None)
+    except Exception:
+        marker.delete()  # permite reintentar la finalización
+        raise
+
+    staging = _merge_staging(records)
+    changes = {p: e["changes"] for p, e in entries.items() if "changes" in e}
+    log.info("[SHARD] %s finalizada: %d tareas, %d períodos", shard.execution, shard.count, len(entries))
+    return {
+        "saved": [entries[p]["path"] for p in sorted(entries)],
+        "consolidated": consolidated_path,
+        "rows": sum(e["rows"] for e in entries.values()),
+        "periods": sorted(entries),
+        "periods_loaded": len(entries),
+        "from": plan["periods"][0] if plan["periods"] else None,
+        "to": plan["periods"][-1] if plan["periods"] else None,
+        "layout": layout,
+        "shards": shard.count,
+        **plan["strategy"],
+        **({"bq_staging": staging} if staging else {}),
+        **({"changes": changes} if changes else {}),
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Finaliza a mano una ejecución con shards")
+    ap.add_argument("--execution", required=True, help="CLOUD_RUN_EXECUTION de la ejecución")
+    ap.add_argument("--kind", choices=["historical", "incremental"], required=True)
+    ap.add_argument("--tasks", type=int, help="número de tareas (default: las registradas)")
+    ap.add_argument("--bucket", default=os.getenv("GCS_BUCKET"))
+    ap.add_argument("--prefix", default=os.getenv("LANDING_PREFIX"))
+    ap.add_argument("--dataset", default=os.getenv("SB_DATASET", "simbad_carteras_aayp_hipotecarios"))
+    ap.add_argument("--tipo-entidad", default=os.getenv("SB_TIPO_ENTIDAD", "AAyP"))
+    ap.add_argument("--run-date", default=dt.date.today().isoformat())
+    args = ap.parse_args(argv)
+    if not args.bucket or not args.prefix:
+        ap.error("Faltan --bucket/--prefix (o GCS_BUCKET/LANDING_PREFIX)")
+
+    logging.basicConfig(level=logging.INFO)
+    if args.kind == "historical":
+        from .harvester import consolidated_object
+    else:
+        from .harvester_incremental import consolidated_object
+    root = _shard_dir(args.prefix, args.dataset, args.execution)
+    count = args.tasks or len(list(_storage_client().bucket(args.bucket).list_blobs(prefix=f"{root}/shard-")))
+    shard = Shard(index=0, count=count, execution=args.execution)
+    res = finalize(args.bucket, args.prefix, args.dataset, args.tipo_entidad, args.run_date, shard, consolidated_object)
+    print(json.dumps(res, indent=2, default=str))
+    return 0 if res is not None else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
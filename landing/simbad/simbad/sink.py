@@ -0,0 +1,152 @@
+# landing/simbad/simbad/sink.py
+import io
+import os
+import logging
+from functools import lru_cache
+
+import pandas as pd
+from google.cloud import storage
+
+from .gcs_common import put_if_changed
+from .lock import ensure_lease
+from .tracing import span
+from .transform import DERIVED_COLUMNS, MEASURE_COLUMNS
+
+log = logging.getLogger("simbad.sink")
+
+# Formato de los archivos de landing: csv (default), parquet o arrow (IPC).
+# Parquet lo leen directo BigQuery (load job) y Spark; IPC es para consumo local.
+LANDING_FORMAT = os.getenv("SB_LANDING_FORMAT", "csv").lower()
+LANDING_EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+_COUNT_COLUMNS = ("cantidadPlasticos", "cantidadCredito")
+_CONTENT_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+# SB_SKIP_IDENTICAL=true (default): no re-subir un objeto que ya tiene el mismo
+# contenido (CRC32C, o MD5, de sus metadatos); su generación no cambia y los
+# consumidores que reaccionan a escrituras no reprocesan
+SKIP_IDENTICAL = os.getenv("SB_SKIP_IDENTICAL", "true").lower() == "true"
+_PRECONDITION_RETRIES = 3
+
+
+@lru_cache(maxsize=1)
+def _storage_client() -> storage.Client:
+    """Cliente GCS compartido por todo el proceso (evita re-autenticar en cada subida)."""
+    return storage.Client()
+
+
+def _same_object(a, b) -> bool:
+    """True si dos blobs listados tienen el mismo contenido según sus checksums de GCS."""
+    if a.crc32c and b.crc32c:
+        return a.crc32c == b.crc32c
+    return bool(a.md5_hash) and a.md5_hash == b.md5_hash
+
+
+def _put(bucket: str, object_name: str, data: bytes, content_type: str) -> bool:
+    """
+    Sube `data` salvo que el objeto ya tenga ese contenido (SB_SKIP_IDENTICAL). La
+    escritura lleva `if_generation_match` de la generación comparada: si otro
+    escritor cambió el objeto entre medio se vuelve a comparar. True si subió.
+    """
+    return put_if_changed(_storage_client().bucket(bucket), object_name, data, content_type,
+                          skip_identical=SKIP_IDENTICAL, retries=_PRECONDITION_RETRIES)
+
+
+def _upload_bytes(data: bytes, rows: int, bucket: str, object_name: str, content_type: str) -> str:
+    """Sube (o salta, si es idéntico) un archivo ya serializado y devuelve la ruta gs://."""
+    with span("upload", object=object_name) as sp:
+        uploaded = _put(bucket, object_name, data, content_type)
+        sp.set(bytes=len(data) if uploaded else 0, rows=rows, skipped=not uploaded)
+    path = f"gs://{bucket}/{object_name}"
+    if uploaded:
+        log.info("[WRITE] %s (%d filas)", path, rows)
+    else:
+        log.info("[SKIP] %s ya tiene el mismo contenido (%d filas)", path, rows)
+    return path
+
+
+def _upload_csv_to_gcs(df: pd.DataFrame, bucket: str, object_name: str) -> str:
+    """Sube DataFrame como CSV a GCS (salvo que ya sea idéntico) y devuelve la ruta gs://."""
+    # CSV en memoria (para no escribir disco)
+    with span("serialize", format="csv") as sp:
+        buf = io.StringIO()
+        df.to_csv(buf, index=False)
+        data = buf.getvalue().encode("utf-8")
+        sp.set(bytes=len(data), rows=len(df))
+    return _upload_bytes(data, len(df), bucket, object_name, "text/csv")
+
+
+def _to_arrow(df: pd.DataFrame):
+    """
+    DataFrame de landing → pyarrow.Table tipada: medidas float64 (conteos int64 si
+    son enteros), derivadas date32/int64, resto string. Los tipos quedan en el archivo, así que Spark y
+    BigQuery no vuelven a parsear texto.
+    """
+    import pyarrow as pa
+
+    cols = {}
+    for c in df.columns:
+        s = df[c]
+        if c in MEASURE_COLUMNS:
+            if not pd.api.types.is_numeric_dtype(s):
+                s = pd.to_numeric(s.astype("string").str.replace(r"[,$]", "", regex=True), errors="coerce")
+            s = s.astype("float64")
+            if c in _COUNT_COLUMNS and (s.dropna() == s.dropna().round()).all():
+                cols[c] = pa.array(s.astype("Int64"), type=pa.int64(), from_pandas=True)
+            else:
+                cols[c] = pa.array(s, type=pa.float64(), from_pandas=True)
+        elif c == "periodo_date":
+            cols[c] = pa.array(pd.to_datetime(s, errors="coerce").dt.date, type=pa.date32(), from_pandas=True)
+        elif c in DERIVED_COLUMNS:
+            cols[c] = pa.array(pd.to_numeric(s, errors="coerce").astype("Int64"), type=pa.int64(), from_pandas=True)
+        else:
+            cols[c] = pa.array(s.astype("string"), type=pa.string(), from_pandas=True)
+    return pa.table(cols)
+
+
+def _landing_object(object_name: str, fmt: str = None) -> str:
+    """Cambia la extensión .csv de una ruta de landing por la del formato activo."""
+    ext = LANDING_EXTENSIONS[fmt or LANDING_FORMAT]
+    return object_name[:-4] + ext if object_name.endswith(".csv") else object_name
+
+
+def _upload_landing(df: pd.DataFrame, bucket: str, object_name: str, fmt: str = None) -> str:
+    """Sube un archivo de landing en el formato configurado (SB_LANDING_FORMAT)."""
+    ensure_lease()
+    fmt = fmt or LANDING_FORMAT
+    if fmt not in LANDING_EXTENSIONS:
+        raise ValueError(f"SB_LANDING_FORMAT inválido: {fmt} (csv, parquet o arrow)")
+    object_name = _landing_object(object_name, fmt)
+    if fmt == "csv":
+        return _upload_csv_to_gcs(df, bucket, object_name)
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    with span("serialize", format=fmt) as sp:
+        table = _to_arrow(df)
+        sink = pa.BufferOutputStream()
+        if fmt == "parquet":
+            pq.write_table(table, sink, compression="zstd")
+        else:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        data = sink.getvalue().to_pybytes()
+        sp.set(bytes=len(data), rows=len(df))
+    return _upload_bytes(data, len(df), bucket, object_name, _CONTENT_TYPES[fmt])
+
+
+def _download_landing(bucket: str, object_name: str) -> pd.DataFrame:
+    """Lee un archivo de landing (CSV, Parquet o Arrow IPC) de GCS; CSV todo como texto."""
+    data = _storage_client().bucket(bucket).blob(object_name).download_as_bytes()
+    if object_name.endswith(".csv"):
+        return pd.read_csv(io.BytesIO(data), dtype=str)
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if object_name.endswith(".parquet"):
+        return pq.read_table(pa.BufferReader(data)).to_pandas()
+    return pa.ipc.open_file(pa.BufferReader(data)).read_all().to_pandas()
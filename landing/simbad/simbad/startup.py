@@ -0,0 +1,123 @@
+# landing/simbad/simbad/startup.py
+"""
+Arranque liviano de los servicios (cold start en Cloud Run).
+
+`import simbad` y `simbad.metrics` no cargan pandas, requests ni los clientes de
+Google: los servicios importan el harvester dentro de cada handler, así que
+`/healthz` responde antes de tenerlos. Para no pagar esas importaciones en la
+primera corrida, `warm_up` las adelanta (SB_WARMUP):
+
+- `none` (default): todo se carga en el primer request que lo necesita.
+- `background`: un hilo importa y crea el cliente GCS mientras el servicio ya responde.
+- `blocking`: lo hace antes de aceptar tráfico (comportamiento anterior).
+
+Reporte de tiempos de importación (`python -X importtime` en un proceso limpio):
+    python -m simbad.startup --module main_simbad [--top 20]
+"""
+import os
+import re
+import sys
+import time
+import json
+import logging
+import argparse
+import importlib
+import threading
+import subprocess
+from typing import Iterable, List, Optional
+
+log = logging.getLogger("simbad.startup")
+
+WARMUP = os.getenv("SB_WARMUP", "none").lower()
+HEAVY_MODULES = (
+    "pandas",
+    "requests",
+    "google.cloud.storage",
+    "simbad.harvester",
+    "simbad.harvester_incremental",
+    "simbad.orchestrator",
+)
+_IMPORTTIME_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)")
+
+
+def warm_up(modules: Iterable[str] = HEAVY_MODULES, storage_client: bool = True) -> dict:
+    """Importa `modules` (y crea el cliente GCS compartido); devuelve segundos por paso."""
+    timings = {}
+    for name in modules:
+        t0 = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            log.warning("[WARMUP] %s no disponible: %s", name, e)
+            continue
+        timings[name] = round(time.perf_counter() - t0, 3)
+    if storage_client:
+        t0 = time.perf_counter()
+        try:
+            from .sink import _storage_client
+            _storage_client()
+            timings["storage_client"] = round(time.perf_counter() - t0, 3)
+        except Exception as e:  # sin credenciales (local): la primera subida lo reintentará
+            log.warning("[WARMUP] cliente GCS no creado: %s", e)
+    log.info("[WARMUP] %s", timings)
+    return timings
+
+
+def start_warm_up(mode: Optional[str] = None) -> Optional[threading.Thread]:
+    """Aplica SB_WARMUP al arrancar el servicio; devuelve el hilo en modo `background`."""
+    mode = (mode or WARMUP).lower()
+    if mode == "blocking":
+        warm_up()
+    elif mode == "background":
+        thread = threading.Thread(target=warm_up, name="simbad-warmup", daemon=True)
+        thread.start()
+        return thread
+    elif mode != "none":
+        raise ValueError(f"SB_WARMUP inválido: {mode} (none, background o blocking)")
+    return None
+
+
+def import_report(module: str, top: int = 20, python: str = sys.executable) -> dict:
+    """
+    Importa `module` en un proceso limpio con `-X importtime` y devuelve el total y
+    los `top` paquetes de primer nivel que más tiempo acumulan (ms, inclusivo).
+    """
+    proc = subprocess.run([python, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)})
+    if proc.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {module}: {proc.stderr.strip().splitlines()[-1:]}")
+
+    rows: List[tuple] = []
+    for line in proc.stderr.splitlines():
+        m = _IMPORTTIME_RE.match(line)
+        if m:
+            rows.append((m.group(3), int(m.group(2))))
+
+    # El módulo pedido es el último en cerrarse; por paquete, el mayor inclusivo
+    # de sus módulos (google.cloud.* cuenta por separado)
+    total_us = next((us for name, us in reversed(rows) if name == module), 0)
+    packages = {}
+    for name, us in rows:
+        parts = name.split(".")
+        key = ".".join(parts[:3]) if parts[:2] == ["google", "cloud"] else parts[0]
+        packages[key] = max(packages.get(key, 0), us)
+    ranked = sorted(packages.items(), key=lambda kv: -kv[1])[:top]
+    return {
+        "module": module,
+        "total_ms": round(total_us / 1000, 1),
+        "top_ms": {name: round(us / 1000, 1) for name, us in ranked},
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Tiempo de importación de un módulo en frío")
+    ap.add_argument("--module", action="append", help="módulo a medir (repetible); default: simbad, main_simbad")
+    ap.add_argument("--top", type=int, default=20)
+    args = ap.parse_args(argv)
+    modules = args.module or ["simbad", "main_simbad"]
+    print(json.dumps([import_report(m, args.top) for m in modules], indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
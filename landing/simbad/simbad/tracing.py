@@ -0,0 +1,197 @@
+# landing/simbad/simbad/tracing.py
+"""
+Trazas de las corridas: un span por corrida, período, página, parseo y subida,
+con duración, bytes y filas.
+
+Cada corrida (`traced_run`) acumula en proceso un resumen por nombre de span que
+los harvesters devuelven en `trace` (y por lo tanto en `/run` y en los runners).
+Los spans concurrentes suman su tiempo, así que `total_s` puede superar `wall_s`.
+
+Con SB_TRACE_EXPORTER=console|file|otlp y el SDK de OpenTelemetry instalado, los
+mismos spans se exportan además como trazas OTel (`file` escribe JSON por línea
+en SB_TRACE_FILE). Sin SDK o con `none` (default) solo queda el resumen.
+"""
+import os
+import time
+import atexit
+import logging
+import inspect
+import threading
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Callable, List, Optional
+
+log = logging.getLogger("simbad.tracing")
+
+TRACE_EXPORTER = os.getenv("SB_TRACE_EXPORTER", "none").lower()
+TRACE_FILE = os.getenv("SB_TRACE_FILE", "simbad_trace.jsonl")
+SERVICE_NAME = os.getenv("K_SERVICE", "simbad-harvester")
+
+_ATTR_PREFIX = "simbad."
+_RUN_LABELS = ("dataset", "tipo_entidad")
+_current: ContextVar[Optional["RunSummary"]] = ContextVar("simbad_trace", default=None)
+_listeners: List[Callable[[str, float, dict, dict], None]] = []
+
+
+class RunSummary:
+    """Acumulado por nombre de span de una corrida (seguro entre hilos)."""
+
+    def __init__(self, labels: Optional[dict] = None):
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self.labels = labels or {}
+        self.trace_id: Optional[str] = None
+        self.spans = {}
+
+    def add(self, name: str, seconds: float, attrs: dict) -> None:
+        with self._lock:
+            agg = self.spans.setdefault(name, {"count": 0, "total_s": 0.0, "max_s": 0.0, "bytes": 0, "rows": 0})
+            agg["count"] += 1
+            agg["total_s"] += seconds
+            agg["max_s"] = max(agg["max_s"], seconds)
+            agg["bytes"] += int(attrs.get("bytes") or 0)
+            agg["rows"] += int(attrs.get("rows") or 0)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            spans = {
+                name: {**agg, "total_s": round(agg["total_s"], 4), "max_s": round(agg["max_s"], 4)}
+                for name, agg in sorted(self.spans.items(), key=lambda kv: -kv[1]["total_s"])
+            }
+        out = {"wall_s": round(time.perf_counter() - self._started, 4), "spans": spans}
+        if self.trace_id:
+            out["trace_id"] = self.trace_id
+        return out
+
+
+class _SpanAttrs:
+    """Atributos de un span abierto; `set` permite añadir bytes/filas al final."""
+
+    __slots__ = ("attrs", "otel")
+
+    def __init__(self, attrs: dict, otel=None):
+        self.attrs = attrs
+        self.otel = otel
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+
+def add_listener(fn: Callable[[str, float, dict, dict], None]) -> None:
+    """Registra `fn(nombre, segundos, atributos, etiquetas_de_corrida)` al cerrar cada span."""
+    if fn not in _listeners:
+        _listeners.append(fn)
+
+
+def _exporter():
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+    if TRACE_EXPORTER == "console":
+        return ConsoleSpanExporter()
+    if TRACE_EXPORTER == "file":
+        out = open(TRACE_FILE, "a", encoding="utf-8")
+        atexit.register(out.close)
+        return ConsoleSpanExporter(out=out, formatter=lambda s: s.to_json(indent=None) + "\n")
+    if TRACE_EXPORTER == "otlp":
+        # Endpoint por OTEL_EXPORTER_OTLP_ENDPOINT (p. ej. un colector local)
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    raise ValueError(f"SB_TRACE_EXPORTER inválido: {TRACE_EXPORTER} (none, console, file u otlp)")
+
+
+@lru_cache(maxsize=1)
+def _tracer():
+    """Tracer OTel si hay exportador configurado y SDK instalado; None en otro caso."""
+    if TRACE_EXPORTER in ("", "none"):
+        return None
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        exporter = _exporter()
+    except ImportError as e:
+        log.warning("SB_TRACE_EXPORTER=%s sin SDK de OpenTelemetry (%s); solo resumen en proceso",
+                    TRACE_EXPORTER, e)
+        return None
+
+    # Provider propio (no el global) para no interferir con otra instrumentación;
+    # se vacía al salir del proceso (shutdown_on_exit)
+    provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    return provider.get_tracer("simbad")
+
+
+def _otel_attrs(attrs: dict) -> dict:
+    return {_ATTR_PREFIX + k: v for k, v in attrs.items() if isinstance(v, (str, bool, int, float))}
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    Mide un tramo del pipeline. Uso:
+
+        with span("upload", periodo="2024-05") as s:
+            ...
+            s.set(bytes=n, rows=len(df))
+    """
+    rec = _SpanAttrs(attrs)
+    tracer = _tracer()
+    t0 = time.perf_counter()
+    try:
+        if tracer is None:
+            yield rec
+        else:
+            with tracer.start_as_current_span(name, attributes=_otel_attrs(attrs)) as otel:
+                rec.otel = otel
+                try:
+                    yield rec
+                finally:
+                    otel.set_attributes(_otel_attrs(rec.attrs))
+    finally:
+        seconds = time.perf_counter() - t0
+        summary = _current.get()
+        if summary is not None:
+            summary.add(name, seconds, rec.attrs)
+        for fn in _listeners:
+            try:
+                fn(name, seconds, rec.attrs, summary.labels if summary is not None else {})
+            except Exception:
+                log.exception("Listener de spans falló en %s", name)
+
+
+def traced_run(name: str) -> Callable:
+    """Decorador de harvesters: abre el span raíz y añade `trace` al dict devuelto."""
+
+    def deco(fn: Callable) -> Callable:
+        sig = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = sig.bind_partial(*args, **kwargs).arguments
+            summary = RunSummary({k: str(bound.get(k) or "") for k in _RUN_LABELS})
+            token = _current.set(summary)
+            try:
+                with span(name, root=True) as root:
+                    if root.otel is not None:
+                        summary.trace_id = format(root.otel.get_span_context().trace_id, "032x")
+                    res = fn(*args, **kwargs)
+                    if isinstance(res, dict):
+                        root.set(rows=res.get("rows"))
+            finally:
+                _current.reset(token)
+            if isinstance(res, dict):
+                res["trace"] = summary.to_dict()
+            return res
+
+        return wrapper
+
+    return deco
+
+
+def format_summary(trace: dict, top: int = 5) -> str:
+    """Línea legible con los spans que más tiempo acumulan (para logs de los runners)."""
+    spans = list(trace.get("spans", {}).items())[:top]
+    parts = [f"{name} {agg['total_s']:.2f}s×{agg['count']}" for name, agg in spans]
+    return f"{trace.get('wall_s', 0):.2f}s total; " + ", ".join(parts)
@@ -0,0 +1,231 @@
+# landing/simbad/simbad/transform.py
+import os
+import hashlib
+import datetime as dt
+from functools import lru_cache
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# Orden y columnas recomendadas para los CSV de landing
+PREFERRED_COLUMNS = [
+    "periodo","tipoCredito","tipoEntidad","entidad","sectorEconomico","region","provincia",
+    "moneda","tipoCartera","actividad","sector","persona","facilidad","residencia",
+    "administracionYPropiedad","genero","tipoCliente","clasificacionEntidad",
+    "cantidadPlasticos","cantidadCredito","deuda","tasaPorDeuda","deudaCapital",
+    "deudaVencida","deudaVencidaDe31A90Dias","valorDesembolso","valorGarantia",
+    "valorProvisionCapitalYRendimiento"
+]
+
+# Medidas; el resto de PREFERRED_COLUMNS son dimensiones que identifican un hecho
+MEASURE_COLUMNS = [
+    "cantidadPlasticos","cantidadCredito","deuda","tasaPorDeuda","deudaCapital",
+    "deudaVencida","deudaVencidaDe31A90Dias","valorDesembolso","valorGarantia",
+    "valorProvisionCapitalYRendimiento"
+]
+DIMENSION_COLUMNS = [c for c in PREFERRED_COLUMNS if c not in MEASURE_COLUMNS]
+ROW_KEY = "row_key"
+# Columnas de Silver calculadas en el harvest (SB_DERIVED_COLUMNS); van tras row_key
+DERIVED_COLUMNS = [
+    "periodo_date", "anio", "mes", "periodo_ym", "flg_periodo_invalido", "flg_importe_negativo"
+]
+DERIVE_COLUMNS = os.getenv("SB_DERIVED_COLUMNS", "true").lower() == "true"
+_ROW_KEY_SEP = "\x1f"
+
+
+def _row_key(df: pd.DataFrame) -> pd.Series:
+    """
+    Clave estable de fila: sha256 (hex, 32 chars) de las dimensiones + periodo
+    recortadas y unidas por U+001F (NULL → ''). Igual que la UDF
+    `bronze.simbad_row_key`, de modo que SQL y Python generan la misma clave.
+    """
+    # Las dimensiones se repiten mucho: se numera cada combinación distinta
+    # (factorize por columna) y solo esas se recortan, unen y hashean
+    combo = np.zeros(len(df), dtype=np.int64)
+    codes, texts = {}, {}
+    for c in DIMENSION_COLUMNS:
+        if c not in df.columns:
+            continue
+        col_codes, uniques = pd.factorize(df[c])
+        # NULL (código -1) → '' con el último elemento
+        texts[c] = np.array(pd.Series(uniques, dtype=object).astype("string").str.strip().fillna("").tolist() + [""],
+                            dtype=object)
+        codes[c] = col_codes
+        combo, _ = pd.factorize(combo * (len(uniques) + 1) + col_codes + 1)
+
+    first = np.unique(combo, return_index=True)[1]
+    empty = np.full(len(first), "", dtype=object)
+    columns = [texts[c][codes[c][first]] if c in codes else empty for c in DIMENSION_COLUMNS]
+    keys = np.array([hashlib.sha256(_ROW_KEY_SEP.join(values).encode("utf-8")).hexdigest()[:32]
+                     for values in zip(*columns)], dtype=object)
+    return pd.Series(keys[combo], index=df.index, dtype="string")
+
+
+def _filter_hipotecarios(df: pd.DataFrame) -> pd.DataFrame:
+    """Filtra solo créditos hipotecarios y normaliza la columna periodo."""
+    if df.empty:
+        return df
+    # Columna esperada "tipoCartera" en la API v2
+    if "tipoCartera" in df.columns:
+        df = df[df["tipoCartera"].astype(str).str.lower() == "créditos hipotecarios".lower()]
+    # Normaliza nombre de periodo
+    if "periodo" in df.columns:
+        # asegurar YYYY-MM
+        df["periodo"] = df["periodo"].astype(str)
+    else:
+        df["periodo"] = df["__periodo"]
+    return df
+
+
+def _order_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Reordena columnas: primero las preferidas, row_key y derivadas, luego el resto en su orden original."""
+    first = [c for c in PREFERRED_COLUMNS + [ROW_KEY] + DERIVED_COLUMNS if c in df.columns]
+    cols = first + [c for c in df.columns if c not in first]
+    return df[cols]
+
+
+# Columnas y tipos de silver_clean.simbad_hipotecarios (staging BigQuery)
+SILVER_STRING_COLUMNS = [
+    "periodo", "tipoCliente", "actividad", "entidad", "sector", "moneda",
+    "provincia", "residencia", "genero", "persona",
+]
+SILVER_FLOAT_COLUMNS = [
+    "deudaCapital", "deudaVencida", "deudaVencidaDe31A90Dias", "valorDesembolso",
+    "valorGarantia", "valorProvisionCapitalYRendimiento", "deuda",
+]
+SILVER_COLUMNS = (
+    SILVER_STRING_COLUMNS
+    + ["deudaCapital", "deudaVencida", "deudaVencidaDe31A90Dias", "cantidadCredito",
+       "valorDesembolso", "valorGarantia", "valorProvisionCapitalYRendimiento", "deuda"]
+    + DERIVED_COLUMNS + ["dt_captura", ROW_KEY]
+)
+_PERIODO_FORMATS = ["%Y-%m", "%Y/%m", "%m/%Y", "%Y%m"]
+
+# Proyección de landing (SB_PROJECTION): columnas de la API que se conservan tras
+# calcular row_key y las derivadas. `full` (default) todas; `silver` solo las que usa
+# silver_clean.simbad_hipotecarios; o una lista `periodo,entidad,...`. Las no
+# proyectadas se escriben vacías para que los lectores posicionales sigan alineados.
+PROJECTIONS = {
+    "full": None,
+    "silver": [c for c in PREFERRED_COLUMNS if c in SILVER_COLUMNS],
+}
+PROJECTION = os.getenv("SB_PROJECTION", "full")
+_KEEP_ALWAYS = [ROW_KEY, "__periodo"] + DERIVED_COLUMNS
+
+
+def _projection_columns(projection: Optional[str] = None) -> Optional[List[str]]:
+    """Columnas de la API que conserva `projection` (default SB_PROJECTION); None = todas."""
+    projection = projection or PROJECTION
+    if projection.lower() in PROJECTIONS:
+        return PROJECTIONS[projection.lower()]
+    cols = [c.strip() for c in projection.split(",") if c.strip()]
+    unknown = [c for c in cols if c not in PREFERRED_COLUMNS]
+    if not cols or unknown:
+        raise ValueError(f"SB_PROJECTION inválido: {projection} (full, silver o columnas de PREFERRED_COLUMNS)")
+    return [c for c in PREFERRED_COLUMNS if c in cols]
+
+
+def _project(df: pd.DataFrame, columns: Optional[List[str]]) -> pd.DataFrame:
+    """Deja en memoria solo `columns`, row_key, derivadas y __periodo (sin cambios con None)."""
+    if columns is None:
+        return df
+    keep = set(columns) | set(_KEEP_ALWAYS)
+    return df[[c for c in df.columns if c in keep]]
+
+
+def _landing_layout(df: pd.DataFrame, columns: Optional[List[str]]) -> pd.DataFrame:
+    """
+    Frame a escribir con proyección: todas las PREFERRED_COLUMNS (vacías las no
+    proyectadas), row_key y derivadas, sin __periodo ni columnas extra de la API.
+    """
+    if columns is None:
+        return df
+    return df.reindex(columns=PREFERRED_COLUMNS + [c for c in [ROW_KEY] + DERIVED_COLUMNS if c in df.columns])
+
+
+def _clean_number(s: pd.Series) -> pd.Series:
+    """Igual que REGEXP_REPLACE + SAFE_CAST del SP: quita [,$] y basura; NULL si no parsea."""
+    if pd.api.types.is_numeric_dtype(s):
+        return s.astype("float64").fillna(0.0)
+    s = s.astype("string").fillna("0").str.replace(r"[,$]", "", regex=True).str.replace(r"[^0-9.-]", "", regex=True)
+    return pd.to_numeric(s, errors="coerce").astype("float64")
+
+
+@lru_cache(maxsize=4096)
+def _periodo_fields(value: str) -> tuple:
+    """(periodo_date ISO, anio, mes, periodo_ym, flg_periodo_invalido) de un valor de período ya recortado."""
+    for fmt in _PERIODO_FORMATS:
+        try:
+            d = dt.datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+        return d.isoformat(), d.year, d.month, d.year * 100 + d.month, 0
+    return None, None, None, None, 1
+
+
+def _derived_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Fecha del período, año/mes y flags de calidad de Silver (misma semántica que
+    los SP), vectorizados. Las columnas de período se calculan por valor distinto
+    (pocos por archivo) y se expanden por código de factorize. `periodo_date` va
+    como texto ISO, que es lo que se escribe en landing.
+    """
+    periodo = df["periodo"].astype("string").str.strip() if "periodo" in df.columns \
+        else pd.Series(pd.NA, index=df.index, dtype="string")
+    codes, uniques = pd.factorize(periodo)
+    # Los nulos quedan con código -1: la última entrada (inválida) los cubre
+    fields = list(zip(*([_periodo_fields(v) for v in uniques] + [_periodo_fields("")])))
+    out = pd.DataFrame({
+        "periodo_date": np.array(fields[0], dtype=object)[codes],
+        "anio": pd.array(fields[1], dtype="Int64")[codes],
+        "mes": pd.array(fields[2], dtype="Int64")[codes],
+        "periodo_ym": pd.array(fields[3], dtype="Int64")[codes],
+        "flg_periodo_invalido": np.array(fields[4], dtype="int64")[codes],
+    }, index=df.index)
+
+    negative = np.zeros(len(df), dtype=bool)
+    for c in ("deudaCapital", "deudaVencida", "deuda"):
+        if c in df.columns:
+            negative |= (_clean_number(df[c]) < 0).to_numpy()
+    out["flg_importe_negativo"] = negative.astype("int64")
+    return out
+
+
+def _typed_derived(df: pd.DataFrame) -> pd.DataFrame:
+    """Columnas derivadas (de landing CSV/Parquet o de `_derived_columns`) con los tipos de Silver."""
+    out = pd.DataFrame(index=df.index)
+    out["periodo_date"] = pd.to_datetime(df["periodo_date"], format="%Y-%m-%d", errors="coerce").dt.date
+    for c in ["anio", "mes", "periodo_ym"]:
+        out[c] = pd.to_numeric(df[c], errors="coerce").astype("Int64")
+    for c in ["flg_periodo_invalido", "flg_importe_negativo"]:
+        out[c] = pd.to_numeric(df[c], errors="coerce").fillna(0).astype("int64")
+    return out
+
+
+def _to_silver_frame(df: pd.DataFrame, dt_captura: str) -> pd.DataFrame:
+    """
+    Filas ya filtradas → tipos y columnas derivadas de Silver (misma limpieza que
+    sp_process_landing_to_silver_incremental), listas para un load job a BigQuery.
+    """
+    out = pd.DataFrame(index=df.index)
+    for c in SILVER_STRING_COLUMNS:
+        out[c] = df[c].astype("string").str.strip() if c in df.columns else pd.Series(pd.NA, index=df.index, dtype="string")
+    for c in SILVER_FLOAT_COLUMNS:
+        out[c] = _clean_number(df[c]) if c in df.columns else float("nan")
+
+    cantidad = pd.to_numeric(df["cantidadCredito"], errors="coerce") if "cantidadCredito" in df.columns \
+        else pd.Series(float("nan"), index=df.index)
+    out["cantidadCredito"] = cantidad.where(cantidad == cantidad.round()).astype("Int64")
+
+    # Landing escrito con SB_DERIVED_COLUMNS ya las trae; archivos anteriores las calculan
+    derived = _typed_derived(df if set(DERIVED_COLUMNS) <= set(df.columns) else _derived_columns(out))
+    for c in DERIVED_COLUMNS:
+        out[c] = derived[c]
+    out["dt_captura"] = pd.Timestamp(dt_captura).date()
+    out[ROW_KEY] = df[ROW_KEY] if ROW_KEY in df.columns else _row_key(df)
+
+    # Filtros de calidad del SP
+    out = out[out["entidad"].notna() & out["provincia"].notna()]
+    return out[SILVER_COLUMNS].reset_index(drop=True)
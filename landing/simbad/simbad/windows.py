@@ -0,0 +1,78 @@
+# landing/simbad/simbad/windows.py
+"""
+Ventanas de meses consecutivos para pedir a la API en un solo rango
+(`periodoInicial`..`periodoFinal`) y separar por `periodo` del lado del cliente.
+
+El tamaño se adapta a las filas por mes observadas en la corrida: la ventana
+crece mientras la estimación quepa en SB_RANGE_TARGET_ROWS (por defecto una
+página del tamaño adaptativo actual), hasta SB_RANGE_MONTHS meses. Mientras no
+hay observaciones se pide un mes suelto como sonda. Así un backfill de meses
+escasos pasa de una cadena de requests por mes a una por ventana.
+SB_RANGE_MONTHS=1 vuelve a pedir mes a mes.
+"""
+import os
+import threading
+from collections import deque
+from typing import Callable, List, Optional
+
+from .periods import Period
+from .ratelimit import DEFAULT_PAGE_SIZE
+
+RANGE_MONTHS = int(os.getenv("SB_RANGE_MONTHS", "12"))
+RANGE_TARGET_ROWS = int(os.getenv("SB_RANGE_TARGET_ROWS", "0"))  # 0: una página
+_EWMA_ALPHA = 0.5
+
+
+def _index(p: Period) -> int:
+    return p[0] * 12 + p[1]
+
+
+def _extends(window: List[Period], p: Period) -> bool:
+    """`p` sigue a la ventana: mes consecutivo, en el mismo sentido (ascendente o descendente)."""
+    step = _index(p) - _index(window[-1])
+    return abs(step) == 1 and (len(window) == 1 or step == _index(window[-1]) - _index(window[-2]))
+
+
+class RangePlanner:
+    """
+    Reparte `periods` en ventanas a medida que los workers las piden (seguro entre
+    hilos). Solo agrupa meses consecutivos en el orden recibido (cronológico o, con
+    SB_PRIORITY=recent, del más reciente al más antiguo); cada ventana sale en
+    orden cronológico para pedirla como rango. Sin `target_rows`
+    (ni SB_RANGE_TARGET_ROWS) el objetivo es `page_size()`.
+    """
+
+    def __init__(self, periods: List[Period], max_months: Optional[int] = None,
+                 target_rows: Optional[int] = None, page_size: Optional[Callable[[], int]] = None):
+        self.max_months = max(1, max_months or RANGE_MONTHS)
+        self._target_rows = target_rows or RANGE_TARGET_ROWS
+        self._page_size = page_size or (lambda: DEFAULT_PAGE_SIZE)
+        self._pending = deque(periods)
+        self._rows_per_month: Optional[float] = None
+        self._lock = threading.Lock()
+        self.windows = 0
+
+    def next(self) -> List[Period]:
+        """Siguiente ventana; lista vacía cuando no quedan períodos."""
+        with self._lock:
+            if not self._pending:
+                return []
+            window = [self._pending.popleft()]
+            if self._rows_per_month is not None:
+                per_month = max(1.0, self._rows_per_month)
+                target = self._target_rows or self._page_size()
+                while (self._pending and len(window) < self.max_months
+                       and _extends(window, self._pending[0])
+                       and (len(window) + 1) * per_month <= target):
+                    window.append(self._pending.popleft())
+            self.windows += 1
+            return sorted(window)
+
+    def observe(self, months: int, rows: int) -> None:
+        """Registra las filas crudas que devolvió una ventana de `months` meses."""
+        per_month = rows / max(1, months)
+        with self._lock:
+            if self._rows_per_month is None:
+                self._rows_per_month = per_month
+            else:
+                self._rows_per_month += _EWMA_ALPHA * (per_month - self._rows_per_month)
@@ -0,0 +1,34 @@
+# landing/simbad/tests/conftest.py
+"""
+Pruebas de la librería simbad sin GCP: GCS en memoria (`landing/benchmarks/fake_gcs.py`)
+y, para el lock, el backend de archivos local.
+
+    cd landing/simbad && python -m pytest -q
+"""
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SIMBAD_DIR = os.path.dirname(HERE)
+BENCHMARKS_DIR = os.path.join(os.path.dirname(SIMBAD_DIR), "benchmarks")
+sys.path[:0] = [SIMBAD_DIR, BENCHMARKS_DIR]
+
+import fake_gcs  # noqa: E402
+
+# Antes de importar simbad: `from google.cloud import storage` recibe el store en memoria
+fake_gcs.install()
+
+
+@pytest.fixture(autouse=True)
+def gcs():
+    """Store GCS en memoria, vacío en cada prueba."""
+    store = fake_gcs.FakeClient.store
+    with store.lock:
+        store.objects.clear()
+        store.generations.clear()
+        store.updated.clear()
+        store.bytes_written = 0
+        store.uploads = 0
+    return store
@@ -0,0 +1,80 @@
+# landing/simbad/tests/test_benchmarks.py
+"""
+Smoke test del benchmark offline (`landing/benchmarks`) al tamaño mínimo: todos
+los escenarios terminan y las filas y requests reportadas cuadran con las fixtures.
+"""
+import datetime as dt
+import math
+
+import pytest
+
+import run_benchmarks
+from fixtures import Fixtures
+from server import DATA360_PAGE_SIZE
+from simbad.periods import FullRange, Lookback, _fmt_period
+from simbad.windows import RANGE_MONTHS
+
+OPTS = {
+    "start_year": dt.date.today().year,
+    # 12 meses de filas caben en una página mínima: una request por ventana
+    "rows_per_month": 50,
+    "data360_rows": 10,
+    "lookback": 3,
+    "workers": 1,
+    "rate": 1000.0,
+    "keep_monthly": False,
+    "fixtures": None,
+    "verbose": False,
+}
+DATA360_PAGE_WINDOW = 8  # macroeconomics/main.py: páginas en vuelo en el cliente async
+
+
+def _hipotecarios(fixtures, periods):
+    return sum(r["tipoCartera"] == "Créditos Hipotecarios"
+               for p in periods for r in fixtures.sb_rows(_fmt_period(p)))
+
+
+def _sb_requests(months):
+    # Un mes suelto como sonda y después ventanas de hasta SB_RANGE_MONTHS (`simbad.windows`)
+    return 1 + math.ceil((months - 1) / RANGE_MONTHS)
+
+
+@pytest.fixture(scope="module")
+def results():
+    return {r["scenario"]: r for r in run_benchmarks.run(OPTS, run_benchmarks.SCENARIOS)}
+
+
+def test_all_scenarios_succeed(results):
+    assert sorted(results) == sorted(run_benchmarks.SCENARIOS)
+    for name, r in results.items():
+        assert r["ok"], (name, r.get("error"))
+
+
+@pytest.mark.parametrize("name", ["run_harvest", "run_harvest[async]"])
+def test_harvest_counts(results, name):
+    fixtures = Fixtures(rows_per_month=OPTS["rows_per_month"], data360_rows=OPTS["data360_rows"])
+    periods = FullRange(OPTS["start_year"]).periods()
+    assert results[name]["rows"] == _hipotecarios(fixtures, periods)
+    assert results[name]["requests"] == {"sb": _sb_requests(len(periods))}
+
+
+def test_incremental_counts(results):
+    fixtures = Fixtures(rows_per_month=OPTS["rows_per_month"], data360_rows=OPTS["data360_rows"])
+    periods = Lookback(OPTS["lookback"]).periods()
+    r = results["run_incremental_harvest"]
+    assert r["rows"] == _hipotecarios(fixtures, periods)
+    assert r["requests"] == {"sb": _sb_requests(len(periods))}
+
+
+@pytest.mark.parametrize("name", ["run_pipeline", "run_pipeline[async]"])
+def test_pipeline_counts(results, name):
+    fixtures = Fixtures(rows_per_month=OPTS["rows_per_month"], data360_rows=OPTS["data360_rows"])
+    powerbi = [fixtures.powerbi(kind)["results"][0]["result"]["data"]["dsr"]["DS"][0]["PH"][0]["DM0"]
+               for kind in ("inflacion", "tipo_cambio")]
+    assert results[name]["rows"] == sum(map(len, powerbi)) + len(fixtures.data360_values())
+
+    # Data360 pagina hasta una página vacía; el cliente async pide ventanas completas
+    pages = math.ceil(OPTS["data360_rows"] / DATA360_PAGE_SIZE) + 1
+    if "[async]" in name:
+        pages = math.ceil(pages / DATA360_PAGE_WINDOW) * DATA360_PAGE_WINDOW
+    assert results[name]["requests"] == {"powerbi": 2, "data360": pages}
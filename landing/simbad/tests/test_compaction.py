@@ -0,0 +1,81 @@
+# landing/simbad/tests/test_compaction.py
+import datetime as dt
+
+import pandas as pd
+
+from simbad.compaction import canonical_object, compact_periods, migrate_legacy, revision_object
+from simbad.manifest import load_manifest
+from simbad.sink import _download_landing, _upload_landing
+
+KW = dict(bucket="b", prefix="p", dataset="d")
+CANONICAL = "p/d/periodos/periodo=2025-01/carteras_AAyP_hipotecarios_2025-01.csv"
+
+
+def _frame(periodo: str, deuda: str) -> pd.DataFrame:
+    return pd.DataFrame({"periodo": [periodo], "entidad": ["BHD"], "deuda": [deuda]})
+
+
+def _revision(periodo: str, deuda: str, run_date: str = "2025-01-15") -> str:
+    obj = revision_object("p", "d", "AAyP", periodo, run_date)
+    return _upload_landing(_frame(periodo, deuda), "b", obj).split("gs://b/", 1)[1]
+
+
+def _deuda(name: str) -> list:
+    return _download_landing("b", name)["deuda"].tolist()
+
+
+def _names(gcs) -> list:
+    return sorted(n for (_, n) in gcs.objects)
+
+
+def test_newest_revision_becomes_canonical(gcs):
+    _upload_landing(_frame("2025-01", "0"), "b", CANONICAL, fmt="parquet")  # otro formato
+    _revision("2025-01", "1", "2025-01-14")
+    _revision("2025-01", "2", "2025-01-15")
+
+    out = compact_periods(**KW)
+    assert out["canonical"] == {"2025-01": f"gs://b/{CANONICAL}"}
+    assert out["retired"] == 3
+    assert _names(gcs) == [CANONICAL]
+    assert _deuda(CANONICAL) == ["2"]
+
+
+def test_identical_revision_is_not_copied(gcs):
+    _revision("2025-01", "1")
+    compact_periods(**KW)
+    generation = gcs.generations[("b", CANONICAL)]
+
+    _revision("2025-01", "1")
+    out = compact_periods(**KW, periods=["2025-01"])
+    assert gcs.generations[("b", CANONICAL)] == generation
+    assert out["retired"] == 1 and _names(gcs) == [CANONICAL]
+
+
+def test_dry_run_deletes_nothing(gcs):
+    _revision("2025-01", "1")
+    _revision("2025-01", "2")
+    before = dict(gcs.objects)
+
+    out = compact_periods(**KW, dry_run=True)
+    assert out["canonical"] == {"2025-01": f"gs://b/{CANONICAL}"} and out["retired"] == 2
+    assert gcs.objects == before
+
+
+def test_migrate_legacy_keeps_newest_file_per_period(gcs):
+    canonical_02 = canonical_object("p", "d", "AAyP", "2025-02")
+    _upload_landing(_frame("2025-02", "canonico"), "b", canonical_02)
+    consolidated = "p/d/dt=2025-01-15/consolidado.csv"
+    monthly = "p/d/monthly/periodo=2025-01/x_2025-01.csv"
+    _upload_landing(pd.concat([_frame("2025-01", "nuevo"), _frame("2025-02", "nuevo")]), "b", consolidated)
+    _upload_landing(_frame("2025-01", "viejo"), "b", monthly)
+    # Por nombre ganaría monthly/: decide el subido más recientemente
+    gcs.updated[("b", consolidated)] = dt.datetime(2025, 2, 1, tzinfo=dt.timezone.utc)
+    gcs.updated[("b", monthly)] = dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc)
+
+    out = migrate_legacy(**KW, tipo_entidad="AAyP")
+    assert out["canonical"] == {"2025-01": f"gs://b/{CANONICAL}"} and out["retired"] == 2
+    assert _names(gcs) == sorted([CANONICAL, canonical_02, "p/d/_manifest.json"])
+    assert _deuda(CANONICAL) == ["nuevo"]
+    # Un canónico existente nunca se pisa
+    assert _deuda(canonical_02) == ["canonico"]
+    assert load_manifest("b", "p", "d")["periods"]["2025-01"]["path"] == f"gs://b/{CANONICAL}"
@@ -0,0 +1,122 @@
+# landing/simbad/tests/test_delta.py
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from simbad import orchestrator
+from simbad.delta import OP_COLUMN, STATE_NAME, _load_state, promote_states, write_changeset
+from simbad.sink import _download_landing
+from simbad.transform import ROW_KEY
+
+KW = dict(bucket="b", prefix="p", dataset="d", tipo_entidad="AAyP", run_date="2025-01-15")
+DIR = "p/d/_delta/periodo=2025-01"
+APPLIED = f"{DIR}/{STATE_NAME}"
+
+
+def _piece(deuda: dict) -> pd.DataFrame:
+    """Un período con una fila por row_key: {row_key: deuda}."""
+    keys = list(deuda)
+    return pd.DataFrame({"periodo": "2025-01", "entidad": [f"E{k}" for k in keys],
+                         "deuda": [str(v) for v in deuda.values()], "__periodo": "2025-01", ROW_KEY: keys})
+
+
+def _objects(gcs, part):
+    return sorted(n for (_, n) in gcs.objects if part in n)
+
+
+def _applied(deuda: dict) -> None:
+    """Corrida base ya aplicada por el orquestador."""
+    out = write_changeset(_piece(deuda), **KW)
+    assert promote_states([out["state"]]) == [out["state"]]
+
+
+def test_period_without_state_is_base(gcs):
+    out = write_changeset(_piece({"a": 1, "b": 2}), **KW)
+    assert out["base"] and out["state"].startswith(f"gs://b/{DIR}/_state__")
+    assert _objects(gcs, "changes_") == []
+    # Pendiente hasta que Silver lo aplique
+    assert _load_state("b", APPLIED) is None
+
+    promote_states([out["state"]])
+    assert _objects(gcs, "_state") == [APPLIED]
+    assert sorted(_load_state("b", APPLIED).index) == ["a", "b"]
+
+
+def test_insert_update_delete_after_state_round_trip(gcs):
+    before = {f"k{i}": i for i in range(200)}
+    _applied(before)
+    state = _load_state("b", APPLIED)
+    assert state.dtype == "uint64" and (state > 2 ** 63).any()  # hashes que no caben en int64
+
+    after = {**{k: v for k, v in before.items() if k not in ("k0", "k1")}, "k5": -5, "nuevo": 7}
+    out = write_changeset(_piece(after), **KW)
+    assert (out["insert"], out["change"], out["delete"]) == (1, 1, 2)
+
+    changes = _download_landing("b", out["path"].split("gs://b/", 1)[1])
+    ops = dict(zip(changes[ROW_KEY], changes[OP_COLUMN]))
+    assert ops == {"nuevo": "I", "k5": "U", "k0": "D", "k1": "D"}
+    assert changes.loc[changes[ROW_KEY] == "k5", "deuda"].item() == "-5"
+
+
+def test_unchanged_period_writes_nothing(gcs):
+    _applied({"a": 1, "b": 2})
+    uploads = gcs.uploads
+    out = write_changeset(_piece({"b": 2, "a": 1}), **KW)
+    assert out == {"insert": 0, "change": 0, "delete": 0, "path": None, "state": None, "periodo": "2025-01"}
+    assert gcs.uploads == uploads
+
+
+def test_duplicate_row_key_keeps_last(gcs):
+    _applied({"a": 1})
+    piece = pd.concat([_piece({"a": 9}), _piece({"a": 1})], ignore_index=True)
+    out = write_changeset(piece, **KW)
+    assert out["path"] is None  # la última fila de "a" es la ya aplicada
+
+    out = write_changeset(pd.concat([_piece({"a": 1}), _piece({"a": 9})], ignore_index=True), **KW)
+    changes = _download_landing("b", out["path"].split("gs://b/", 1)[1])
+    assert changes[[ROW_KEY, "deuda", OP_COLUMN]].values.tolist() == [["a", "9", "U"]]
+
+
+def test_unapplied_changes_are_sent_again(gcs):
+    _applied({"a": 1, "b": 2})
+    first = write_changeset(_piece({"a": 1, "b": 3}), **KW)
+    # Sin promover (refresh fallido o apagado): el estado aplicado no se movió
+    second = write_changeset(_piece({"a": 4, "b": 3}), **KW)
+    assert (second["insert"], second["change"], second["delete"]) == (0, 2, 0)
+
+    # Promover tarde la primera corrida no pisa a la segunda, ya promovida
+    promote_states([second["state"]])
+    assert promote_states([first["state"]]) == []
+    assert _objects(gcs, "_state") == [APPLIED]
+    assert write_changeset(_piece({"a": 4, "b": 3}), **KW)["path"] is None
+
+
+class FakeBigQuery:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    def load_table_from_uri(self, uris, table, job_config):
+        self.calls.append(table)
+        return SimpleNamespace(result=lambda: None, output_rows=len(uris), job_id=f"load-{len(self.calls)}")
+
+    def query(self, sql, job_config):
+        self.calls.append(sql)
+        if self.fail:
+            raise RuntimeError("BigQuery no disponible")
+        return SimpleNamespace(result=lambda: None, total_bytes_processed=0, job_id=f"q-{len(self.calls)}")
+
+
+def test_orchestrator_promotes_state_only_after_refresh(gcs):
+    _applied({"a": 1})
+    change = write_changeset(_piece({"a": 2}), **KW)
+    result = {"periods": ["2025-01"], "saved": [], "changes": {"2025-01": change}}
+
+    with pytest.raises(RuntimeError):
+        orchestrator.refresh_affected(result, "2025-01-15", project="x", client=FakeBigQuery(fail=True))
+    assert write_changeset(_piece({"a": 2}), **KW)["change"] == 1  # sigue sin aplicarse
+
+    out = orchestrator.refresh_affected(result, "2025-01-15", project="x", client=FakeBigQuery())
+    assert out["changes"]["periods"] == ["2025-01"] and out["states_promoted"] == 1
+    assert write_changeset(_piece({"a": 2}), **KW)["path"] is None
@@ -0,0 +1,51 @@
+# landing/simbad/tests/test_gcs_common.py
+import time
+
+import pytest
+
+from simbad.gcs_common import GcsLeaseBackend, Lease, LeaseLost, ensure_lease, put_if_changed
+from simbad.sink import _storage_client
+
+
+def _bucket():
+    return _storage_client().bucket("b")
+
+
+def _lease(owner=None, ttl=60.0):
+    return Lease(GcsLeaseBackend(_bucket(), "p/_lock.json"), owner=owner, ttl=ttl)
+
+
+def test_put_if_changed_skips_identical_content(gcs):
+    assert put_if_changed(_bucket(), "p/x.csv", b"a,b\n1,2\n", "text/csv")
+    generation = gcs.generations[("b", "p/x.csv")]
+    assert not put_if_changed(_bucket(), "p/x.csv", b"a,b\n1,2\n", "text/csv")
+    assert gcs.generations[("b", "p/x.csv")] == generation
+
+    assert put_if_changed(_bucket(), "p/x.csv", b"a,b\n1,3\n", "text/csv")
+    assert gcs.generations[("b", "p/x.csv")] > generation
+    assert put_if_changed(_bucket(), "p/x.csv", b"a,b\n1,3\n", "text/csv", skip_identical=False)
+
+
+def test_gcs_lease_acquire_duplicate_and_expiry():
+    a, b = _lease(), _lease()
+    assert a.acquire()
+    assert not b.acquire()
+    assert b.holder["owner"] == a.owner
+
+    c = _lease(ttl=0.05)
+    a.release()
+    assert c.acquire()
+    time.sleep(0.1)
+    assert b.acquire()  # vencido: se toma
+    assert not c.renew() and c.lost
+
+
+def test_lost_gcs_lease_aborts_writes():
+    a = _lease(ttl=60.0)
+    assert a.acquire()
+    with a.heartbeat():
+        ensure_lease()
+        a.expires = 0  # sin renovar a tiempo
+        with pytest.raises(LeaseLost):
+            ensure_lease()
+    ensure_lease()  # fuera de la corrida no hay lease que verificar
@@ -0,0 +1,75 @@
+# landing/simbad/tests/test_gold_local.py
+import datetime as dt
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("duckdb")
+
+from simbad.gold_local import check_parity, compute_gold  # noqa: E402
+
+COLUMNS = ["periodo", "entidad", "provincia", "moneda", "genero", "persona",
+           "deudaCapital", "deudaVencida", "cantidadCredito"]
+
+
+def _write(path, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(rows, columns=COLUMNS).to_csv(path, index=False)
+
+
+@pytest.fixture
+def landing(tmp_path):
+    """
+    Dos capturas de landing. La de dt=2025-02-10 reemplaza la fila de BHD de la
+    anterior (mismo row_key) y trae un importe basura y un período inválido.
+    """
+    _write(tmp_path / "dt=2025-01-10" / "a.csv", [
+        ["2025-01", "BHD", "SANTO DOMINGO", "DOP", "Femenino", "Física", "999", "1", "1"],
+    ])
+    _write(tmp_path / "dt=2025-02-10" / "b.csv", [
+        ["2025-01", "BHD", "SANTO DOMINGO", "DOP", "Femenino", "Física", "1,000.50", "100", "3"],
+        ["2025-01", "BANRESERVAS", "SANTO DOMINGO", "USD", "Masculino", "Física", "$2,000", "50", "2.0"],
+        ["2025-01", "BHD", "SANTO DOMINGO", "DOP", "Femenino", "Jurídica", "n/d", None, "1"],
+        ["2025-13", "SCOTIABANK", "SANTO DOMINGO", "DOP", "N/A", "Física", "7000", "7000", "9"],
+        ["2025-01", "BHD", "SANTIAGO", "DOP", "Masculino", "Física", "500", "0", "4"],
+        ["2025-02", "BANRESERVAS", "SANTO DOMINGO", "DOP", "Femenino", "Física", "0", "10", "1"],
+    ])
+    return tmp_path
+
+
+def test_compute_gold_known_values(landing):
+    gold = compute_gold([str(landing)])
+    gold = gold.assign(periodo_date=pd.to_datetime(gold["periodo_date"]).dt.date).set_index(["periodo_date", "PROVINCIA"])
+    assert sorted(gold.index) == [
+        (dt.date(2025, 1, 1), "SANTIAGO"),
+        (dt.date(2025, 1, 1), "SANTO DOMINGO"),
+        (dt.date(2025, 2, 1), "SANTO DOMINGO"),
+    ]
+
+    sd = gold.loc[(dt.date(2025, 1, 1), "SANTO DOMINGO")]
+    # 1000.50 (la captura más reciente, no 999) + 2000; "n/d" cuenta como 0
+    assert sd["DEUDACAPITAL"] == pytest.approx(3000.5)
+    assert sd["DEUDAVENCIDA"] == pytest.approx(150.0)
+    assert sd["TASA_MORA"] == pytest.approx(150.0 / 3000.5)
+    # "2.0" no es un INT64 válido para SAFE_CAST
+    assert sd["CANTIDADCREDITO"] == 4
+    # SCOTIABANK solo aparece con el período inválido
+    assert (sd["ENTIDAD"], sd["GENERO"], sd["MONEDA"], sd["PERSONA"]) == (2, 2, 2, 2)
+
+    stgo = gold.loc[(dt.date(2025, 1, 1), "SANTIAGO")]
+    assert (stgo["DEUDACAPITAL"], stgo["TASA_MORA"], stgo["ENTIDAD"]) == (500.0, 0.0, 1)
+
+    # Sin deuda capital la tasa es 0, no una división por cero
+    feb = gold.loc[(dt.date(2025, 2, 1), "SANTO DOMINGO")]
+    assert (feb["DEUDAVENCIDA"], feb["TASA_MORA"]) == (10.0, 0.0)
+
+
+def test_compute_gold_period_bounds(landing):
+    gold = compute_gold([str(landing)], desde="2025-02", hasta="2025-02")
+    assert gold["PROVINCIA"].tolist() == ["SANTO DOMINGO"]
+
+
+def test_check_parity_against_pandas_reference(landing):
+    parity = check_parity([str(landing)])
+    assert parity["ok"], parity
+    assert parity["rows"] == parity["rows_ref"] == 3
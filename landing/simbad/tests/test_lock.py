@@ -0,0 +1,108 @@
+# landing/simbad/tests/test_lock.py
+import json
+import time
+
+import pytest
+
+from simbad import lock
+from simbad.lock import LeaseLost, RunLease, ensure_lease, locked_run
+from simbad.manifest import MANIFEST_NAME, update_manifest
+
+
+@pytest.fixture(autouse=True)
+def file_lock(tmp_path, monkeypatch):
+    """Lock en un directorio local (`_FileBackend`), como con SB_LOCK_URI=/ruta."""
+    monkeypatch.setattr(lock, "LOCK_URI", str(tmp_path))
+    monkeypatch.setattr(lock, "RUN_LOCK", True)
+    return tmp_path / "p" / "d" / lock.LOCK_NAME
+
+
+def _lease(owner=None, ttl=60.0):
+    return RunLease("b", "p", "d", owner=owner, ttl=ttl)
+
+
+@locked_run
+def _harvest(bucket, prefix, dataset, finalize=True, body=None):
+    return body() if body else {"rows": 1}
+
+
+def test_file_backend_acquire_and_release(file_lock):
+    a, b = _lease(), _lease()
+    assert isinstance(a.backend, lock._FileBackend)
+    assert a.acquire()
+    assert json.loads(file_lock.read_text())["owner"] == a.owner
+
+    assert not b.acquire()
+    assert b.holder["owner"] == a.owner
+
+    b.release()  # no es suyo: no lo borra
+    assert file_lock.exists()
+    a.release()
+    assert not file_lock.exists()
+    assert b.acquire()
+
+
+def test_duplicate_call_is_skipped(file_lock):
+    def body():
+        dup = _harvest("b", "p", "d")
+        return {"rows": 1, "dup": dup}
+
+    res = _harvest("b", "p", "d", body=body)
+    assert res["rows"] == 1
+    assert res["dup"]["skipped"] == "locked"
+    assert res["dup"]["rows"] == 0
+    assert res["dup"]["lock"]["owner"].startswith("run:")
+    assert not file_lock.exists()  # la corrida lo liberó al terminar
+    assert _harvest("b", "p", "d") == {"rows": 1}
+
+
+def test_shard_tasks_skip_lock(file_lock):
+    held = _lease()
+    assert held.acquire()
+    # finalize=False: el lease lo toma sharding.run_shard, no el harvester
+    assert _harvest("b", "p", "d", finalize=False) == {"rows": 1}
+
+
+def test_expired_lease_is_taken_over(file_lock):
+    a = _lease(ttl=0.2)
+    assert a.acquire()
+    assert not _lease().acquire()
+    time.sleep(0.3)
+
+    b = _lease()
+    assert b.acquire()
+    assert not a.renew()
+    assert a.lost and not a.valid()
+    a.release()  # ya no es suyo
+    assert json.loads(file_lock.read_text())["owner"] == b.owner
+
+
+def test_heartbeat_keeps_lease_past_ttl(file_lock):
+    a = _lease(ttl=0.3)
+    assert a.acquire()
+    with a.heartbeat():
+        time.sleep(0.8)
+        assert a.valid()
+        assert not _lease().acquire()
+        ensure_lease()
+
+
+def test_lost_lease_aborts_writes(file_lock, gcs, monkeypatch):
+    monkeypatch.setattr(lock, "LOCK_TTL", 0.3)
+
+    def body():
+        # Otra corrida se queda con el lock (p. ej. tras una pausa larga de esta)
+        held, generation = lock._FileBackend(file_lock).read()
+        lock._FileBackend(file_lock).write({**held, "owner": "run:otra", "expires": time.time() + 60}, generation)
+        time.sleep(0.3)  # al menos un heartbeat
+        update_manifest("b", "p", "d", {"2024-01": {"rows": 10, "path": None}})
+        return {"rows": 1}
+
+    with pytest.raises(LeaseLost):
+        _harvest("b", "p", "d", body=body)
+    assert ("b", f"p/d/{MANIFEST_NAME}") not in gcs.objects
+    assert json.loads(file_lock.read_text())["owner"] == "run:otra"
+
+
+def test_no_lease_outside_a_run():
+    ensure_lease()  # sin corrida con lock no hay nada que comprobar
@@ -0,0 +1,47 @@
+# landing/simbad/tests/test_manifest.py
+import json
+
+import pytest
+
+from simbad import manifest
+from simbad.manifest import MANIFEST_NAME, load_manifest, update_manifest
+from simbad.sink import _storage_client
+
+OBJECT = f"p/d/{MANIFEST_NAME}"
+
+
+def _blob():
+    return _storage_client().bucket("b").blob(OBJECT)
+
+
+def test_missing_manifest_is_empty():
+    assert load_manifest("b", "p", "d") == {"dataset": "d", "periods": {}}
+
+
+def test_corrupt_manifest_raises_and_is_not_overwritten(gcs):
+    _blob().upload_from_string("{no es json", content_type="application/json")
+    with pytest.raises(ValueError):
+        load_manifest("b", "p", "d")
+    with pytest.raises(ValueError):
+        update_manifest("b", "p", "d", {"2025-01": {"rows": 1, "path": None}})
+    assert gcs.objects[("b", OBJECT)] == b"{no es json"
+
+
+def test_update_merges_a_concurrent_write(monkeypatch):
+    update_manifest("b", "p", "d", {"2025-01": {"rows": 1, "path": None}})
+    read = manifest._read
+    calls = []
+
+    def racing_read(*args):
+        # Otro escritor registra 2025-02 justo después de nuestra primera lectura
+        out = read(*args)
+        if not calls:
+            calls.append(1)
+            data = json.loads(_blob().download_as_text())
+            data["periods"]["2025-02"] = {"rows": 2, "path": None}
+            _blob().upload_from_string(json.dumps(data), content_type="application/json")
+        return out
+
+    monkeypatch.setattr(manifest, "_read", racing_read)
+    update_manifest("b", "p", "d", {"2025-03": {"rows": 3, "path": None}})
+    assert sorted(load_manifest("b", "p", "d")["periods"]) == ["2025-01", "2025-02", "2025-03"]
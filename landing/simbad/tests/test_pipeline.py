@@ -0,0 +1,22 @@
+# landing/simbad/tests/test_pipeline.py
+import pandas as pd
+import pytest
+
+from simbad import pipeline
+from simbad.sink import _download_landing
+from simbad.transform import DERIVED_COLUMNS, PREFERRED_COLUMNS, ROW_KEY
+
+
+@pytest.mark.parametrize("derive", [True, False])
+def test_finish_period_writes_landing_in_positional_order(monkeypatch, derive):
+    monkeypatch.setattr(pipeline, "DERIVE_COLUMNS", derive)
+    # La API devuelve las columnas en otro orden y con extras
+    api_order = ["extra"] + PREFERRED_COLUMNS[::-1]
+    raw = pd.DataFrame([{c: "1" for c in api_order}]).assign(
+        periodo="2025-01", tipoCartera="Créditos Hipotecarios", __periodo="2025-01")
+
+    df, path = pipeline._finish_period(raw, "2025-01", "b", lambda p: f"p/d/periodo={p}/x_{p}.csv")
+    expected = PREFERRED_COLUMNS + [ROW_KEY] + (DERIVED_COLUMNS if derive else [])
+    assert list(df.columns[:len(expected)]) == expected
+    written = _download_landing("b", path.split("gs://b/", 1)[1])
+    assert list(written.columns[:len(expected)]) == expected
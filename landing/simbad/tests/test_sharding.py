@@ -0,0 +1,123 @@
+# landing/simbad/tests/test_sharding.py
+import itertools
+import json
+
+import pandas as pd
+import pytest
+
+from simbad import lock
+from simbad.harvester import consolidated_object
+from simbad.manifest import MANIFEST_NAME, load_manifest
+from simbad.periods import ForcedPeriods, _fmt_period
+from simbad.sharding import SHARD_DIR, Shard, current_shard, finalize, run_shard
+from simbad.sink import _download_landing, _upload_landing
+
+PLAN = [f"2024-{m:02d}" for m in range(1, 12)]
+KW = dict(bucket="b", prefix="p", dataset="d", tipo_entidad="AAyP", run_date="2025-01-15")
+ROOT = f"p/d/{SHARD_DIR}/exec-1"
+
+
+@pytest.fixture(autouse=True)
+def file_lock(tmp_path, monkeypatch):
+    monkeypatch.setattr(lock, "LOCK_URI", str(tmp_path))
+    monkeypatch.setattr(lock, "RUN_LOCK", True)
+    return tmp_path / "p" / "d" / lock.LOCK_NAME
+
+
+class StandInHarvest:
+    """`run_harvest(finalize=False)` sin API: un archivo por período con 2 filas."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, strategy, finalize, bucket, prefix, dataset, tipo_entidad, run_date):
+        assert finalize is False
+        periods = [_fmt_period(p) for p in strategy.periods()]
+        self.calls.append(periods)
+        entries = {}
+        for periodo in periods:
+            df = pd.DataFrame({"periodo": [periodo] * 2, "entidad": ["BHD", "BANRESERVAS"]})
+            path = _upload_landing(df, bucket, f"{prefix}/{dataset}/monthly/periodo={periodo}/x_{periodo}.csv")
+            entries[periodo] = {"rows": len(df), "path": path}
+        return {"rows": 2 * len(periods), "entries": entries, "layout": "consolidated",
+                "page_size": {"best": 100}}
+
+
+def _objects(gcs, suffix):
+    return sorted(n for (_, n) in gcs.objects if n.endswith(suffix))
+
+
+def _run(harvest, index, count, periods=PLAN):
+    return run_shard(harvest, ForcedPeriods(periods), Shard(index, count, "exec-1"), consolidated_object, **KW)
+
+
+def test_current_shard_from_cloud_run_env(monkeypatch):
+    for var in ("CLOUD_RUN_TASK_INDEX", "CLOUD_RUN_TASK_COUNT", "CLOUD_RUN_EXECUTION"):
+        monkeypatch.delenv(var, raising=False)
+    assert current_shard("2025-01-15") == Shard(0, 1, "local-2025-01-15")
+    monkeypatch.setenv("CLOUD_RUN_TASK_INDEX", "2")
+    monkeypatch.setenv("CLOUD_RUN_TASK_COUNT", "4")
+    monkeypatch.setenv("CLOUD_RUN_EXECUTION", "exec-9")
+    assert current_shard("2025-01-15") == Shard(2, 4, "exec-9")
+
+
+@pytest.mark.parametrize("count", [1, 3, 4])
+def test_shards_cover_the_plan_exactly_once(count):
+    harvest = StandInHarvest()
+    for index in range(count):
+        _run(harvest, index, count)
+    covered = list(itertools.chain.from_iterable(harvest.calls))
+    assert sorted(covered) == PLAN
+    assert len(covered) == len(set(covered))
+    # Bloques contiguos, en orden de tarea
+    assert covered == PLAN
+
+
+def test_plan_is_frozen_by_the_first_task():
+    harvest = StandInHarvest()
+    _run(harvest, 0, 2)
+    # La segunda tarea ve otra lista (p. ej. el manifest cambió): reparte la congelada
+    _run(harvest, 1, 2, periods=PLAN[:3])
+    assert list(itertools.chain.from_iterable(harvest.calls)) == PLAN
+
+
+def test_only_the_last_task_finalizes(gcs, file_lock):
+    harvest = StandInHarvest()
+    results = []
+    for index in (2, 0):
+        results.append(_run(harvest, index, 3))
+        assert "finalized" not in results[-1]
+        assert _objects(gcs, MANIFEST_NAME) == []
+        assert [n for (_, n) in gcs.objects if "consolidado_" in n] == []
+        assert _objects(gcs, "_finalized") == []
+        # Las tareas que no finalizan dejan el lease de la ejecución
+        assert json.loads(file_lock.read_text())["owner"] == "execution:exec-1"
+
+    last = _run(harvest, 1, 3)
+    final = last["finalized"]
+    assert _objects(gcs, "_finalized") == [f"{ROOT}/_finalized"]
+    assert not file_lock.exists()
+
+    assert final["periods"] == PLAN
+    assert final["rows"] == 2 * len(PLAN) and final["shards"] == 3
+    assert (final["from"], final["to"]) == (PLAN[0], PLAN[-1])
+    consolidated = _download_landing("b", final["consolidated"].split("gs://b/", 1)[1])
+    assert sorted(consolidated["periodo"].unique()) == PLAN
+    assert len(consolidated) == 2 * len(PLAN)
+
+    manifest = load_manifest("b", "p", "d")
+    assert sorted(manifest["periods"]) == PLAN
+    assert manifest["tuning"] == {"page_size": 100}
+
+    # Una finalización repetida (otra tarea, o a mano) no vuelve a escribir
+    uploads = gcs.uploads
+    assert finalize("b", "p", "d", "AAyP", "2025-01-15", Shard(0, 3, "exec-1"), consolidated_object) is None
+    assert gcs.uploads == uploads
+
+
+def test_other_execution_is_skipped_while_shards_hold_the_lease(gcs):
+    harvest = StandInHarvest()
+    _run(harvest, 0, 2)
+    other = run_shard(harvest, ForcedPeriods(PLAN), Shard(0, 2, "exec-2"), consolidated_object, **KW)
+    assert other["skipped"] == "locked"
+    assert len(harvest.calls) == 1
@@ -0,0 +1,60 @@
+# landing/simbad/tests/test_transform.py
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from simbad.transform import DIMENSION_COLUMNS, _row_key
+
+ROW = ["2025-01", "Hipotecario", "AAyP", "BANCO X", "Hogares", "Ozama", "SANTO DOMINGO", "DOP",
+       "Créditos Hipotecarios", "Adquisición de viviendas", "Privado", "Física", "Préstamo", "Residente",
+       "Privada Nacional", "Femenino", "Deudor", "Grande"]
+
+# SUBSTR(TO_HEX(SHA256(ARRAY_TO_STRING([TRIM(...), ...], '\x1f', ''))), 1, 32) de
+# bronze.simbad_row_key (bigquery_processing/schemas/functions.sql) para estas filas
+EXPECTED = {
+    "full": "2a1329a742fbf38376073ffee7d46c47",
+    "whitespace_and_null": "e09634bb2bb849a448fb63a870c6740e",
+    "missing_columns": "6e7fb35b67929bfcacd90e4915289ab5",
+}
+
+
+def _reference(df: pd.DataFrame) -> pd.Series:
+    """Fila a fila, como la UDF."""
+    def key(row):
+        parts = ["" if c not in df.columns or pd.isna(row[c]) else str(row[c]).strip() for c in DIMENSION_COLUMNS]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()[:32]
+    return df.apply(key, axis=1).astype("string")
+
+
+def test_row_key_matches_sql_udf():
+    full = dict(zip(DIMENSION_COLUMNS, ROW))
+    padded = {**full, "entidad": "  BANCO X ", "genero": None}
+    df = pd.DataFrame([full, padded, {**full, "entidad": "BANCO X"}])
+    assert _row_key(df).tolist() == [EXPECTED["full"], EXPECTED["whitespace_and_null"], EXPECTED["full"]]
+
+    # Sin la mayoría de las columnas: cuentan como ''
+    sparse = pd.DataFrame({"periodo": ["2024-12"], "entidad": ["BHD"]})
+    assert _row_key(sparse).tolist() == [EXPECTED["missing_columns"]]
+    assert _row_key(sparse.assign(moneda=[np.nan], genero=["   "])).tolist() == [EXPECTED["missing_columns"]]
+
+
+def test_row_key_matches_row_by_row_reference():
+    rnd = np.random.default_rng(7)
+    n = 500
+    df = pd.DataFrame({
+        "periodo": rnd.choice(["2024-12", "2025-01", " 2025-01"], n),
+        "entidad": rnd.choice(["BHD", "BANRESERVAS ", None, "ASOC. CIBAO"], n),
+        "provincia": rnd.choice(["SANTIAGO", "LA VEGA", ""], n),
+        "moneda": pd.array(rnd.choice(["DOP", "USD", None], n), dtype="string"),
+        "genero": rnd.choice(["Masculino", "Femenino"], n),
+    }, index=rnd.permutation(n))
+    out = _row_key(df)
+    assert out.dtype == "string"
+    assert out.index.equals(df.index)
+    pd.testing.assert_series_equal(out, _reference(df), check_names=False)
+
+
+def test_row_key_empty_frame():
+    out = _row_key(pd.DataFrame({"periodo": pd.Series([], dtype=object)}))
+    assert len(out) == 0 and out.dtype == "string"